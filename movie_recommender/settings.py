@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,6 +28,8 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+INTERNAL_IPS = ['127.0.0.1']
+
 
 # Application definition
 
@@ -41,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recommender.middleware.MetricsMiddleware',
+    'recommender.middleware.SlowRequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'recommender.context_processors.fragment_versions',
             ],
         },
     },
@@ -77,10 +83,98 @@ WSGI_APPLICATION = 'movie_recommender.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # Overridable so `manage.py loadtest` can boot workers on a throwaway database
+        'NAME': os.environ.get('RECOMMENDER_DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
+        # Seconds a connection waits for another process's write lock before
+        # "database is locked" (the default of 5 is too short with several workers)
+        'OPTIONS': {'timeout': 20},
+        # The migration history does not create every table (e.g. Profile), so
+        # the test database is built straight from the models
+        'TEST': {'MIGRATE': False},
     }
 }
 
+# Applied to every SQLite connection at setup (see recommender.signals)
+RECOMMENDER_SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+}
+# WAL lets readers run alongside a writer, but journal_mode is persisted in
+# the database file itself, so it is opt-in (RECOMMENDER_SQLITE_WAL=1) and the
+# checked-in db.sqlite3 is never rewritten by a plain manage.py command
+if os.environ.get('RECOMMENDER_SQLITE_WAL', '').lower() in ('1', 'true', 'yes'):
+    RECOMMENDER_SQLITE_PRAGMAS['journal_mode'] = 'WAL'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'movie-recommender',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+}
+
+# Rendered movie tiles and rails are cached per (artifact version, template
+# version); bump the template version whenever tile/rail markup changes.
+RECOMMENDER_TEMPLATE_VERSION = 2
+RECOMMENDER_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Dashboard and movie page rails load separately from the page shell. When
+# True, rails above the fold are streamed in the page response right after
+# the shell (StreamingHttpResponse) instead of being fetched by the browser.
+RECOMMENDER_STREAM_RAILS = False
+
+# Weight of the collaborative-filtering score (models/cf_factors.npz, built
+# by `manage.py train_cf`) in hybrid ranking; ignored when no factors exist
+RECOMMENDER_CF_WEIGHT = 0.3
+
+# Weight of the PreferenceWeights score (genre, runtime, language and
+# sensitivity weights against each movie's features) in hybrid ranking
+RECOMMENDER_PREFERENCE_WEIGHT = 0.2
+
+# Hybrid-ranking boost for movies crediting one of the user's preferred
+# actors or directors (UserPreference.preferred_actors)
+RECOMMENDER_PEOPLE_BOOST = 0.15
+
+# Profiles with fewer ratings than this also get For You candidates from the
+# catalog clusters closest to their ratings (models/clusters.npz, built by
+# `manage.py build_clusters`); /onboarding/ asks new profiles for that many
+RECOMMENDER_COLD_START_RATINGS = 5
+
+# A/B experiments over the For You ranking parameters; see
+# recommender/experiments.py for the format and `manage.py experiment_report`
+# for per-variant latency, cache hit rate and engagement
+RECOMMENDER_EXPERIMENTS = {}
+
+# Directory of the model artifacts (processed_movies.pkl, count_matrix.npz,
+# count_vectorizer.pkl and the optional cf_factors/neighbors/clusters files)
+RECOMMENDER_MODELS_DIR = os.environ.get('RECOMMENDER_MODELS_DIR', str(BASE_DIR / 'models'))
+
+# 'local': every worker loads its own copy of the model artifacts.
+# 'shared': workers attach read-only views of the arrays published into
+# shared memory by `manage.py publish_artifacts` (falls back to 'local' when
+# nothing is published), so model memory is paid once per machine.
+RECOMMENDER_ARTIFACT_LOADER = os.environ.get('RECOMMENDER_ARTIFACT_LOADER', 'local')
+RECOMMENDER_SHARED_MANIFEST = os.environ.get(
+    'RECOMMENDER_SHARED_MANIFEST', os.path.join(RECOMMENDER_MODELS_DIR, 'shared_manifest.json')
+)
+
+# Hot-path timings, cache hit rates and DB query counts, exposed at /metrics/
+# (Prometheus text format) and in each response's Server-Timing header
+RECOMMENDER_METRICS_ENABLED = True
+
+# Opt-in stack sampling of slow requests; collapsed stacks (flamegraph input)
+# are written to OUTPUT_DIR for requests slower than THRESHOLD_MS
+RECOMMENDER_PROFILER = {
+    'ENABLED': False,
+    'THRESHOLD_MS': 1000,
+    'INTERVAL_MS': 10,
+    'OUTPUT_DIR': BASE_DIR / 'profiles',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,344 @@
+import re
+import numpy as np
+
+# Fields materialized for every movie tile / recommendation payload
+MOVIE_FIELDS = ('id', 'title', 'overview', 'genres', 'release_year', 'vote_average')
+
+# Maturity codes stored per row; certifications not listed here are unknown
+MATURITY_UNKNOWN, MATURITY_KIDS, MATURITY_TEEN, MATURITY_ADULT = 0, 1, 2, 3
+MATURITY_CODES = {
+    'G': MATURITY_KIDS, 'PG': MATURITY_KIDS, 'U': MATURITY_KIDS,
+    'TV-Y': MATURITY_KIDS, 'TV-Y7': MATURITY_KIDS, 'TV-G': MATURITY_KIDS, 'TV-PG': MATURITY_KIDS,
+    'PG-13': MATURITY_TEEN, '12': MATURITY_TEEN, '12A': MATURITY_TEEN, 'TV-14': MATURITY_TEEN,
+    'R': MATURITY_ADULT, 'NC-17': MATURITY_ADULT, '18': MATURITY_ADULT, 'TV-MA': MATURITY_ADULT,
+}
+# Billed cast members kept per movie
+MAX_CAST = 10
+# Unrated movies are shown to kids profiles only with one of these genres...
+KIDS_GENRES = ('Family', 'Animation')
+# ...and none of these
+KIDS_BLOCKED_GENRES = ('Horror',)
+
+
+def maturity_code(rating):
+    if not isinstance(rating, str):
+        return MATURITY_UNKNOWN
+    return MATURITY_CODES.get(rating.strip().upper(), MATURITY_UNKNOWN)
+
+
+class StringColumn:
+    """Offset-encoded UTF-8 strings: one byte buffer plus an offsets array."""
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values, transform=None):
+        encoded = []
+        for value in values:
+            value = value if isinstance(value, str) else ''
+            if transform is not None:
+                value = transform(value)
+            encoded.append(value.encode('utf-8'))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8')
+
+    def find_rows(self, needle):
+        """Rows whose value contains the UTF-8 encoded needle (in row order)."""
+        if not needle:
+            return np.arange(len(self), dtype=np.int64)
+        # Zero-width lookahead so a match straddling two values can't hide a real one
+        starts = np.fromiter(
+            (m.start() for m in re.finditer(b'(?=' + re.escape(needle) + b')', self.data)),
+            dtype=np.int64,
+        )
+        if not len(starts):
+            return starts
+        rows = np.searchsorted(self.offsets, starts, side='right') - 1
+        # Discard matches that straddle two values
+        ends = starts + len(needle)
+        rows = rows[ends <= self.offsets[rows + 1]]
+        return np.unique(rows)
+
+
+class MovieRecord:
+    """Lightweight view of one catalog row, built only for movies being rendered."""
+    __slots__ = MOVIE_FIELDS
+
+    def __init__(self, id, title, overview, genres, release_year, vote_average):
+        self.id = id
+        self.title = title
+        self.overview = overview
+        self.genres = genres
+        self.release_year = release_year
+        self.vote_average = vote_average
+
+    def __getitem__(self, key):
+        # Dict-style access keeps templates and older callers working
+        if key not in MOVIE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in MOVIE_FIELDS else default
+
+    def keys(self):
+        return MOVIE_FIELDS
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in MOVIE_FIELDS}
+
+    def __repr__(self):
+        return f"MovieRecord(id={self.id}, title={self.title!r})"
+
+
+class MovieCatalog:
+    """
+    Read-only columnar movie metadata.
+
+    Numeric fields are numpy arrays, strings are offset-encoded UTF-8 buffers
+    and genres are stored CSR-style as int codes. Row ``i`` matches row ``i``
+    of the count matrix.
+    """
+
+    def __init__(self, arrays, genre_names, language_names=()):
+        self.arrays = arrays
+        self.genre_names = list(genre_names)
+        self.language_names = list(language_names)
+        self.ids = arrays['ids']
+        self.release_year = arrays['release_year']
+        self.vote_average = arrays['vote_average']
+        self.vote_count = arrays['vote_count']
+        self.title = StringColumn(arrays['title_data'], arrays['title_offsets'])
+        self.overview = StringColumn(arrays['overview_data'], arrays['overview_offsets'])
+        self.title_lower = StringColumn(arrays['title_lower_data'], arrays['title_lower_offsets'])
+        self.genre_indptr = arrays['genre_indptr']
+        self.genre_codes = arrays['genre_codes']
+        self.maturity = arrays['maturity']
+        self.runtime = arrays['runtime']
+        self.language_codes = arrays['language_codes']
+        # People are CSR-style codes into ``person_names``; director -1 is unknown
+        self.person_names = StringColumn(arrays['person_data'], arrays['person_offsets'])
+        self.cast_indptr = arrays['cast_indptr']
+        self.cast_codes = arrays['cast_codes']
+        self.director_codes = arrays['director_codes']
+
+        # Derived lookup arrays; taken from ``arrays`` when they were
+        # published along with the data (see export_arrays)
+        self._genre_lookup = {name.lower(): code for code, name in enumerate(self.genre_names)}
+        if 'id_order' in arrays:
+            self._id_order = arrays['id_order']
+            self._sorted_ids = arrays['sorted_ids']
+            self._genre_rows = arrays['genre_rows']
+            self.trending_order = arrays['trending_order']
+            self.audience_masks = {
+                key[len('audience_'):]: mask for key, mask in arrays.items() if key.startswith('audience_')
+            }
+        else:
+            self._id_order = np.argsort(self.ids, kind='stable')
+            self._sorted_ids = self.ids[self._id_order]
+            # Row of every genre entry, so genre filters are a single comparison
+            self._genre_rows = np.repeat(
+                np.arange(len(self.ids), dtype=np.int64), np.diff(self.genre_indptr)
+            )
+            self.trending_order = np.lexsort((-self.vote_count, -self.vote_average))
+            self.audience_masks = self._build_audience_masks()
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build the catalog from the processed movies DataFrame."""
+        genre_names = []
+        genre_lookup = {}
+        genre_indptr = np.zeros(len(df) + 1, dtype=np.int64)
+        genre_codes = []
+        for row, genres in enumerate(df['genres']):
+            if isinstance(genres, (list, tuple)):
+                for genre in genres:
+                    if genre not in genre_lookup:
+                        genre_lookup[genre] = len(genre_names)
+                        genre_names.append(genre)
+                    genre_codes.append(genre_lookup[genre])
+            genre_indptr[row + 1] = len(genre_codes)
+
+        ratings_column = next((c for c in ('maturity_rating', 'certification') if c in df.columns), None)
+        if ratings_column is None:
+            maturity = np.zeros(len(df), dtype=np.int8)
+        else:
+            maturity = np.fromiter((maturity_code(v) for v in df[ratings_column]), dtype=np.int8, count=len(df))
+
+        if 'runtime' in df.columns:
+            runtime = df['runtime'].fillna(0).to_numpy(dtype=np.int32)
+        else:
+            runtime = np.zeros(len(df), dtype=np.int32)
+
+        language_names = []
+        language_lookup = {}
+        language_codes = np.full(len(df), -1, dtype=np.int16)
+        language_column = next((c for c in ('original_language', 'language') if c in df.columns), None)
+        if language_column is not None:
+            for row, language in enumerate(df[language_column]):
+                if isinstance(language, str) and language:
+                    if language not in language_lookup:
+                        language_lookup[language] = len(language_names)
+                        language_names.append(language)
+                    language_codes[row] = language_lookup[language]
+
+        person_names = []
+        person_lookup = {}
+
+        def person_code(name):
+            if name not in person_lookup:
+                person_lookup[name] = len(person_names)
+                person_names.append(name)
+            return person_lookup[name]
+
+        cast_indptr = np.zeros(len(df) + 1, dtype=np.int64)
+        cast_codes = []
+        if 'cast' in df.columns:
+            for row, cast in enumerate(df['cast']):
+                if isinstance(cast, (list, tuple)):
+                    cast_codes.extend(person_code(name) for name in cast[:MAX_CAST] if isinstance(name, str) and name)
+                cast_indptr[row + 1] = len(cast_codes)
+        director_codes = np.full(len(df), -1, dtype=np.int32)
+        if 'director' in df.columns:
+            for row, director in enumerate(df['director']):
+                if isinstance(director, str) and director:
+                    director_codes[row] = person_code(director)
+        people = StringColumn.from_values(person_names)
+
+        title = StringColumn.from_values(df['title'])
+        overview = StringColumn.from_values(df['overview'])
+        title_lower = StringColumn.from_values(df['title'], transform=str.lower)
+        arrays = {
+            'ids': df['id'].to_numpy(dtype=np.int64),
+            'release_year': df['release_year'].fillna(0).to_numpy(dtype=np.int32),
+            'vote_average': df['vote_average'].fillna(0).to_numpy(dtype=np.float64),
+            'vote_count': df['vote_count'].fillna(0).to_numpy(dtype=np.int64),
+            'title_data': title.data,
+            'title_offsets': title.offsets,
+            'overview_data': overview.data,
+            'overview_offsets': overview.offsets,
+            'title_lower_data': title_lower.data,
+            'title_lower_offsets': title_lower.offsets,
+            'genre_indptr': genre_indptr,
+            'genre_codes': np.asarray(genre_codes, dtype=np.int16),
+            'maturity': maturity,
+            'runtime': runtime,
+            'language_codes': language_codes,
+            'person_data': people.data,
+            'person_offsets': people.offsets,
+            'cast_indptr': cast_indptr,
+            'cast_codes': np.asarray(cast_codes, dtype=np.int32),
+            'director_codes': director_codes,
+        }
+        return cls(arrays, genre_names, language_names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def export_arrays(self):
+        """Every array backing the catalog, including derived lookups, for sharing."""
+        arrays = {key: value for key, value in self.arrays.items()}
+        arrays.update({
+            'id_order': self._id_order,
+            'sorted_ids': self._sorted_ids,
+            'genre_rows': self._genre_rows,
+            'trending_order': self.trending_order,
+        })
+        for audience, mask in self.audience_masks.items():
+            arrays[f'audience_{audience}'] = mask
+        return arrays
+
+    def _genre_mask(self, genres):
+        """Rows tagged with any of ``genres``."""
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for genre in genres:
+            mask[self.rows_with_genre(genre)] = True
+        return mask
+
+    def _build_audience_masks(self):
+        adult = np.ones(len(self.ids), dtype=bool)
+        kids = (self.maturity == MATURITY_KIDS) | (
+            (self.maturity == MATURITY_UNKNOWN)
+            & self._genre_mask(KIDS_GENRES)
+            & ~self._genre_mask(KIDS_BLOCKED_GENRES)
+        )
+        masks = {'adult': adult, 'kids': kids}
+        for mask in masks.values():
+            mask.flags.writeable = False
+        return masks
+
+    def audience_mask(self, audience):
+        """Read-only mask of rows eligible for a profile type; unknown types get the kids mask."""
+        return self.audience_masks.get(audience, self.audience_masks['kids'])
+
+    def row_of(self, movie_id):
+        """Catalog row for a movie id, or -1 if the movie is unknown."""
+        pos = np.searchsorted(self._sorted_ids, movie_id)
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == movie_id:
+            return int(self._id_order[pos])
+        return -1
+
+    def rows_of(self, movie_ids):
+        """Vectorized ``row_of``; unknown ids map to -1."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        if not len(self._sorted_ids):
+            return np.full(len(movie_ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_ids, movie_ids)
+        pos = np.minimum(pos, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[pos] == movie_ids
+        return np.where(found, self._id_order[pos], -1)
+
+    def __contains__(self, movie_id):
+        return self.row_of(movie_id) >= 0
+
+    def genre_codes_of(self, row):
+        return self.genre_codes[self.genre_indptr[row]:self.genre_indptr[row + 1]]
+
+    def genres_of(self, row):
+        return [self.genre_names[code] for code in self.genre_codes_of(row)]
+
+    def rows_with_genre(self, genre):
+        """Rows tagged with ``genre`` (case-insensitive), in row order."""
+        code = self._genre_lookup.get(genre.lower())
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(self._genre_rows[self.genre_codes == code])
+
+    def search_title(self, query):
+        """Rows whose title contains ``query`` (case-insensitive)."""
+        return self.title_lower.find_rows(query.lower().encode('utf-8'))
+
+    def top_by_rating(self, rows, limit):
+        """Order ``rows`` by vote_average descending (stable), keep ``limit``."""
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(-self.vote_average[rows], kind='stable')
+        return rows[order[:limit]]
+
+    def record(self, row):
+        return MovieRecord(
+            int(self.ids[row]),
+            self.title[row],
+            self.overview[row],
+            self.genres_of(row),
+            int(self.release_year[row]),
+            float(self.vote_average[row]),
+        )
+
+    def records(self, rows):
+        return [self.record(int(row)) for row in rows]
+
+    def get(self, movie_id):
+        """MovieRecord for a movie id, or None."""
+        row = self.row_of(movie_id)
+        return self.record(row) if row >= 0 else None
@@ -0,0 +1,130 @@
+"""
+Catalog clusters for cold-start onboarding.
+
+``build_clusters`` runs mini-batch k-means over the L2-normalized term-count
+rows (the CountVectorizer matrix the similarity scores use) and keeps, per cluster, its centroid and a short list of
+representative titles (close to the centroid and popular). Onboarding and
+the cold-start For You rail only read those lists, round-robin across
+clusters, so serving them costs O(clusters x representatives) regardless of
+catalog size.
+
+A profile's ratings are folded in at request time: its signed rating
+weights times the rated rows give a content vector, and its dot product with
+the centroids orders the clusters. Every new rating therefore reorders the
+picks immediately, with no retraining or nightly recompute.
+"""
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+from .similarity import top_k
+
+CLUSTERS_FILENAME = 'clusters.npz'
+
+# Ratings above this pull a profile towards a cluster, ratings below push it away
+NEUTRAL_RATING = 3
+
+
+def onboarding_weights(ratings):
+    return np.asarray(ratings, dtype=np.float32) - NEUTRAL_RATING
+
+
+class CatalogClusters:
+    """Cluster centroids and representative rows, aligned with catalog rows."""
+
+    def __init__(self, centroids, labels, representatives):
+        self.centroids = centroids
+        self.labels = labels
+        self.representatives = representatives
+        # Without ratings, bigger (more mainstream) clusters come first
+        self.default_order = np.argsort(-np.bincount(labels, minlength=len(centroids)), kind='stable')
+
+    def __len__(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, normalized_matrix, popularity, n_clusters=40, representatives=8, batch_size=2048,
+              seed=0, log=None):
+        """
+        Cluster the catalog and pick representative titles.
+
+        Args:
+            normalized_matrix: Row-normalized term-count CSR matrix (catalog rows)
+            popularity: Vote counts per catalog row
+            n_clusters: Number of clusters
+            representatives: Titles kept per cluster
+            batch_size: Mini-batch size
+            seed: Random seed
+            log: Optional callable receiving progress messages
+
+        Returns:
+            CatalogClusters
+        """
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=seed)
+        labels = kmeans.fit_predict(normalized_matrix).astype(np.int32)
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+        if log:
+            log(f"k-means converged after {kmeans.n_steps_} mini-batches")
+
+        # Representatives: members close to the centroid, weighted towards popular titles
+        closeness = np.asarray(normalized_matrix @ centroids.T)[np.arange(len(labels)), labels]
+        score = closeness * np.log1p(np.asarray(popularity, dtype=np.float32))
+        chosen = np.full((n_clusters, representatives), -1, dtype=np.int32)
+        for cluster in range(n_clusters):
+            members = np.flatnonzero(labels == cluster)
+            best = members[top_k(score[members], representatives)]
+            chosen[cluster, :len(best)] = best
+        return cls(centroids, labels, chosen)
+
+    def affinity(self, normalized_matrix, rows, weights):
+        """
+        Fold rated rows into per-cluster affinities.
+
+        Args:
+            normalized_matrix: Row-normalized term-count CSR matrix
+            rows: Rated catalog rows
+            weights: Signed weights from ``onboarding_weights``
+
+        Returns:
+            float32 array over clusters, or None when no rating carries a signal
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        keep = (rows >= 0) & (weights != 0)
+        if not keep.any():
+            return None
+        profile = normalized_matrix[rows[keep]].T @ weights[keep]
+        return (self.centroids @ profile).astype(np.float32)
+
+    def picks(self, n, affinity=None, mask=None):
+        """
+        Representative rows across clusters, one per cluster per pass.
+
+        Args:
+            n: Maximum number of rows
+            affinity: Optional result of ``affinity``; clusters are visited in
+                descending affinity, and clusters the profile rated down come last
+            mask: Optional eligibility mask
+
+        Returns:
+            int64 array of catalog rows
+        """
+        order = self.default_order if affinity is None else np.argsort(-affinity, kind='stable')
+        candidates = self.representatives[order].T.ravel()
+        candidates = candidates[candidates >= 0].astype(np.int64)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        return candidates[:n]
+
+    def save(self, path, catalog_ids):
+        # Through a file handle: np.savez would append '.npz' to other paths
+        with open(path, 'wb') as f:
+            np.savez(f, centroids=self.centroids, labels=self.labels, representatives=self.representatives,
+                     catalog_ids=catalog_ids)
+
+    @classmethod
+    def load(cls, path, catalog_ids):
+        """Load saved clusters; returns None when they were built for a different catalog."""
+        data = np.load(path)
+        if not np.array_equal(data['catalog_ids'], catalog_ids):
+            return None
+        return cls(data['centroids'], data['labels'], data['representatives'])
@@ -0,0 +1,194 @@
+"""
+Implicit-feedback collaborative filtering (ALS) over profile interactions.
+
+Training streams ``UserRating``, ``WatchEvent`` and ``Feedback`` rows from the
+database in chunks into compact int32/float32 arrays, builds a sparse
+profile x catalog-row confidence matrix and runs alternating least squares
+(Hu, Koren & Volinsky, 2008) with numpy only. Only the float32 item factors
+are kept; a profile's vector is folded in from its current ratings at query
+time, so new ratings count immediately without retraining.
+"""
+from array import array
+import numpy as np
+from scipy.sparse import coo_matrix
+from .models import UserRating, WatchEvent, Feedback
+
+FACTORS_FILENAME = 'cf_factors.npz'
+
+# Ratings at or below this carry no positive signal
+RATING_FLOOR = 2
+COMPLETED_WATCH_WEIGHT = 2.0
+LIKE_WEIGHT = 2.0
+
+
+def rating_weights(ratings):
+    return np.maximum(np.asarray(ratings, dtype=np.float32) - RATING_FLOOR, 0)
+
+
+class InteractionStream:
+    """Accumulates (profile, catalog row, weight) triples in compact arrays."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.profile_index = {}
+        self.users = array('i')
+        self.items = array('i')
+        self.weights = array('f')
+
+    def add(self, profile_ids, tmdb_ids, weights):
+        rows = self.catalog.rows_of(tmdb_ids)
+        weights = np.asarray(weights, dtype=np.float32)
+        keep = (rows >= 0) & (weights > 0)
+        index = self.profile_index
+        self.users.extend([
+            index.setdefault(profile_id, len(index)) for profile_id in np.asarray(profile_ids)[keep].tolist()
+        ])
+        self.items.extend(rows[keep].tolist())
+        self.weights.extend(weights[keep].tolist())
+
+    def consume(self, queryset, fields, weight_fn, chunk_size):
+        """Stream ``queryset`` in chunks of ``chunk_size`` rows."""
+        buffer = []
+        for values in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+            buffer.append(values)
+            if len(buffer) >= chunk_size:
+                self._flush(buffer, weight_fn)
+                buffer = []
+        if buffer:
+            self._flush(buffer, weight_fn)
+
+    def _flush(self, buffer, weight_fn):
+        columns = list(zip(*buffer))
+        self.add(columns[0], columns[1], weight_fn(*columns[2:]))
+
+    def to_matrix(self):
+        """Profile x catalog-row matrix of summed interaction weights."""
+        shape = (len(self.profile_index), len(self.catalog))
+        return coo_matrix(
+            (np.frombuffer(self.weights, dtype=np.float32),
+             (np.frombuffer(self.users, dtype=np.int32), np.frombuffer(self.items, dtype=np.int32))),
+            shape=shape,
+        ).tocsr()
+
+
+def stream_interactions(catalog, chunk_size=10000):
+    """Read every profile interaction from the database into an InteractionStream."""
+    stream = InteractionStream(catalog)
+    stream.consume(
+        UserRating.objects.all(), ('profile_id', 'movie__tmdb_id', 'rating'),
+        rating_weights, chunk_size,
+    )
+    stream.consume(
+        WatchEvent.objects.all(),
+        ('profile_id', 'movie__tmdb_id', 'completed', 'watch_duration', 'total_duration'),
+        lambda completed, watched, total: [
+            COMPLETED_WATCH_WEIGHT if done else min(w / t, 1.0) if t else 0.0
+            for done, w, t in zip(completed, watched, total)
+        ],
+        chunk_size,
+    )
+    stream.consume(
+        Feedback.objects.filter(feedback_type='like'), ('profile_id', 'movie__tmdb_id', 'feedback_type'),
+        lambda feedback_types: np.full(len(feedback_types), LIKE_WEIGHT, dtype=np.float32),
+        chunk_size,
+    )
+    return stream
+
+
+class ImplicitALS:
+    """Item factors of an implicit ALS model, aligned with catalog rows."""
+
+    def __init__(self, item_factors, regularization=0.1, alpha=10.0):
+        self.item_factors = item_factors.astype(np.float32, copy=False)
+        self.regularization = regularization
+        self.alpha = alpha
+        self._gram = self.item_factors.T.astype(np.float64) @ self.item_factors
+
+    @property
+    def factors(self):
+        return self.item_factors.shape[1]
+
+    @classmethod
+    def train(cls, interactions, factors=32, iterations=10, regularization=0.1, alpha=10.0, seed=0, log=None):
+        """
+        Fit item factors on a profile x item weight matrix.
+
+        Args:
+            interactions: CSR matrix (profiles x catalog rows) of weights
+            factors: Latent dimensions
+            iterations: ALS sweeps (each solves all users, then all items)
+            regularization: L2 penalty
+            alpha: Confidence scaling, c = 1 + alpha * weight
+            seed: Random seed for the initial factors
+            log: Optional callable receiving progress messages
+
+        Returns:
+            ImplicitALS
+        """
+        rng = np.random.default_rng(seed)
+        n_users, n_items = interactions.shape
+        user_factors = (rng.standard_normal((n_users, factors)) * 0.01).astype(np.float32)
+        item_factors = (rng.standard_normal((n_items, factors)) * 0.01).astype(np.float32)
+        by_item = interactions.T.tocsr()
+        for iteration in range(iterations):
+            _als_sweep(interactions, item_factors, user_factors, regularization, alpha)
+            _als_sweep(by_item, user_factors, item_factors, regularization, alpha)
+            if log:
+                log(f"ALS iteration {iteration + 1}/{iterations} done")
+        return cls(item_factors, regularization, alpha)
+
+    def fold_in(self, rows, weights):
+        """
+        Solve a profile vector against the fixed item factors.
+
+        Args:
+            rows: Catalog rows the profile interacted with
+            weights: Interaction weights for those rows
+
+        Returns:
+            float32 factor vector, or None when there is no positive signal
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        keep = (rows >= 0) & (weights > 0)
+        if not keep.any():
+            return None
+        return _solve(self.item_factors[rows[keep]], 1 + self.alpha * weights[keep],
+                      self._gram, self.regularization).astype(np.float32)
+
+    def score(self, user_vector, rows):
+        """Predicted preference of ``user_vector`` for catalog ``rows``, clipped to [0, 1]."""
+        return np.clip(self.item_factors[rows] @ user_vector, 0.0, 1.0)
+
+    def save(self, path, catalog_ids):
+        # Through a file handle: np.savez would append '.npz' to other paths
+        with open(path, 'wb') as f:
+            np.savez(f, item_factors=self.item_factors, catalog_ids=catalog_ids,
+                     regularization=self.regularization, alpha=self.alpha)
+
+    @classmethod
+    def load(cls, path, catalog_ids):
+        """Load saved factors; returns None when they were trained on a different catalog."""
+        data = np.load(path)
+        if not np.array_equal(data['catalog_ids'], catalog_ids):
+            return None
+        return cls(data['item_factors'], float(data['regularization']), float(data['alpha']))
+
+
+def _solve(factors, confidence, gram, regularization):
+    # (YtY + Yt(C - I)Y + lambda*I) x = Yt C p, with p = 1 on observed items
+    a = gram + (factors.T * (confidence - 1)) @ factors
+    a[np.diag_indices_from(a)] += regularization
+    return np.linalg.solve(a, factors.T @ confidence)
+
+
+def _als_sweep(matrix, fixed, target, regularization, alpha):
+    """Recompute every row of ``target`` against ``fixed`` factors."""
+    gram = fixed.T.astype(np.float64) @ fixed
+    for i in range(matrix.shape[0]):
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        if start == end:
+            target[i] = 0
+            continue
+        cols = matrix.indices[start:end]
+        target[i] = _solve(fixed[cols].astype(np.float64), 1 + alpha * matrix.data[start:end], gram, regularization)
@@ -0,0 +1,11 @@
+from django.conf import settings
+from .utils import recommender
+
+
+def fragment_versions(request=None):
+    """Versions that key the rendered tile and rail fragment caches."""
+    return {
+        'artifact_version': recommender.artifact_version,
+        'template_version': settings.RECOMMENDER_TEMPLATE_VERSION,
+        'fragment_timeout': settings.RECOMMENDER_FRAGMENT_TIMEOUT,
+    }
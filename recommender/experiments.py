@@ -0,0 +1,270 @@
+"""
+Deterministic A/B experiments over the recommendation parameters.
+
+Experiments are declared in ``RECOMMENDER_EXPERIMENTS``::
+
+    RECOMMENDER_EXPERIMENTS = {
+        'diversity': {
+            'variants': {
+                'control': {'weight': 50},
+                'more_diverse': {'weight': 50, 'params': {'lambda_diversity': 0.2}},
+            },
+            # Optional: reshuffle assignments by changing the salt, and pin
+            # profiles (curators, QA) to a variant
+            'salt': '1',
+            'overrides': {42: 'more_diverse'},
+        },
+    }
+
+A profile's variant is a hash of (experiment, salt, profile id) mapped onto
+the cumulative variant weights: stable across requests, processes and
+machines, with no database lookup. Variant ``params`` override the ranking
+parameters in ``RANKING_PARAMS``; ``engine`` picks the similarity engine
+('indexed' reads the precomputed neighbor file, 'live' always scores live).
+
+Per-variant latency, cache hit and engagement counters are aggregated in
+process memory and added to ``ExperimentCounter`` rows every
+``FLUSH_INTERVAL`` seconds by a background thread, so requests never wait on
+(or fail with) the counter writes; a failed flush keeps its counters for the
+next one. The rows are summed across workers, unlike the
+per-process cache, and ``manage.py experiment_report`` reads them back.
+Cached For You results are keyed by ``for_you_cache_key`` so a profile never gets
+another variant's (or an older config's) output from the cache.
+"""
+import atexit
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from .metrics import BUCKETS
+from .models import ExperimentCounter
+
+# Parameters a variant may override, with their defaults
+RANKING_PARAMS = {
+    'alpha': 0.7,
+    'beta': None,
+    'gamma': None,
+    'delta': None,
+    'lambda_diversity': 0.1,
+    'engine': 'indexed',
+}
+ENGINES = ('indexed', 'live')
+
+# Engagement events counted per variant
+EVENTS = ('rating', 'watch', 'list_add')
+
+HASH_BUCKETS = 10000
+FLUSH_INTERVAL = 60
+
+COUNTERS = (
+    'requests', 'latency_us', 'cache_hits', 'cache_misses',
+    *[f'latency_le_{bound}' for bound in BUCKETS],
+    *[f'event_{event}' for event in EVENTS],
+)
+
+
+def get_experiments():
+    return getattr(settings, 'RECOMMENDER_EXPERIMENTS', {}) or {}
+
+
+def _bucket(experiment, salt, profile_id):
+    digest = hashlib.sha1(f"{experiment}:{salt}:{profile_id}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % HASH_BUCKETS
+
+
+def variant_for(experiment, config, profile_id):
+    """Variant of one experiment for a profile (None when it has no variants)."""
+    variants = config.get('variants') or {}
+    override = (config.get('overrides') or {}).get(profile_id)
+    if override in variants:
+        return override
+    total = sum(variant.get('weight', 1) for variant in variants.values())
+    if not total:
+        return None
+    point = _bucket(experiment, config.get('salt', ''), profile_id) * total / HASH_BUCKETS
+    for name, variant in variants.items():
+        point -= variant.get('weight', 1)
+        if point < 0:
+            return name
+    return None
+
+
+def assign(profile_id):
+    """{experiment: variant} for every active experiment."""
+    assignments = {}
+    for experiment, config in get_experiments().items():
+        if config.get('enabled', True):
+            variant = variant_for(experiment, config, profile_id)
+            if variant is not None:
+                assignments[experiment] = variant
+    return assignments
+
+
+def ranking_params(assignments):
+    """
+    Ranking parameters for a profile's assignments.
+
+    Args:
+        assignments: Result of ``assign``
+
+    Returns:
+        Dict with every key of RANKING_PARAMS; later experiments win when
+        two override the same parameter
+    """
+    params = dict(RANKING_PARAMS)
+    experiments = get_experiments()
+    for experiment, variant in assignments.items():
+        overrides = experiments[experiment]['variants'][variant].get('params') or {}
+        params.update({key: value for key, value in overrides.items() if key in RANKING_PARAMS})
+    if params['engine'] not in ENGINES:
+        params['engine'] = RANKING_PARAMS['engine']
+    return params
+
+
+def cache_suffix(assignments):
+    """
+    Cache key suffix for results computed under ``assignments``.
+
+    Empty without experiments; otherwise a digest of the variants and their
+    effective parameters, so reassignments and config changes miss the cache.
+    """
+    if not assignments:
+        return ''
+    state = json.dumps([sorted(assignments.items()), ranking_params(assignments)], sort_keys=True, default=str)
+    return '_' + hashlib.sha1(state.encode()).hexdigest()[:12]
+
+
+def for_you_cache_key(profile_id, assignments=None):
+    """Cache key of a profile's For You results under its current variants."""
+    if assignments is None:
+        assignments = assign(profile_id)
+    return f"recs_{profile_id}_for_you{cache_suffix(assignments)}"
+
+
+_lock = threading.Lock()
+# {(experiment, variant, counter): value} not yet flushed
+_pending = defaultdict(int)
+_flusher = None
+
+
+def _record(assignments, counts):
+    if not assignments:
+        return
+    with _lock:
+        for experiment, variant in assignments.items():
+            for counter, value in counts.items():
+                _pending[experiment, variant, counter] += value
+    _start_flusher()
+
+
+def _start_flusher():
+    """Start this process's flush thread (again after a fork, which does not copy threads)."""
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_periodically, name='experiment-flush', daemon=True)
+            _flusher.start()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except DatabaseError as e:
+            print(f"Error flushing experiment counters: {e}")
+        finally:
+            # The thread's own connection; closed so it never goes stale between flushes
+            connection.close()
+
+
+def record_request(assignments, seconds, cache_hit):
+    """Count one served request: its latency and whether it came from the cache."""
+    counts = {
+        'requests': 1,
+        'latency_us': int(seconds * 1e6),
+        'cache_hits' if cache_hit else 'cache_misses': 1,
+    }
+    bound = next((bound for bound in BUCKETS if seconds <= bound), None)
+    if bound is not None:
+        counts[f'latency_le_{bound}'] = 1
+    _record(assignments, counts)
+
+
+def record_event(profile_id, event):
+    """Count an engagement event ('rating', 'watch', 'list_add') for a profile's variants."""
+    _record(assign(profile_id), {f'event_{event}': 1})
+
+
+def flush():
+    """
+    Add the pending counters to the shared ExperimentCounter totals.
+
+    On a DatabaseError the counters go back to the pending ones, to be
+    retried by the next flush, and the error is re-raised.
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+    try:
+        with transaction.atomic():
+            for (experiment, variant, counter), value in pending.items():
+                rows = ExperimentCounter.objects.filter(experiment=experiment, variant=variant, counter=counter)
+                if rows.update(value=F('value') + value):
+                    continue
+                # First flush of this counter; another worker may create it first
+                row, created = ExperimentCounter.objects.get_or_create(
+                    experiment=experiment, variant=variant, counter=counter, defaults={'value': value})
+                if not created:
+                    rows.update(value=F('value') + value)
+    except DatabaseError:
+        with _lock:
+            for key, value in pending.items():
+                _pending[key] += value
+        raise
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except DatabaseError as e:
+        print(f"Error flushing experiment counters: {e}")
+
+
+atexit.register(_flush_at_exit)
+
+
+def load_stats(experiment, variants):
+    """{variant: {counter: total}} of flushed counters."""
+    stats = {variant: dict.fromkeys(COUNTERS, 0) for variant in variants}
+    rows = ExperimentCounter.objects.filter(experiment=experiment, variant__in=variants, counter__in=COUNTERS)
+    for variant, counter, value in rows.values_list('variant', 'counter', 'value'):
+        stats[variant][counter] = value
+    return stats
+
+
+def reset_stats(experiment, variants):
+    ExperimentCounter.objects.filter(experiment=experiment, variant__in=variants).delete()
+
+
+def latency_quantile(stats, quantile):
+    """Upper bound (seconds) of the histogram bucket holding ``quantile``, or None."""
+    observed = sum(stats[f'latency_le_{bound}'] for bound in BUCKETS)
+    # Requests slower than the last bucket are counted but not bucketed
+    target = quantile * stats['requests']
+    if not stats['requests'] or target > observed:
+        return None
+    seen = 0
+    for bound in BUCKETS:
+        seen += stats[f'latency_le_{bound}']
+        if seen >= target:
+            return bound
+    return None
@@ -0,0 +1,130 @@
+"""
+Per-movie preference features and the matching profile weight vectors.
+
+Every catalog row gets one sparse feature row with four one-hot groups:
+genres (each genre gets 1/n_genres, so the group totals 1), runtime
+bucket, original language and sensitivity level (derived from the maturity
+code). A profile's ``PreferenceWeights`` become a dense vector over the
+same columns. A candidate's preference score is then one sparse
+matrix-vector product: the average, over the groups the profile has weights
+for, of the weight of the movie's value in that group.
+
+Runtime, language and maturity come from the catalog (see
+``utils.merge_movie_metadata``); movies without a value get an empty row in
+that group, so on a catalog that lacks a column entirely the group has no
+effect and only genre weights rank.
+"""
+import numpy as np
+from scipy.sparse import csr_matrix, hstack
+from .catalog import MATURITY_KIDS, MATURITY_TEEN, MATURITY_ADULT
+
+RUNTIME_BUCKETS = ('short', 'medium', 'long')
+# Upper bound (minutes, inclusive) of each bucket but the last
+RUNTIME_LIMITS = (90, 120)
+
+SENSITIVITY_LEVELS = ('mild', 'moderate', 'intense')
+SENSITIVITY_BY_MATURITY = {MATURITY_KIDS: 0, MATURITY_TEEN: 1, MATURITY_ADULT: 2}
+
+# PreferenceWeights field -> feature group
+WEIGHT_FIELDS = (
+    ('genre_weights', 'genre'),
+    ('runtime_weights', 'runtime'),
+    ('language_weights', 'language'),
+    ('sensitivity_weights', 'sensitivity'),
+)
+
+
+def runtime_buckets(runtime):
+    """Bucket index per runtime in minutes; -1 where the runtime is unknown (0)."""
+    buckets = np.searchsorted(RUNTIME_LIMITS, runtime, side='left').astype(np.int64)
+    return np.where(runtime > 0, buckets, -1)
+
+
+def _one_hot(codes, width):
+    """Sparse one-hot rows for ``codes``; negative codes give empty rows."""
+    codes = np.asarray(codes, dtype=np.int64)
+    known = codes >= 0
+    indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(known, out=indptr[1:])
+    return csr_matrix(
+        (np.ones(int(known.sum()), dtype=np.float32), codes[known], indptr),
+        shape=(len(codes), width),
+    )
+
+
+class FeatureMatrix:
+    """Sparse movie x feature matrix aligned with catalog rows."""
+
+    def __init__(self, matrix, columns):
+        self.matrix = matrix
+        # {group: {value name (lowercase): column}}
+        self.columns = columns
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        n_rows = len(catalog)
+
+        genre_counts = np.diff(catalog.genre_indptr)
+        genre_values = np.repeat(1.0 / np.maximum(genre_counts, 1), genre_counts).astype(np.float32)
+        genres = csr_matrix(
+            (genre_values, catalog.genre_codes.astype(np.int64), catalog.genre_indptr),
+            shape=(n_rows, len(catalog.genre_names)),
+        )
+        runtime = _one_hot(runtime_buckets(catalog.runtime), len(RUNTIME_BUCKETS))
+        language = _one_hot(catalog.language_codes, len(catalog.language_names))
+        sensitivity_codes = np.full(n_rows, -1, dtype=np.int64)
+        for maturity, level in SENSITIVITY_BY_MATURITY.items():
+            sensitivity_codes[catalog.maturity == maturity] = level
+        sensitivity = _one_hot(sensitivity_codes, len(SENSITIVITY_LEVELS))
+
+        groups = [
+            ('genre', genres, catalog.genre_names),
+            ('runtime', runtime, RUNTIME_BUCKETS),
+            ('language', language, catalog.language_names),
+            ('sensitivity', sensitivity, SENSITIVITY_LEVELS),
+        ]
+        columns = {}
+        offset = 0
+        for group, block, names in groups:
+            columns[group] = {name.lower(): offset + i for i, name in enumerate(names)}
+            offset += block.shape[1]
+        matrix = hstack([block for _, block, _ in groups], format='csr', dtype=np.float32)
+        return cls(matrix, columns)
+
+    @property
+    def width(self):
+        return self.matrix.shape[1]
+
+    def weight_vector(self, preferences):
+        """
+        Dense weight vector for a profile's PreferenceWeights.
+
+        Args:
+            preferences: PreferenceWeights instance (or None)
+
+        Returns:
+            float32 vector over the feature columns, or None without any
+            usable weights. Groups are scaled so scores stay in [0, 1] for
+            weights in [0, 1].
+        """
+        if preferences is None:
+            return None
+        vector = np.zeros(self.width, dtype=np.float32)
+        groups = 0
+        for field, group in WEIGHT_FIELDS:
+            weights = getattr(preferences, field, None) or {}
+            columns = self.columns[group]
+            used = False
+            for name, weight in weights.items():
+                column = columns.get(str(name).lower())
+                if column is not None:
+                    vector[column] = float(weight)
+                    used = True
+            groups += used
+        if not groups:
+            return None
+        return vector / groups
+
+    def score(self, vector, rows):
+        """Preference score of catalog ``rows`` for a ``weight_vector``."""
+        return self.matrix[rows] @ vector
@@ -0,0 +1,230 @@
+"""
+Set-based challenge progress and leaderboards.
+
+Scores and challenge progress come from one GROUP BY query per activity
+source (ratings, completed watches, completed challenges), so no join ever
+fans out across sources. Leaderboard rows are upserted per period with a
+single ``bulk_create(update_conflicts=True)``, and ranks are recomputed from
+the leaderboard table itself with a ``RANK()`` window function.
+
+Incremental runs rescore only the profiles with activity since the last run
+and then re-rank. ``refresh`` reads the watermark before scanning and stores
+it in a ``JobState`` row afterwards, so activity written while a run is in
+progress is picked up by the next one. Deleted activity leaves no timestamp:
+``mark_stale`` (called from the post_delete signals) clears the rank of the
+profile's rows instead, and unranked rows are rescored like touched ones.
+Rescored profiles left without points lose their rows. A period that started
+after the last run is always recomputed in full, so weekly and monthly boards
+reset on time.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.db.models import Count, F, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+from .models import Challenge, ChallengeProgress, JobState, Leaderboard, UserRating, WatchEvent
+
+PERIODS = ('weekly', 'monthly', 'all_time')
+
+RATING_POINTS = 1
+WATCH_POINTS = 3
+CHALLENGE_POINTS = 10
+
+# challenge_type -> (model, timestamp field, extra filters) of the counted activity
+CHALLENGE_SOURCES = {
+    'rate_movies': (UserRating, 'created_at', {}),
+    'watch_movies': (WatchEvent, 'last_watched', {'completed': True}),
+}
+
+WRITE_BATCH_SIZE = 1000
+
+JOB_NAME = 'leaderboards'
+
+
+def period_start(period, now=None):
+    """Start of the current ``period`` (local midnight), or None for all time."""
+    now = timezone.localtime(now or timezone.now())
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'weekly':
+        return midnight - timedelta(days=midnight.weekday())
+    if period == 'monthly':
+        return midnight.replace(day=1)
+    if period == 'all_time':
+        return None
+    raise ValueError(f"Unknown leaderboard period: {period}")
+
+
+def last_run():
+    """Watermark of the previous leaderboard run, or None if there was none."""
+    return JobState.objects.filter(name=JOB_NAME).values_list('watermark', flat=True).first()
+
+
+def mark_stale(profile_id):
+    """Queue a profile's rows for rescoring after some of its activity was deleted."""
+    Leaderboard.objects.filter(profile_id=profile_id).update(rank=None)
+
+
+def _counts(queryset, profile_ids=None):
+    """{profile_id: row count} with one GROUP BY query."""
+    if profile_ids is not None:
+        queryset = queryset.filter(profile_id__in=profile_ids)
+    return dict(queryset.order_by().values('profile_id').annotate(n=Count('pk')).values_list('profile_id', 'n'))
+
+
+def touched_profiles(since):
+    """Ids of profiles with ratings, watches or completed challenges since ``since``, or marked stale."""
+    touched = set(UserRating.objects.filter(created_at__gte=since).values_list('profile_id', flat=True).distinct())
+    touched.update(WatchEvent.objects.filter(last_watched__gte=since).values_list('profile_id', flat=True).distinct())
+    touched.update(
+        ChallengeProgress.objects.filter(completed_at__gte=since).values_list('profile_id', flat=True).distinct()
+    )
+    touched.update(Leaderboard.objects.filter(rank__isnull=True).values_list('profile_id', flat=True).distinct())
+    return touched
+
+
+def period_scores(period, now=None, profile_ids=None):
+    """
+    Leaderboard points per profile for the current ``period``.
+
+    Args:
+        period: 'weekly', 'monthly' or 'all_time'
+        now: Reference time (defaults to now)
+        profile_ids: Only score these profiles (default: everyone)
+
+    Returns:
+        Dict of profile_id -> points, for profiles with any points
+    """
+    start = period_start(period, now)
+    ratings = UserRating.objects.all()
+    watches = WatchEvent.objects.filter(completed=True)
+    challenges = ChallengeProgress.objects.filter(completed=True)
+    if start is not None:
+        ratings = ratings.filter(created_at__gte=start)
+        watches = watches.filter(last_watched__gte=start)
+        challenges = challenges.filter(completed_at__gte=start)
+
+    scores = Counter()
+    for counts, points in (
+        (_counts(ratings, profile_ids), RATING_POINTS),
+        (_counts(watches, profile_ids), WATCH_POINTS),
+        (_counts(challenges, profile_ids), CHALLENGE_POINTS),
+    ):
+        for profile_id, n in counts.items():
+            scores[profile_id] += n * points
+    return {profile_id: score for profile_id, score in scores.items() if score > 0}
+
+
+def rerank(period):
+    """Recompute ranks for a period from stored scores; returns the number of rows changed."""
+    ranked = Leaderboard.objects.filter(period=period).annotate(
+        new_rank=Window(Rank(), order_by=F('score').desc()),
+    ).values_list('pk', 'rank', 'new_rank')
+    changed = [Leaderboard(pk=pk, rank=new_rank) for pk, rank, new_rank in ranked if rank != new_rank]
+    Leaderboard.objects.bulk_update(changed, ['rank'], batch_size=WRITE_BATCH_SIZE)
+    return len(changed)
+
+
+def refresh(incremental=True, now=None):
+    """
+    Update challenge progress, then the leaderboards, and advance the watermark.
+
+    Args:
+        incremental: Only rescore profiles active since the last run
+        now: Reference time (defaults to now)
+
+    Returns:
+        Tuple of (ChallengeProgress rows updated, ``update_leaderboards`` result)
+    """
+    # Taken before scanning: anything written from here on is seen by the next run
+    watermark = timezone.now()
+    since = last_run() if incremental else None
+    # Challenges first: completions feed leaderboard points
+    updated = update_challenge_progress(since, now)
+    results = update_leaderboards(since, now)
+    JobState.objects.update_or_create(name=JOB_NAME, defaults={'watermark': watermark})
+    return updated, results
+
+
+def update_leaderboards(since=None, now=None, periods=PERIODS):
+    """
+    Rescore and re-rank the leaderboards.
+
+    Args:
+        since: Only rescore profiles active since this watermark (default: everyone)
+        now: Reference time (defaults to now)
+        periods: Periods to update
+
+    Returns:
+        Dict of period -> (profiles rescored, ranks changed)
+    """
+    now = now or timezone.now()
+    touched = touched_profiles(since) if since is not None else None
+
+    results = {}
+    for period in periods:
+        start = period_start(period, now)
+        # The period rolled over since the last run: stored scores are stale for everyone
+        full = touched is None or (start is not None and since < start)
+        scores = period_scores(period, now, None if full else touched)
+
+        # updated_at is auto_now: every row written below is stamped after this
+        written_at = timezone.now()
+        Leaderboard.objects.bulk_create(
+            [Leaderboard(profile_id=profile_id, period=period, score=score) for profile_id, score in scores.items()],
+            batch_size=WRITE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['profile', 'period'],
+            update_fields=['score', 'updated_at'],
+        )
+        if full:
+            Leaderboard.objects.filter(period=period, updated_at__lt=written_at).delete()
+        else:
+            # Rescored profiles without points (deleted activity) drop off the board
+            Leaderboard.objects.filter(period=period, profile_id__in=touched - scores.keys()).delete()
+        results[period] = (len(scores), rerank(period))
+    return results
+
+
+def update_challenge_progress(since=None, now=None):
+    """
+    Recompute progress on active challenges for enrolled profiles.
+
+    Args:
+        since: Only recompute profiles active since this watermark (default: everyone)
+        now: Reference time (defaults to now)
+
+    Returns:
+        Number of ChallengeProgress rows updated
+    """
+    now = now or timezone.now()
+    touched = touched_profiles(since) if since is not None else None
+
+    updated = 0
+    for challenge in Challenge.objects.filter(is_active=True, challenge_type__in=CHALLENGE_SOURCES):
+        model, timestamp_field, filters = CHALLENGE_SOURCES[challenge.challenge_type]
+        progress = ChallengeProgress.objects.filter(challenge=challenge)
+        if touched is not None:
+            progress = progress.filter(profile_id__in=touched)
+        rows = list(progress.only('pk', 'profile_id', 'current_value', 'completed', 'completed_at'))
+        if not rows:
+            continue
+
+        activity = model.objects.filter(**{
+            f'{timestamp_field}__gte': challenge.start_date,
+            f'{timestamp_field}__lte': min(challenge.end_date, now),
+        }, **filters)
+        counts = _counts(activity, [row.profile_id for row in rows])
+
+        changed = []
+        for row in rows:
+            value = counts.get(row.profile_id, 0)
+            completed = value >= challenge.target_value
+            completed_at = (row.completed_at or now) if completed else None
+            if (value, completed, completed_at) != (row.current_value, row.completed, row.completed_at):
+                row.current_value, row.completed, row.completed_at = value, completed, completed_at
+                changed.append(row)
+        ChallengeProgress.objects.bulk_update(
+            changed, ['current_value', 'completed', 'completed_at'], batch_size=WRITE_BATCH_SIZE,
+        )
+        updated += len(changed)
+    return updated
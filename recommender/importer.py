@@ -0,0 +1,259 @@
+"""
+Bulk import of ratings and watch history.
+
+Input rows (CSV with a header, or JSON lines) carry ``user`` (username),
+optional ``profile`` (profile name), ``tmdb_id`` and a ``rating`` and/or
+``watch_duration`` (plus optional ``total_duration`` and ``completed``).
+``read_rows`` streams them and ``InteractionImporter.import_chunk`` writes one
+chunk at a time, so memory stays bounded by the chunk size plus one
+tmdb_id -> Movie pk entry per catalog movie:
+
+* tmdb ids are resolved against the in-memory catalog, and ``Movie`` rows
+  are created from it only for movies that have none (existing rows, which
+  may carry newer metadata, are left alone);
+* users and profiles are resolved per chunk (one query each) and created
+  when missing; a new profile is only made active when its user has no
+  active profile yet;
+* ``UserRating`` and ``WatchEvent`` rows are upserted with
+  ``bulk_create(update_conflicts=True)``. Bulk writes bypass signals, so the
+  touched profiles' For You caches and rail generations are invalidated here.
+
+Malformed JSON lines and rows that are not objects are counted as invalid,
+like rows that fail ``parse_row``.
+
+Activity rails are versioned in the database, so running app servers see the
+import at once. The For You results live in the Django cache: with the
+default per-process LocMemCache, the deletes below only reach this process,
+and app servers keep serving their cached For You rail until it expires (an
+hour). Configure a shared cache backend (e.g. Redis or Memcached) for
+immediate invalidation.
+
+Imported rows are stamped with the import time (``created_at`` and
+``last_watched`` are auto fields).
+"""
+import csv
+import json
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from .models import Movie, Profile, UserRating, WatchEvent
+from . import experiments, rails
+
+DEFAULT_PROFILE = 'Default'
+# Share of the runtime after which a watch counts as completed (as in record_watch)
+COMPLETED_SHARE = 0.9
+
+
+def read_rows(stream, fmt):
+    """Yield dict rows from a CSV (with header) or JSON-lines text stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Passed on so the row is counted as invalid, not fatal
+                    yield None
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def chunks(rows, size):
+    """Split an iterable into lists of at most ``size`` items."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _number(value, cast):
+    if value is None or value == '':
+        return None
+    return cast(value)
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def parse_row(row, default_profile=DEFAULT_PROFILE):
+    """
+    Validate one input row.
+
+    Returns:
+        Tuple of (username, profile name, tmdb_id, rating or None, watch
+        tuple (watch_duration, total_duration, completed) or None)
+
+    Raises:
+        ValueError: For non-object rows, missing fields or out-of-range values
+    """
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    username = str(row.get('user') or '').strip()
+    if not username:
+        raise ValueError("missing user")
+    profile_name = str(row.get('profile') or '').strip() or default_profile
+    tmdb_id = int(row['tmdb_id'])
+
+    rating = _number(row.get('rating'), float)
+    if rating is not None and not 1 <= rating <= 5:
+        raise ValueError(f"rating out of range: {rating}")
+
+    watch = None
+    watch_duration = _number(row.get('watch_duration'), int)
+    if watch_duration is not None:
+        total_duration = _number(row.get('total_duration'), int)
+        if watch_duration < 0 or (total_duration is not None and total_duration <= 0):
+            raise ValueError("invalid duration")
+        if row.get('completed') not in (None, ''):
+            completed = _flag(row['completed'])
+        else:
+            completed = bool(total_duration) and watch_duration >= COMPLETED_SHARE * total_duration
+        watch = (watch_duration, total_duration, completed)
+
+    if rating is None and watch is None:
+        raise ValueError("neither rating nor watch data")
+    return username, profile_name, tmdb_id, rating, watch
+
+
+class InteractionImporter:
+    """Upserts chunks of parsed rows; keeps the tmdb_id -> Movie pk map between chunks."""
+
+    def __init__(self, catalog, create_users=True, default_profile=DEFAULT_PROFILE):
+        self.catalog = catalog
+        self.create_users = create_users
+        self.default_profile = default_profile
+        self.movie_pks = {}
+        self.totals = {'rows': 0, 'ratings': 0, 'watches': 0, 'skipped': 0, 'invalid': 0}
+
+    def _movies(self, tmdb_ids):
+        """Ensure Movie rows exist for catalog movies; returns the ids that are in the catalog."""
+        rows = self.catalog.rows_of(list(tmdb_ids))
+        known = {tmdb_id for tmdb_id, row in zip(tmdb_ids, rows.tolist()) if row >= 0}
+        missing = [tmdb_id for tmdb_id in known if tmdb_id not in self.movie_pks]
+        if missing:
+            self.movie_pks.update(Movie.objects.filter(tmdb_id__in=missing).values_list('tmdb_id', 'pk'))
+            missing = [tmdb_id for tmdb_id in missing if tmdb_id not in self.movie_pks]
+        if missing:
+            missing_rows = self.catalog.rows_of(missing)
+            Movie.objects.bulk_create(
+                [
+                    Movie(
+                        tmdb_id=record.id, title=record.title, overview=record.overview, genres=record.genres,
+                        release_year=record.release_year, vote_average=record.vote_average,
+                        vote_count=int(self.catalog.vote_count[row]),
+                    )
+                    for row, record in zip(missing_rows, self.catalog.records(missing_rows))
+                ],
+                ignore_conflicts=True,
+            )
+            self.movie_pks.update(Movie.objects.filter(tmdb_id__in=missing).values_list('tmdb_id', 'pk'))
+        return known
+
+    def _users(self, usernames):
+        """{username: user pk}, creating missing users (unusable passwords) when enabled."""
+        users = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+        missing = [username for username in usernames if username not in users]
+        if missing and self.create_users:
+            # make_password(None) is an unusable password: imported users reset it to log in
+            User.objects.bulk_create(
+                [User(username=username, password=make_password(None)) for username in missing],
+                ignore_conflicts=True,
+            )
+            users.update(User.objects.filter(username__in=missing).values_list('username', 'pk'))
+        return users
+
+    def _profiles(self, keys):
+        """{(user pk, profile name): profile pk}, creating missing profiles (active if the user has none)."""
+        user_ids = {user_id for user_id, name in keys}
+        names = {name for user_id, name in keys}
+
+        def existing():
+            found = Profile.objects.filter(user_id__in=user_ids, name__in=names).values_list('user_id', 'name', 'pk')
+            return {(user_id, name): pk for user_id, name, pk in found if (user_id, name) in keys}
+
+        profiles = existing()
+        missing = keys - profiles.keys()
+        if missing:
+            has_active = set(Profile.objects.filter(user_id__in={user_id for user_id, name in missing}, is_active=True)
+                             .values_list('user_id', flat=True))
+            new_profiles = []
+            for user_id, name in sorted(missing):
+                new_profiles.append(Profile(user_id=user_id, name=name, profile_type='adult',
+                                            is_active=user_id not in has_active))
+                has_active.add(user_id)
+            Profile.objects.bulk_create(new_profiles, ignore_conflicts=True)
+            profiles = existing()
+        return profiles
+
+    def import_chunk(self, raw_rows):
+        """
+        Import one chunk of raw input rows in a transaction.
+
+        Returns:
+            Dict of counts for this chunk (also added to ``totals``)
+        """
+        counts = {'rows': len(raw_rows), 'ratings': 0, 'watches': 0, 'skipped': 0, 'invalid': 0}
+        parsed = []
+        for row in raw_rows:
+            try:
+                parsed.append(parse_row(row, self.default_profile))
+            except (KeyError, TypeError, ValueError):
+                counts['invalid'] += 1
+
+        with transaction.atomic():
+            known = self._movies({tmdb_id for _, _, tmdb_id, _, _ in parsed})
+            users = self._users({username for username, _, _, _, _ in parsed})
+            profiles = self._profiles({
+                (users[username], name) for username, name, tmdb_id, _, _ in parsed
+                if username in users and tmdb_id in known
+            })
+
+            # Last row wins for repeated (profile, movie) pairs in a chunk
+            ratings = {}
+            watches = {}
+            for username, name, tmdb_id, rating, watch in parsed:
+                profile_id = profiles.get((users.get(username), name))
+                if profile_id is None or tmdb_id not in known:
+                    counts['skipped'] += 1
+                    continue
+                key = (profile_id, self.movie_pks[tmdb_id])
+                if rating is not None:
+                    ratings[key] = rating
+                if watch is not None:
+                    watches[key] = watch
+
+            UserRating.objects.bulk_create(
+                [UserRating(profile_id=profile_id, movie_id=movie_id, rating=rating)
+                 for (profile_id, movie_id), rating in ratings.items()],
+                update_conflicts=True,
+                unique_fields=['profile', 'movie'],
+                update_fields=['rating'],
+            )
+            WatchEvent.objects.bulk_create(
+                [WatchEvent(profile_id=profile_id, movie_id=movie_id, watch_duration=watch_duration,
+                            total_duration=total_duration, completed=completed)
+                 for (profile_id, movie_id), (watch_duration, total_duration, completed) in watches.items()],
+                update_conflicts=True,
+                unique_fields=['profile', 'movie'],
+                update_fields=['watch_duration', 'total_duration', 'completed', 'last_watched'],
+            )
+
+        # Bulk writes send no signals: invalidate what the views would have
+        cache.delete_many([experiments.for_you_cache_key(profile_id) for profile_id, movie_id in ratings])
+        if ratings or watches:
+            rails.bump_generation(*{profile_id for profile_id, movie_id in [*ratings, *watches]})
+
+        counts['ratings'] = len(ratings)
+        counts['watches'] = len(watches)
+        for key, value in counts.items():
+            self.totals[key] += value
+        return counts
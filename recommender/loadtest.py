@@ -0,0 +1,342 @@
+"""
+Open-loop HTTP load generator for the app (``manage.py loadtest``).
+
+Requests arrive as a Poisson process at the target rate no matter how fast
+earlier ones complete: a fixed pool of clients waiting on each other would
+slow down with the server and hide queueing. Each arrival picks a virtual
+user and an action from the traffic mix. Virtual users keep their own
+session and CSRF cookies and revalidate pages with the ETags they have seen,
+and the movie and dashboard pages fetch their lazy rails right after the
+page, as a browser does.
+
+The client speaks HTTP/1.1 (``Connection: close``) over asyncio streams, so
+it needs no third-party packages and runs offline.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+import numpy as np
+from .metrics import BUCKETS
+
+# Relative weights of the actions a virtual user takes
+DEFAULT_MIX = {'home': 25, 'search': 15, 'movie': 25, 'dashboard': 10, 'rate': 10, 'event': 15}
+
+MOVIE_RAILS = ('more_like_this', 'shared_cast')
+DASHBOARD_RAILS = ('continue_watching', 'my_list', 'for_you', 'shelves')
+
+
+def parse_mix(text):
+    """Parse 'home=30,search=10,...' into a traffic mix (unlisted actions are not sent)."""
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        action, _, weight = part.partition('=')
+        action = action.strip()
+        if action not in DEFAULT_MIX:
+            raise ValueError(f"Unknown action: {action}")
+        mix[action] = float(weight)
+        if mix[action] < 0:
+            raise ValueError(f"Negative weight for {action}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("The traffic mix needs a positive weight")
+    return mix
+
+
+class Response:
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+def _dechunk(payload):
+    body = bytearray()
+    while payload:
+        size_line, _, payload = payload.partition(b'\r\n')
+        size = int(size_line.split(b';')[0], 16)
+        if not size:
+            break
+        body += payload[:size]
+        payload = payload[size + 2:]
+    return bytes(body)
+
+
+async def _exchange(host, port, request):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    head, _, payload = raw.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = defaultdict(list)
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()].append(value.strip())
+    if 'chunked' in headers.get('transfer-encoding', ()):
+        payload = _dechunk(payload)
+    return Response(status, headers, payload)
+
+
+async def http_request(host, port, method, path, headers=None, body=b'', timeout=10.0):
+    """
+    Send one HTTP/1.1 request on a fresh connection.
+
+    Returns:
+        Response with the status, lower-cased headers (name -> list of values)
+        and the decoded body
+
+    Raises:
+        asyncio.TimeoutError: When the whole exchange takes longer than ``timeout``
+        OSError: On connection errors
+    """
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", 'Connection: close',
+             'User-Agent: recommender-loadtest']
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    if body or method == 'POST':
+        lines.append(f"Content-Length: {len(body)}")
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+    return await asyncio.wait_for(_exchange(host, port, request), timeout)
+
+
+class VirtualUser:
+    """A signed-in browser: cookies and the ETags of pages it has seen."""
+
+    def __init__(self, username):
+        self.username = username
+        self.cookies = {}
+        self.etags = {}
+
+    def headers(self, path=None):
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{name}={value}" for name, value in self.cookies.items())
+        if 'csrftoken' in self.cookies:
+            headers['X-CSRFToken'] = self.cookies['csrftoken']
+        if path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        return headers
+
+    def absorb(self, path, response):
+        for header in response.headers.get('set-cookie', ()):
+            for name, morsel in SimpleCookie(header).items():
+                if morsel['max-age'] == '0':
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+        if response.status == 200 and 'etag' in response.headers:
+            self.etags[path] = response.headers['etag'][0]
+
+
+class RouteStats:
+    __slots__ = ('latencies', 'statuses', 'errors')
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+
+    def summary(self):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        requests = len(self.latencies)
+        failed = sum(self.errors.values())
+        counts = np.histogram(latencies, bins=[0.0, *BUCKETS, np.inf])[0] if requests else np.zeros(len(BUCKETS) + 1)
+        return {
+            'requests': requests,
+            'errors': failed,
+            'error_rate': round(failed / requests, 4) if requests else 0.0,
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+            'error_kinds': dict(self.errors),
+            'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 2),
+            'p90_ms': round(float(np.percentile(latencies, 90)) * 1000, 2),
+            'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 2),
+            'max_ms': round(float(latencies.max()) * 1000, 2),
+            # Non-cumulative counts per latency bucket (upper bounds in seconds)
+            'histogram': {
+                **{str(bound): int(n) for bound, n in zip(BUCKETS, counts)},
+                '+Inf': int(counts[-1]),
+            },
+        }
+
+
+class LoadTest:
+    """
+    Replays a traffic mix against one or more app servers.
+
+    Args:
+        targets: List of (host, port); requests are spread round-robin, like a load balancer
+        usernames: Accounts of the virtual users (all with ``password``)
+        password: Their password
+        movie_ids: Catalog movie IDs the users browse and rate
+        movie_weights: Relative popularity of ``movie_ids``
+        queries: Search queries to pick from
+        mix: Action weights (see DEFAULT_MIX)
+        rps: Target arrival rate
+        duration: Seconds of traffic
+        max_in_flight: Arrivals beyond this many open requests are dropped and counted
+        timeout: Per-request timeout in seconds
+        seed: Random seed for arrivals and choices
+    """
+
+    def __init__(self, targets, usernames, password, movie_ids, movie_weights, queries, mix=None, rps=20.0,
+                 duration=30.0, max_in_flight=256, timeout=10.0, seed=0):
+        self.targets = itertools.cycle(targets)
+        self.users = [VirtualUser(username) for username in usernames]
+        self.password = password
+        self.movie_ids = list(movie_ids)
+        # Cumulative once, so each pick is a bisection rather than a pass over the catalog
+        self.movie_cum_weights = list(itertools.accumulate(movie_weights))
+        self.queries = list(queries)
+        mix = mix or DEFAULT_MIX
+        self.actions = [action for action, weight in mix.items() if weight > 0]
+        self.action_weights = [mix[action] for action in self.actions]
+        self.rps = rps
+        self.duration = duration
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.stats = defaultdict(RouteStats)
+        self.dropped = 0
+        self.lag = []
+
+    async def request(self, user, route, method, path, data=None):
+        """Send a request as ``user`` and record it under ``route``."""
+        host, port = next(self.targets)
+        headers = user.headers(path if method == 'GET' else None)
+        body = b''
+        if data is not None:
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        stats = self.stats[route]
+        started = time.perf_counter()
+        try:
+            response = await http_request(host, port, method, path, headers, body, self.timeout)
+        except asyncio.TimeoutError:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors['timeout'] += 1
+            return None
+        except (OSError, ValueError, IndexError) as e:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors[type(e).__name__] += 1
+            return None
+        stats.latencies.append(time.perf_counter() - started)
+        stats.statuses[response.status] += 1
+        if response.status >= 400:
+            stats.errors[f'http_{response.status}'] += 1
+        user.absorb(path, response)
+        return response
+
+    async def login(self, user):
+        await self.request(user, 'login', 'GET', '/login/')
+        response = await self.request(user, 'login', 'POST', '/login/', {
+            'username': user.username, 'password': self.password,
+            'csrfmiddlewaretoken': user.cookies.get('csrftoken', ''),
+        })
+        return response is not None and response.status == 302
+
+    def _movie(self):
+        return self.random.choices(self.movie_ids, cum_weights=self.movie_cum_weights)[0]
+
+    async def _rails(self, user, route, base_path, rails):
+        await asyncio.gather(*[self.request(user, f'{route}:{rail}', 'GET', f'{base_path}{rail}/')
+                               for rail in rails])
+
+    async def act(self, user, action):
+        if action == 'home':
+            await self.request(user, 'home', 'GET', '/')
+        elif action == 'search':
+            params = {'q': self.random.choice(self.queries)}
+            if self.random.random() < 0.3:
+                params['mode'] = 'vibe'
+            await self.request(user, 'search', 'GET', f"/search/?{urlencode(params)}")
+        elif action == 'movie':
+            movie_id = self._movie()
+            response = await self.request(user, 'movie', 'GET', f'/movie/{movie_id}/')
+            if response is not None and response.status in (200, 304):
+                await self._rails(user, 'movie_rail', f'/partials/movie/{movie_id}/rails/', MOVIE_RAILS)
+        elif action == 'dashboard':
+            response = await self.request(user, 'dashboard', 'GET', '/dashboard/')
+            if response is not None and response.status in (200, 304):
+                await self._rails(user, 'dashboard_rail', '/partials/rails/', DASHBOARD_RAILS)
+        elif action == 'rate':
+            await self.request(user, 'rate', 'POST', f'/rate/{self._movie()}/',
+                               {'rating': self.random.randint(1, 5)})
+        elif action == 'event':
+            # Session events: playback progress, sometimes a My List add
+            if self.random.random() < 0.7:
+                total = self.random.randint(70, 180) * 60
+                await self.request(user, 'event:watch', 'POST', f'/watch/{self._movie()}/',
+                                   {'watch_duration': self.random.randint(0, total), 'total_duration': total})
+            else:
+                await self.request(user, 'event:list', 'POST', f'/list/{self._movie()}/', {'action': 'add'})
+
+    async def run(self, log=None):
+        """
+        Sign every virtual user in, then send traffic for ``duration`` seconds.
+
+        Returns:
+            Report dict (see ``report``)
+        """
+        logged_in = await asyncio.gather(*[self.login(user) for user in self.users])
+        if not any(logged_in):
+            raise RuntimeError('No virtual user could sign in')
+        self.users = [user for user, ok in zip(self.users, logged_in) if ok]
+        if log:
+            log(f"{len(self.users)} virtual users signed in; sending {self.rps:g} req/s for {self.duration:g}s")
+
+        in_flight = set()
+        started = time.perf_counter()
+        next_arrival = 0.0
+        while next_arrival < self.duration:
+            delay = started + next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # How late this arrival is sent: large values mean the client itself is saturated
+            self.lag.append(max(0.0, -delay))
+            if len(in_flight) >= self.max_in_flight:
+                self.dropped += 1
+            else:
+                user = self.random.choice(self.users)
+                action = self.random.choices(self.actions, self.action_weights)[0]
+                task = asyncio.ensure_future(self.act(user, action))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            next_arrival += self.random.expovariate(self.rps)
+        sent_for = time.perf_counter() - started
+        if in_flight:
+            await asyncio.wait(in_flight)
+        return self.report(sent_for, time.perf_counter() - started)
+
+    def report(self, sent_for, elapsed):
+        arrivals = len(self.lag)
+        routes = {route: stats.summary() for route, stats in sorted(self.stats.items()) if route != 'login'}
+        requests = sum(route['requests'] for route in routes.values())
+        errors = sum(route['errors'] for route in routes.values())
+        return {
+            'meta': {
+                'target_rps': self.rps,
+                'duration_s': round(sent_for, 2),
+                'elapsed_s': round(elapsed, 2),
+                'arrivals': arrivals,
+                # Page views/actions per second; pages also fetch their rails
+                'achieved_rps': round((arrivals - self.dropped) / sent_for, 2) if sent_for else 0.0,
+                'requests_per_s': round(requests / elapsed, 2) if elapsed else 0.0,
+                'dropped': self.dropped,
+                'requests': requests,
+                'errors': errors,
+                'error_rate': round(errors / requests, 4) if requests else 0.0,
+                'client_lag_p99_ms': round(float(np.percentile(self.lag, 99)) * 1000, 2) if self.lag else 0.0,
+                'virtual_users': len(self.users),
+            },
+            'routes': routes,
+        }
@@ -0,0 +1,209 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache import cache
+from django.db import connection
+from unittest import mock
+from recommender import experiments
+from recommender.management.commands import recompute_recs
+from recommender.synthetic import make_recommender, make_profiles
+import numpy as np
+import json
+import io
+import multiprocessing
+import os
+import platform
+import resource
+import time
+import traceback
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the recommender hot paths on synthetic catalogs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,50000',
+                            help='Comma-separated catalog sizes to benchmark')
+        parser.add_argument('--vocab-size', type=int, default=5000, help='Vectorizer vocabulary size')
+        parser.add_argument('--density', type=float, default=0.002, help='Count matrix density')
+        parser.add_argument('--profiles', type=int, default=50, help='Synthetic profiles per scale')
+        parser.add_argument('--ratings-per-profile', type=int, default=30, help='Ratings per synthetic profile')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed calls per operation')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--baseline', help='Compare against a stored JSON report')
+        parser.add_argument('--save-baseline', help='Also store this report as a baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p50 slowdown against the baseline (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',') if scale]
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'vocab_size': options['vocab_size'],
+                'density': options['density'],
+                'profiles': options['profiles'],
+                'ratings_per_profile': options['ratings_per_profile'],
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+                # peak_rss_mb is per scale when each scale runs in a forked child,
+                # otherwise the process-wide high-water mark so far
+                'forked_scales': self.can_fork(),
+            },
+            'results': {},
+        }
+
+        # The benchmark writes users, profiles and ratings, so it always runs
+        # against a throwaway database built straight from the models.
+        connection.settings_dict['TEST']['MIGRATE'] = False
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for scale in scales:
+                self.stderr.write(f"Benchmarking {scale} movies...")
+                report['results'][str(scale)] = self.measure_scale(scale, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload)
+        else:
+            self.stdout.write(payload)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                f.write(payload)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = self.compare(baseline, report, options['tolerance'])
+            for line in regressions:
+                self.stderr.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark regression(s) against {options['baseline']}")
+            self.stderr.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def can_fork(self):
+        return 'fork' in multiprocessing.get_all_start_methods()
+
+    def measure_scale(self, scale, options):
+        """
+        Benchmark one scale in a forked child.
+
+        The child's high-water mark starts from the parent's current RSS, so
+        ``peak_rss_mb`` is that scale's own peak, and the users, profiles and
+        ratings it writes go to the child's copy of the in-memory database,
+        so every scale starts from an empty one.
+        """
+        if not self.can_fork():
+            try:
+                return self.run_scale(scale, options)
+            finally:
+                # Start the next scale without this one's profiles and ratings
+                call_command('flush', interactive=False, verbosity=0)
+
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(target=self.run_child, args=(scale, options, sender))
+        child.start()
+        sender.close()
+        try:
+            status, payload = receiver.recv()
+        except EOFError:
+            child.join()
+            status, payload = 'error', f"child exited with code {child.exitcode}"
+        child.join()
+        if status == 'error':
+            raise CommandError(f"Benchmark of {scale} movies failed: {payload}")
+        return payload
+
+    def run_child(self, scale, options, sender):
+        try:
+            sender.send(('ok', self.run_scale(scale, options)))
+        except BaseException:
+            sender.send(('error', traceback.format_exc()))
+        finally:
+            sender.close()
+
+    def run_scale(self, scale, options):
+        seed = options['seed']
+        iterations = options['iterations']
+        rng = np.random.default_rng(seed)
+
+        started = time.perf_counter()
+        engine = make_recommender(scale, options['vocab_size'], options['density'], seed)
+        build_seconds = time.perf_counter() - started
+        profiles = make_profiles(engine, options['profiles'], options['ratings_per_profile'], seed=seed + scale)
+
+        ids = engine.catalog.ids
+        seeds = rng.choice(ids, iterations).tolist()
+        candidate_sets = [rng.choice(ids, min(100, len(ids)), replace=False).tolist() for _ in range(iterations)]
+        ranked_sets = [engine.rank_with_hybrid(candidates) for candidates in candidate_sets]
+        queries = [engine.catalog.title[int(row)].split()[0] for row in rng.integers(len(ids), size=iterations)]
+        picked_profiles = [profiles[int(i)] for i in rng.integers(len(profiles), size=iterations)]
+
+        def personalized(i):
+            profile = picked_profiles[i]
+            cache.delete(experiments.for_you_cache_key(profile.id))
+            engine.get_personalized_recommendations(profile, num_recs=20)
+
+        def recompute(i):
+            with mock.patch.object(recompute_recs, 'recommender', engine):
+                call_command('recompute_recs', stdout=io.StringIO(), stderr=io.StringIO())
+
+        operations = [
+            ('get_recommendations', lambda i: engine.get_recommendations(seeds[i], 10), iterations),
+            ('rank_with_hybrid', lambda i: engine.rank_with_hybrid(candidate_sets[i]), iterations),
+            ('rerank_for_diversity', lambda i: engine.rerank_for_diversity(ranked_sets[i]), iterations),
+            ('explain', lambda i: engine.explain(seeds[i], picked_profiles[i].id), iterations),
+            ('search_movies', lambda i: engine.search_movies(queries[i], 20), iterations),
+            ('get_personalized_recommendations', personalized, max(1, iterations // 10)),
+            ('recompute_recs', recompute, 1),
+        ]
+
+        results = {'build_seconds': round(build_seconds, 4), 'operations': {}}
+        for name, fn, count in operations:
+            results['operations'][name] = self.time_operation(fn, count)
+        results['peak_rss_mb'] = self.peak_rss_mb()
+        return results
+
+    def time_operation(self, fn, iterations):
+        fn(0)  # Warm-up
+        samples = np.empty(iterations)
+        for i in range(iterations):
+            started = time.perf_counter()
+            fn(i)
+            samples[i] = time.perf_counter() - started
+        total = samples.sum()
+        return {
+            'iterations': iterations,
+            'p50_ms': round(float(np.percentile(samples, 50)) * 1000, 4),
+            'p99_ms': round(float(np.percentile(samples, 99)) * 1000, 4),
+            'mean_ms': round(float(samples.mean()) * 1000, 4),
+            'throughput_per_s': round(iterations / total, 2) if total else None,
+        }
+
+    def peak_rss_mb(self):
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+        return round(peak / divisor, 1)
+
+    def compare(self, baseline, report, tolerance):
+        """List operations whose p50 regressed by more than ``tolerance``."""
+        regressions = []
+        for scale, results in report['results'].items():
+            base_ops = baseline.get('results', {}).get(scale, {}).get('operations', {})
+            for name, stats in results['operations'].items():
+                base = base_ops.get(name)
+                if not base or not base['p50_ms']:
+                    continue
+                ratio = stats['p50_ms'] / base['p50_ms']
+                if ratio > 1 + tolerance:
+                    regressions.append(
+                        f"{scale} movies / {name}: p50 {stats['p50_ms']}ms vs {base['p50_ms']}ms ({ratio:.2f}x)"
+                    )
+        return regressions
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from recommender.clusters import CLUSTERS_FILENAME, CatalogClusters
+from recommender.utils import recommender
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Cluster the catalog (mini-batch k-means) and store representative titles for onboarding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clusters', type=int, default=40, help='Number of clusters')
+        parser.add_argument('--representatives', type=int, default=8, help='Titles kept per cluster')
+        parser.add_argument('--batch-size', type=int, default=2048, help='k-means mini-batch size')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--output', help=f'Output file (default: models/{CLUSTERS_FILENAME})')
+
+    def handle(self, *args, **options):
+        output = options['output'] or os.path.join(settings.RECOMMENDER_MODELS_DIR, CLUSTERS_FILENAME)
+
+        started = time.perf_counter()
+        clusters = CatalogClusters.build(
+            recommender.normalized_matrix,
+            recommender.catalog.vote_count,
+            n_clusters=options['clusters'],
+            representatives=options['representatives'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        clusters.save(output, recommender.catalog.ids)
+        recommender.load_clusters(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {len(clusters)} clusters in {time.perf_counter() - started:.1f}s; wrote {output}"
+        ))
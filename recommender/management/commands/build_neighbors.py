@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from recommender.similarity import NEIGHBORS_FILENAME, build_neighbors, save_neighbors
+from recommender.utils import recommender
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Precompute top-K content neighbors for every movie with a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=50, help='Neighbors kept per movie')
+        parser.add_argument('--threshold', type=float, default=0.01, help='Minimum cosine similarity kept')
+        parser.add_argument('--block-size', type=int, default=256, help='Rows scored per sparse product')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+        parser.add_argument('--scratch-dir', help='Directory for the temporary memory-mapped matrix')
+        parser.add_argument('--output', help=f'Output file (default: models/{NEIGHBORS_FILENAME})')
+
+    def handle(self, *args, **options):
+        output = options['output'] or os.path.join(settings.RECOMMENDER_MODELS_DIR, NEIGHBORS_FILENAME)
+        workers = options['workers'] or os.cpu_count() or 1
+        self.stdout.write(
+            f"Scoring {recommender.count_matrix.shape[0]} movies with {workers} worker(s), "
+            f"blocks of {options['block_size']} rows..."
+        )
+
+        started = time.perf_counter()
+        indptr, indices, scores = build_neighbors(
+            recommender.count_matrix,
+            k=options['k'],
+            threshold=options['threshold'],
+            block_size=options['block_size'],
+            workers=workers,
+            scratch_dir=options['scratch_dir'],
+            log=self.stdout.write,
+        )
+        save_neighbors(output, indptr, indices, scores, recommender.catalog.ids, options['k'], options['threshold'])
+        recommender.load_neighbors(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(indices)} neighbors in {time.perf_counter() - started:.1f}s; wrote {output}"
+        ))
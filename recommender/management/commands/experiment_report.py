@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from recommender import experiments
+
+
+class Command(BaseCommand):
+    help = 'Per-variant latency, cache hit rate and engagement of the configured experiments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--experiment', help='Only report this experiment')
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after reporting')
+
+    def handle(self, *args, **options):
+        # Include this process's own unflushed counters
+        experiments.flush()
+        configured = experiments.get_experiments()
+        if options['experiment']:
+            configured = {name: config for name, config in configured.items() if name == options['experiment']}
+        if not configured:
+            self.stdout.write("No experiments configured (RECOMMENDER_EXPERIMENTS)")
+            return
+
+        for name, config in configured.items():
+            variants = list(config.get('variants') or {})
+            state = '' if config.get('enabled', True) else ' (disabled)'
+            self.stdout.write(self.style.SUCCESS(f"{name}{state}"))
+            for variant, stats in experiments.load_stats(name, variants).items():
+                requests = stats['requests']
+                lookups = stats['cache_hits'] + stats['cache_misses']
+                mean = f"{stats['latency_us'] / requests / 1000:.1f}ms" if requests else '-'
+                p95 = experiments.latency_quantile(stats, 0.95)
+                events = ', '.join(
+                    f"{event} {stats[f'event_{event}']}" for event in experiments.EVENTS
+                )
+                self.stdout.write(
+                    f"  {variant}: {requests} requests, mean {mean}, "
+                    f"p95 <= {f'{p95 * 1000:g}ms' if p95 is not None else '-'}, "
+                    f"cache hit rate {stats['cache_hits'] / lookups:.0%}" if lookups else
+                    f"  {variant}: no requests"
+                )
+                self.stdout.write(f"    events: {events}")
+            if options['reset']:
+                experiments.reset_stats(name, variants)
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from recommender.importer import DEFAULT_PROFILE, InteractionImporter, chunks, read_rows
+from recommender.utils import recommender
+import sys
+import time
+
+
+class Command(BaseCommand):
+    help = 'Import ratings and watch history from CSV or JSON lines in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file ('-' for stdin)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (default: from the file extension, csv for stdin)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per transaction')
+        parser.add_argument('--default-profile', default=DEFAULT_PROFILE,
+                            help='Profile name for rows without one')
+        parser.add_argument('--no-create-users', action='store_true',
+                            help='Skip rows of unknown users instead of creating them')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        importer = InteractionImporter(
+            recommender.catalog,
+            create_users=not options['no_create_users'],
+            default_profile=options['default_profile'],
+        )
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        started = time.perf_counter()
+        try:
+            for chunk in chunks(read_rows(stream, fmt), options['chunk_size']):
+                importer.import_chunk(chunk)
+                totals = importer.totals
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{totals['rows']} rows ({totals['rows'] / elapsed:,.0f} rows/s): "
+                    f"{totals['ratings']} ratings, {totals['watches']} watches, "
+                    f"{totals['skipped']} skipped, {totals['invalid']} invalid"
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        totals = importer.totals
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['rows']} rows in {elapsed:.1f}s ({totals['rows'] / max(elapsed, 1e-9):,.0f} rows/s)"
+        ))
@@ -0,0 +1,189 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from recommender.catalog import MovieCatalog
+from recommender.loadtest import DEFAULT_MIX, LoadTest, http_request, parse_mix
+from recommender.metrics import BUCKETS
+from recommender.synthetic import make_catalog, make_profiles, write_artifacts
+from recommender.utils import MovieRecommender
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PASSWORD = 'loadtest-password'
+HOST = '127.0.0.1'
+
+
+class Command(BaseCommand):
+    help = 'Boot the app on a synthetic catalog and users, replay a traffic mix and report per-route latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=5000, help='Synthetic catalog size')
+        parser.add_argument('--vocab-size', type=int, default=5000, help='Vectorizer vocabulary size')
+        parser.add_argument('--density', type=float, default=0.002, help='Count matrix density')
+        parser.add_argument('--users', type=int, default=20, help='Synthetic users (one virtual browser each)')
+        parser.add_argument('--ratings-per-user', type=int, default=20, help='Existing ratings per synthetic user')
+        parser.add_argument('--server', choices=['runserver', 'gunicorn'], default='runserver',
+                            help='runserver: one process per worker on consecutive ports; gunicorn: one pre-fork server')
+        parser.add_argument('--workers', type=int, default=2, help='App server worker processes')
+        parser.add_argument('--port', type=int, default=8700, help='First port to listen on')
+        parser.add_argument('--rps', type=float, default=20.0, help='Target page views/actions per second')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds of traffic')
+        parser.add_argument('--mix', help="Traffic mix, e.g. 'home=25,search=15,movie=25,dashboard=10,rate=10,event=15'")
+        parser.add_argument('--max-in-flight', type=int, default=256,
+                            help='Open requests beyond which arrivals are dropped (and counted)')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+        parser.add_argument('--boot-timeout', type=float, default=120.0, help='Seconds to wait for the servers')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--workdir', help='Directory for the synthetic artifacts, database and server log '
+                                              '(default: a temporary directory, removed afterwards)')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] else DEFAULT_MIX
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['rps'] <= 0 or options['duration'] <= 0 or options['workers'] < 1:
+            raise CommandError('--rps, --duration and --workers must be positive')
+        if options['server'] == 'gunicorn' and shutil.which('gunicorn') is None:
+            raise CommandError('gunicorn is not installed; use --server runserver')
+
+        workdir = options['workdir'] or tempfile.mkdtemp(prefix='recommender-loadtest-')
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            catalog, usernames = self.prepare(workdir, options)
+            # Searches use words of real titles, so most of them match
+            queries = sorted({catalog.title[row].split()[0] for row in range(min(len(catalog), 500))})
+            processes, targets = self.boot(workdir, options)
+            try:
+                load_test = LoadTest(
+                    targets, usernames, PASSWORD, catalog.ids.tolist(), (catalog.vote_count + 1).tolist(), queries,
+                    mix=mix, rps=options['rps'], duration=options['duration'],
+                    max_in_flight=options['max_in_flight'], timeout=options['timeout'], seed=options['seed'],
+                )
+                report = asyncio.run(load_test.run(log=self.stderr.write))
+            finally:
+                self.shutdown(processes)
+        finally:
+            if not options['workdir']:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        report['meta'].update(server=options['server'], workers=options['workers'], movies=options['movies'],
+                              mix=mix)
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def prepare(self, workdir, options):
+        """Write synthetic artifacts and a database of synthetic users; returns (catalog, usernames)."""
+        started = time.perf_counter()
+        movies_df, count_matrix, vectorizer = make_catalog(
+            options['movies'], options['vocab_size'], options['density'], options['seed'])
+        write_artifacts(os.path.join(workdir, 'models'), movies_df, count_matrix, vectorizer)
+        catalog = MovieCatalog.from_dataframe(movies_df)
+
+        # A fresh SQLite file built straight from the models; the servers share it
+        connection.settings_dict['TEST'] = {
+            **connection.settings_dict['TEST'], 'NAME': os.path.join(workdir, 'db.sqlite3'), 'MIGRATE': False,
+        }
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        engine = MovieRecommender.from_artifacts(catalog, count_matrix, vectorizer)
+        profiles = make_profiles(engine, options['users'], options['ratings_per_user'], seed=options['seed'])
+        user_ids = [profile.user_id for profile in profiles]
+        User.objects.filter(pk__in=user_ids).update(password=make_password(PASSWORD))
+        usernames = list(User.objects.filter(pk__in=user_ids).values_list('username', flat=True))
+        connection.close()
+        self.stderr.write(
+            f"Prepared {len(catalog)} movies and {len(usernames)} users in {time.perf_counter() - started:.1f}s "
+            f"under {workdir}"
+        )
+        return catalog, usernames
+
+    def boot(self, workdir, options):
+        """Start the app servers on the synthetic data; returns (processes, [(host, port)])."""
+        env = {
+            **os.environ,
+            'RECOMMENDER_MODELS_DIR': os.path.join(workdir, 'models'),
+            'RECOMMENDER_DATABASE_PATH': os.path.join(workdir, 'db.sqlite3'),
+            # Throwaway database: readers need not block the workers' writes
+            'RECOMMENDER_SQLITE_WAL': '1',
+        }
+        port, workers = options['port'], options['workers']
+        if options['server'] == 'gunicorn':
+            commands = [['gunicorn', '--workers', str(workers), '--bind', f'{HOST}:{port}',
+                         'movie_recommender.wsgi']]
+            targets = [(HOST, port)]
+        else:
+            commands = [[sys.executable, 'manage.py', 'runserver', '--noreload', '--skip-checks', f'{HOST}:{port + i}']
+                        for i in range(workers)]
+            targets = [(HOST, port + i) for i in range(workers)]
+
+        log_path = os.path.join(workdir, 'server.log')
+        with open(log_path, 'ab') as log:
+            processes = [subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log,
+                                          stderr=subprocess.STDOUT)
+                         for command in commands]
+        try:
+            self.wait_ready(processes, targets, options['boot_timeout'], log_path)
+        except BaseException:
+            self.shutdown(processes)
+            raise
+        self.stderr.write(f"{len(targets)} endpoint(s) up: {', '.join(f'{host}:{port}' for host, port in targets)}")
+        return processes, targets
+
+    def wait_ready(self, processes, targets, timeout, log_path):
+        deadline = time.monotonic() + timeout
+        pending = list(targets)
+        while pending:
+            if any(process.poll() is not None for process in processes):
+                raise CommandError(f"An app server exited during startup; see {log_path}")
+            if time.monotonic() > deadline:
+                raise CommandError(f"App servers not ready after {timeout:g}s; see {log_path}")
+            host, port = pending[0]
+            try:
+                response = asyncio.run(http_request(host, port, 'GET', '/', timeout=5.0))
+            except (OSError, asyncio.TimeoutError):
+                time.sleep(0.5)
+                continue
+            if response.status != 200:
+                raise CommandError(f"GET / on {host}:{port} returned {response.status}; see {log_path}")
+            pending.pop(0)
+
+    def shutdown(self, processes):
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def print_report(self, report):
+        meta = report['meta']
+        self.stdout.write(
+            f"{meta['arrivals']} arrivals in {meta['duration_s']}s ({meta['achieved_rps']}/s of {meta['target_rps']:g} "
+            f"target, {meta['dropped']} dropped); {meta['requests']} requests ({meta['requests_per_s']}/s), "
+            f"error rate {meta['error_rate']:.2%}, client lag p99 {meta['client_lag_p99_ms']}ms"
+        )
+        width = max([len(route) for route in report['routes']] + [5])
+        self.stdout.write(f"\n{'route':<{width}} {'requests':>8} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} "
+                          f"{'p99 ms':>9} {'max ms':>9}")
+        for route, stats in report['routes'].items():
+            line = (f"{route:<{width}} {stats['requests']:>8} {stats['error_rate']:>7.1%} {stats['p50_ms']:>9} "
+                    f"{stats['p90_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}")
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+
+        # Latency histogram per route: requests per bucket (upper bounds)
+        labels = [f"{bound * 1000:g}ms" if bound < 1 else f"{bound:g}s" for bound in BUCKETS] + ['more']
+        self.stdout.write(f"\n{'route':<{width}} " + ' '.join(f"{label:>7}" for label in labels))
+        for route, stats in report['routes'].items():
+            self.stdout.write(f"{route:<{width}} " + ' '.join(f"{count:>7}" for count in stats['histogram'].values()))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from recommender import shared_artifacts
+from recommender.utils import MovieRecommender
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Publish the model artifacts into shared memory for RECOMMENDER_ARTIFACT_LOADER = "shared"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--manifest', help='Manifest path (default: RECOMMENDER_SHARED_MANIFEST)')
+        parser.add_argument('--unlink', action='store_true', help='Remove the published segment and manifest')
+
+    def handle(self, *args, **options):
+        manifest_path = options['manifest'] or settings.RECOMMENDER_SHARED_MANIFEST
+
+        if options['unlink']:
+            if not os.path.exists(manifest_path):
+                self.stdout.write("Nothing published")
+                return
+            segment = shared_artifacts.read_manifest(manifest_path)['segment']
+            shared_artifacts.unlink(segment)
+            os.remove(manifest_path)
+            self.stdout.write(self.style.SUCCESS(f"Unlinked {segment}"))
+            return
+
+        started = time.perf_counter()
+        # Always publish what is on disk, never a previously attached segment
+        engine = MovieRecommender(load=False)
+        engine.load_local(settings.RECOMMENDER_MODELS_DIR)
+        arrays, meta = engine.export_shared()
+        manifest = shared_artifacts.publish(arrays, meta, manifest_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Published {len(arrays)} arrays ({manifest['size'] / 2**20:.1f} MiB) as {manifest['segment']} "
+            f"in {time.perf_counter() - started:.1f}s; wrote {manifest_path}"
+        ))
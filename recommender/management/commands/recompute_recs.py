@@ -1,11 +1,14 @@
 from django.core.management.base import BaseCommand
 from django.core.cache import cache
-from django.utils import timezone
-from django.db.models import Count
-from recommender.models import Profile, CachedRecommendations, Challenge, ChallengeProgress
+from recommender.models import Profile, CachedRecommendations, PreferenceWeights
 from recommender.utils import recommender
-from datetime import timedelta
-import json
+from recommender import experiments, gamification, shelves
+
+TRENDING_SIZE = 20
+GENRE_SHELF_SIZE = 10
+# Extra items stored on shared shelves so per-profile feedback exclusions,
+# applied at read time, rarely leave a shelf short
+SHARED_HEADROOM = 30
 
 class Command(BaseCommand):
     help = 'Recompute cached recommendations for all active profiles'
@@ -30,11 +33,16 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Recomputing recommendations for {profiles.count()} profiles...")
 
+        # Shared shelves already computed during this run -> whether they had items
+        self.shared_shelves = {}
+
         for profile in profiles:
             self.stdout.write(f"Processing profile {profile.id} ({profile.name})")
 
-            # Clear existing cached recommendations
+            # Clear existing cached recommendations (including the Django cache,
+            # so the rails below are recomputed rather than re-read)
             CachedRecommendations.objects.filter(profile=profile).delete()
+            cache.delete(experiments.for_you_cache_key(profile.id))
 
             # Recompute For You recommendations
             try:
@@ -42,80 +50,82 @@ class Command(BaseCommand):
                 CachedRecommendations.objects.create(
                     profile=profile,
                     shelf_key='for_you',
-                    payload=recs
+                    payload=shelves.pack(recs)
                 )
                 self.stdout.write(f"  - Cached {len(recs)} For You recommendations")
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  - Error computing For You: {e}"))
 
+            # Shared shelves are stored once per audience and referenced; feedback
+            # exclusions are applied when they are read (shelves.load_shelves)
+            audience = profile.profile_type
+            mask = recommender.eligibility_mask(audience)
+
             # Recompute Trending (shared across profiles)
             try:
-                trending = recommender.get_trending_movies(20)
-                trending_payload = [{'movie': m, 'score': 0.8, 'badges': ['Trending'], 'confidence': 0.7} for m in trending]
-                CachedRecommendations.objects.update_or_create(
-                    profile=profile,
-                    shelf_key='trending',
-                    defaults={'payload': trending_payload}
+                shared_key = self.store_shared(
+                    f'trending:{audience}',
+                    lambda: [{'movie': m, 'score': 0.8, 'badges': ['Trending'], 'confidence': 0.7}
+                             for m in recommender.get_trending_movies(TRENDING_SIZE + SHARED_HEADROOM, mask=mask)],
                 )
+                if shared_key:
+                    CachedRecommendations.objects.create(
+                        profile=profile,
+                        shelf_key='trending',
+                        payload=shelves.reference(shared_key, TRENDING_SIZE)
+                    )
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  - Error computing Trending: {e}"))
 
             # Recompute genre-based shelves
             try:
-                pref_weights = profile.preferenceweights_set.first()
+                pref_weights = PreferenceWeights.objects.filter(profile=profile).first()
                 if pref_weights and pref_weights.genre_weights:
                     top_genres = sorted(pref_weights.genre_weights.items(), key=lambda x: x[1], reverse=True)[:3]
                     for genre, weight in top_genres:
-                        genre_recs = recommender.get_movies_by_genre(genre, 10)
-                        if genre_recs:
-                            genre_payload = [{'movie': m, 'score': 0.6, 'badges': [f'{genre} Movie'], 'confidence': 0.6} for m in genre_recs]
-                            CachedRecommendations.objects.update_or_create(
+                        shelf_key = f'genre_{genre.lower()}'
+                        shared_key = self.store_shared(
+                            f'{shelf_key}:{audience}',
+                            lambda: [{'movie': m, 'score': 0.6, 'badges': [f'{genre} Movie'], 'confidence': 0.6}
+                                     for m in recommender.get_movies_by_genre(genre, GENRE_SHELF_SIZE + SHARED_HEADROOM,
+                                                                              mask=mask)],
+                        )
+                        if shared_key:
+                            CachedRecommendations.objects.create(
                                 profile=profile,
-                                shelf_key=f'genre_{genre.lower()}',
-                                defaults={'payload': genre_payload}
+                                shelf_key=shelf_key,
+                                payload=shelves.reference(shared_key, GENRE_SHELF_SIZE)
                             )
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  - Error computing genre shelves: {e}"))
 
-            # Clear Django cache for this profile
-            cache.delete_pattern(f"recs_{profile.id}_*")
-
         # Update challenge progress
         self.update_challenges()
 
         self.stdout.write(self.style.SUCCESS("Recompute completed!"))
 
-    def update_challenges(self):
-        """Update progress for active challenges."""
-        active_challenges = Challenge.objects.filter(is_active=True)
-
-        for challenge in active_challenges:
-            self.stdout.write(f"Updating progress for challenge: {challenge.title}")
-
-            if challenge.challenge_type == 'rate_movies':
-                # Count ratings in the challenge period
-                start_date = challenge.start_date
-                end_date = min(challenge.end_date, timezone.now())
-
-                progress_updates = ChallengeProgress.objects.filter(
-                    challenge=challenge,
-                    profile__userrating__created_at__gte=start_date,
-                    profile__userrating__created_at__lte=end_date
-                ).annotate(
-                    rating_count=Count('profile__userrating')
-                ).values('profile', 'rating_count')
-
-                for update in progress_updates:
-                    ChallengeProgress.objects.update_or_create(
-                        profile_id=update['profile'],
-                        challenge=challenge,
-                        defaults={
-                            'current_value': update['rating_count'],
-                            'completed': update['rating_count'] >= challenge.target_value,
-                            'completed_at': timezone.now() if update['rating_count'] >= challenge.target_value else None
-                        }
-                    )
+    def store_shared(self, shared_key, compute):
+        """
+        Store a shared shelf once per run (empty shelves are computed once too).
+
+        Args:
+            shared_key: SharedShelf key
+            compute: Callable returning the shelf's items
 
-            # Add more challenge types as needed
+        Returns:
+            ``shared_key``, or None if the shelf is empty
+        """
+        if shared_key not in self.shared_shelves:
+            items = compute()
+            if items:
+                shelves.store_shared(shared_key, items)
+            self.shared_shelves[shared_key] = bool(items)
+        return shared_key if self.shared_shelves[shared_key] else None
+
+    def update_challenges(self):
+        """Update progress for active challenges, then the leaderboards."""
+        updated, leaderboards = gamification.refresh()
+        self.stdout.write(f"Challenge progress updated ({updated} rows changed).")
 
-        self.stdout.write("Challenge progress updated.")
+        for period, (scored, reranked) in leaderboards.items():
+            self.stdout.write(f"  - {period} leaderboard: {scored} profiles rescored, {reranked} ranks changed")
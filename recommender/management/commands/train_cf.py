@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from recommender.collaborative import ImplicitALS, FACTORS_FILENAME, stream_interactions
+from recommender.utils import recommender
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Train the collaborative-filtering model from ratings, watch events and likes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factors', type=int, default=32, help='Latent dimensions')
+        parser.add_argument('--iterations', type=int, default=10, help='ALS iterations')
+        parser.add_argument('--regularization', type=float, default=0.1, help='L2 regularization')
+        parser.add_argument('--alpha', type=float, default=10.0, help='Confidence scaling')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows fetched per database round trip')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--output', help=f'Output file (default: models/{FACTORS_FILENAME})')
+
+    def handle(self, *args, **options):
+        output = options['output'] or os.path.join(settings.RECOMMENDER_MODELS_DIR, FACTORS_FILENAME)
+
+        started = time.perf_counter()
+        stream = stream_interactions(recommender.catalog, chunk_size=options['chunk_size'])
+        interactions = stream.to_matrix()
+        self.stdout.write(
+            f"Loaded {interactions.nnz} interactions from {interactions.shape[0]} profiles "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        if not interactions.nnz:
+            self.stdout.write(self.style.WARNING('No interactions to train on; nothing written.'))
+            return
+
+        started = time.perf_counter()
+        model = ImplicitALS.train(
+            interactions,
+            factors=options['factors'],
+            iterations=options['iterations'],
+            regularization=options['regularization'],
+            alpha=options['alpha'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        model.save(output, recommender.catalog.ids)
+        # Keep this process's recommender in step with what was written
+        recommender.load_cf(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained {model.factors} factors in {time.perf_counter() - started:.1f}s; wrote {output}"
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from recommender import gamification
+
+
+class Command(BaseCommand):
+    help = 'Update challenge progress and the weekly, monthly and all-time leaderboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rescan all history instead of only activity since the last run',
+        )
+
+    def handle(self, *args, **options):
+        incremental = not options['full']
+        since = gamification.last_run() if incremental else None
+        self.stdout.write(f"Updating from activity since {since}..." if since else "Updating from all history...")
+
+        updated, leaderboards = gamification.refresh(incremental=incremental)
+        self.stdout.write(f"Challenge progress: {updated} rows changed")
+
+        for period, (scored, reranked) in leaderboards.items():
+            self.stdout.write(f"{period}: {scored} profiles rescored, {reranked} ranks changed")
+
+        self.stdout.write(self.style.SUCCESS("Leaderboards updated!"))
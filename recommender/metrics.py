@@ -0,0 +1,198 @@
+"""
+In-process metrics for the recommender hot paths.
+
+Counters, gauges and latency histograms live in this process (each worker
+exposes its own) and are rendered in the Prometheus text format by the
+``metrics`` view. Timings taken while a request is being served are also
+collected per request and reported in the ``Server-Timing`` header by
+``MetricsMiddleware``.
+
+When ``RECOMMENDER_METRICS_ENABLED`` is off, ``timed`` returns the wrapped
+function unchanged and the middleware removes itself, so disabled metrics cost
+nothing on the request path.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+
+ENABLED = getattr(settings, 'RECOMMENDER_METRICS_ENABLED', False)
+
+# Latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'recommender_call_seconds': 'Time spent in instrumented recommender calls.',
+    'recommender_view_seconds': 'Time spent serving each view.',
+    'recommender_db_queries_total': 'Database queries issued, by view.',
+    'recommender_db_seconds_total': 'Time spent in database queries, by view.',
+    'recommender_cache_total': 'Recommendation cache lookups by result.',
+    'recommender_artifact_load_seconds': 'Time taken by the last artifact load.',
+    'recommender_rail_errors_total': 'Streamed rails whose builder failed, by rail.',
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_histograms = {}
+
+# {timing name: [total seconds, calls]} for the request being served, or None
+_request_timings = ContextVar('recommender_request_timings', default=None)
+
+
+def _key(metric, labels):
+    return metric, tuple(sorted(labels.items()))
+
+
+def increment(metric, value=1, **labels):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[_key(metric, labels)] += value
+
+
+def set_gauge(metric, value, **labels):
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[_key(metric, labels)] = value
+
+
+def observe(metric, value, **labels):
+    """Record one observation in a histogram."""
+    if not ENABLED:
+        return
+    key = _key(metric, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * len(BUCKETS), 0, 0.0]
+        buckets = histogram[0]
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+                break
+        histogram[1] += 1
+        histogram[2] += value
+
+
+def record_cache(cache_name, hit):
+    increment('recommender_cache_total', cache=cache_name, result='hit' if hit else 'miss')
+
+
+def add_request_timing(name, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.get(name)
+        if entry is None:
+            timings[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+
+def timed(name):
+    """Decorator timing every call into ``recommender_call_seconds{name=...}``."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                observe('recommender_call_seconds', elapsed, name=name)
+                add_request_timing(name, elapsed)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timer(name):
+    """Context manager equivalent of ``timed`` for code blocks."""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe('recommender_call_seconds', elapsed, name=name)
+        add_request_timing(name, elapsed)
+
+
+def start_request(timings=None):
+    """
+    Begin collecting per-request timings; returns a token for ``end_request``.
+
+    Pass the dict returned by an earlier ``end_request`` to keep adding to it
+    (e.g. while a streaming response is iterated).
+    """
+    return _request_timings.set({} if timings is None else timings)
+
+
+def end_request(token):
+    """Stop collecting per-request timings and return them."""
+    timings = _request_timings.get()
+    _request_timings.reset(token)
+    return timings or {}
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    escaped = []
+    for label, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{label}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus():
+    """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: (list(h[0]), h[1], h[2]) for key, h in _histograms.items()}
+
+    lines = []
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, 'counter')
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), value in sorted(gauges.items()):
+        header(name, 'gauge')
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), (buckets, count, total) in sorted(histograms.items()):
+        header(name, 'histogram')
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS, buckets):
+            cumulative += bucket
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
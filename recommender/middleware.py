@@ -0,0 +1,127 @@
+import time
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from . import metrics, profiling
+
+
+class MetricsMiddleware:
+    """
+    Time each request, count its database queries and report both, together
+    with the instrumented recommender calls, in a ``Server-Timing`` header.
+
+    Streaming responses keep being measured while their content is iterated,
+    so the view histogram and query counters include work done after the view
+    returned. Their ``Server-Timing`` header goes out before that work and
+    only covers the part built by the view.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db = [0, 0.0]
+
+        def count_queries(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db[0] += 1
+                db[1] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        response, timings = self.measure(lambda: self.get_response(request), {}, count_queries)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unresolved'
+
+        entries = [f'total;dur={elapsed * 1000:.2f}', f'db;dur={db[1] * 1000:.2f};desc="{db[0]} queries"']
+        for name, (seconds, calls) in timings.items():
+            entries.append(f'{name};dur={seconds * 1000:.2f};desc="{calls}x"')
+        response['Server-Timing'] = ', '.join(entries)
+
+        if response.streaming:
+            response.streaming_content = self.measure_stream(
+                response.streaming_content, timings, count_queries, lambda: self.record(view, started, db))
+        else:
+            self.record(view, started, db)
+        return response
+
+    def measure(self, fn, timings, count_queries):
+        """Call ``fn`` collecting its timings and queries; returns (result, timings)."""
+        token = metrics.start_request(timings)
+        try:
+            with connection.execute_wrapper(count_queries):
+                result = fn()
+        finally:
+            timings = metrics.end_request(token)
+        return result, timings
+
+    def measure_stream(self, content, timings, count_queries, done):
+        chunks = iter(content)
+        try:
+            while True:
+                chunk, timings = self.measure(lambda: next(chunks, None), timings, count_queries)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            done()
+
+    def record(self, view, started, db):
+        metrics.observe('recommender_view_seconds', time.perf_counter() - started, view=view)
+        metrics.increment('recommender_db_queries_total', db[0], view=view)
+        metrics.increment('recommender_db_seconds_total', db[1], view=view)
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    Sample the stacks of in-flight requests and save collapsed stacks for the
+    ones slower than ``RECOMMENDER_PROFILER['THRESHOLD_MS']``.
+    """
+
+    def __init__(self, get_response):
+        config = profiling.get_config()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = config['THRESHOLD_MS'] / 1000
+        self.output_dir = str(config['OUTPUT_DIR'])
+        self.sampler = profiling.get_sampler()
+
+    def __call__(self, request):
+        active = self.sampler.register()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.sampler.unregister(active)
+            raise
+        if response.streaming:
+            # Keep sampling while the content is built and sent
+            response.streaming_content = self.profile_stream(response.streaming_content, request, active)
+        else:
+            self.finish(request, active)
+        return response
+
+    def profile_stream(self, content, request, active):
+        try:
+            yield from content
+        finally:
+            self.finish(request, active)
+
+    def finish(self, request, active):
+        self.sampler.unregister(active)
+        elapsed = time.perf_counter() - active.started
+        if elapsed >= self.threshold and active.stacks:
+            match = getattr(request, 'resolver_match', None)
+            view = match.url_name if match and match.url_name else 'unresolved'
+            profile = getattr(request, '_active_profile', None)
+            if profile is not None:
+                active.tags.setdefault('profile', profile.pk)
+            try:
+                profiling.write_profile(self.output_dir, view, request.path, elapsed, active)
+            except OSError as e:
+                print(f"Error writing slow request profile: {e}")
@@ -0,0 +1,306 @@
+# Covering indexes for the profile-scoped hot reads.
+#
+# Profile, UserRating(profile), Feedback and the other profile models were
+# created outside the migration history (see 0003). The state operations
+# record them as the models define them, without touching the database, so
+# the indexes can be declared with AddIndex and ``makemigrations --check``
+# stays clean. The database side creates the indexes with plain SQL against
+# whichever of the tables exist. Index names match Meta.indexes.
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+INDEXES = [
+    ('profile_user_active_idx', 'recommender_profile', ['user_id', 'is_active']),
+    ('rating_profile_rating_idx', 'recommender_userrating', ['profile_id', 'rating', 'movie_id']),
+    ('feedback_profile_type_idx', 'recommender_feedback', ['profile_id', 'feedback_type', 'movie_id']),
+]
+
+
+def create_indexes(apps, schema_editor):
+    tables = set(schema_editor.connection.introspection.table_names())
+    quote = schema_editor.quote_name
+    for name, table, columns in INDEXES:
+        if table in tables:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} "
+                f"({', '.join(quote(column) for column in columns)})"
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    for name, table, columns in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recommender', '0003_auto_20251031_1802'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Badge',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('badge_type', models.CharField(max_length=50)),
+                        ('earned_at', models.DateTimeField(auto_now_add=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='CachedRecommendations',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('shelf_key', models.CharField(max_length=100)),
+                        ('payload', models.JSONField()),
+                        ('generated_at', models.DateTimeField(auto_now_add=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='Challenge',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('title', models.CharField(max_length=255)),
+                        ('description', models.TextField()),
+                        ('challenge_type', models.CharField(max_length=50)),
+                        ('target_value', models.IntegerField()),
+                        ('reward_badge', models.CharField(blank=True, max_length=50, null=True)),
+                        ('start_date', models.DateTimeField()),
+                        ('end_date', models.DateTimeField()),
+                        ('is_active', models.BooleanField(default=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='ChallengeProgress',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('current_value', models.IntegerField(default=0)),
+                        ('completed', models.BooleanField(default=False)),
+                        ('completed_at', models.DateTimeField(blank=True, null=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='Feedback',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('feedback_type', models.CharField(choices=[('like', 'Like'), ('dislike', 'Dislike'), ('not_interested', 'Not Interested'), ('seen_it', 'Seen It'), ('show_fewer', 'Show Fewer Like This')], max_length=20)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='Leaderboard',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('period', models.CharField(max_length=20)),
+                        ('score', models.IntegerField(default=0)),
+                        ('rank', models.IntegerField(blank=True, null=True)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='PreferenceWeights',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('genre_weights', models.JSONField(default=dict)),
+                        ('runtime_weights', models.JSONField(default=dict)),
+                        ('language_weights', models.JSONField(default=dict)),
+                        ('sensitivity_weights', models.JSONField(default=dict)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='Profile',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('name', models.CharField(max_length=100)),
+                        ('profile_type', models.CharField(choices=[('adult', 'Adult'), ('kids', 'Kids')], default='adult', max_length=10)),
+                        ('avatar', models.CharField(blank=True, max_length=255, null=True)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('is_active', models.BooleanField(default=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='SavedList',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('list_type', models.CharField(default='watchlist', max_length=20)),
+                        ('added_at', models.DateTimeField(auto_now_add=True)),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='WatchEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('watch_duration', models.IntegerField(default=0)),
+                        ('total_duration', models.IntegerField(blank=True, null=True)),
+                        ('completed', models.BooleanField(default=False)),
+                        ('last_watched', models.DateTimeField(auto_now=True)),
+                        ('added_to_list', models.BooleanField(default=False)),
+                    ],
+                ),
+                migrations.AddField(
+                    model_name='movie',
+                    name='language',
+                    field=models.CharField(blank=True, max_length=10, null=True),
+                ),
+                migrations.AddField(
+                    model_name='movie',
+                    name='maturity_rating',
+                    field=models.CharField(blank=True, max_length=10, null=True),
+                ),
+                migrations.AddField(
+                    model_name='movie',
+                    name='runtime',
+                    field=models.IntegerField(blank=True, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='userrating',
+                    name='rating',
+                    field=models.FloatField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+                ),
+                migrations.AddField(
+                    model_name='watchevent',
+                    name='movie',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.movie'),
+                ),
+                migrations.AddField(
+                    model_name='watchevent',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='savedlist',
+                    name='movie',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.movie'),
+                ),
+                migrations.AddField(
+                    model_name='savedlist',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='profile',
+                    name='user',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AddField(
+                    model_name='preferenceweights',
+                    name='profile',
+                    field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='leaderboard',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='feedback',
+                    name='movie',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.movie'),
+                ),
+                migrations.AddField(
+                    model_name='feedback',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='challengeprogress',
+                    name='challenge',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.challenge'),
+                ),
+                migrations.AddField(
+                    model_name='challengeprogress',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='cachedrecommendations',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AddField(
+                    model_name='badge',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='userrating',
+                    unique_together=set(),
+                ),
+                migrations.AddField(
+                    model_name='userrating',
+                    name='profile',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.profile'),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='userrating',
+                    unique_together={('profile', 'movie')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='watchevent',
+                    unique_together={('profile', 'movie')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='savedlist',
+                    unique_together={('profile', 'movie', 'list_type')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='profile',
+                    unique_together={('user', 'name')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='leaderboard',
+                    unique_together={('profile', 'period')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='feedback',
+                    unique_together={('profile', 'movie', 'feedback_type')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='challengeprogress',
+                    unique_together={('profile', 'challenge')},
+                ),
+                migrations.AddIndex(
+                    model_name='cachedrecommendations',
+                    index=models.Index(fields=['profile', 'shelf_key'], name='recommender_profile_9dcd4e_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='cachedrecommendations',
+                    index=models.Index(fields=['generated_at'], name='recommender_generat_a8ba49_idx'),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='cachedrecommendations',
+                    unique_together={('profile', 'shelf_key')},
+                ),
+                migrations.AlterUniqueTogether(
+                    name='badge',
+                    unique_together={('profile', 'badge_type')},
+                ),
+                migrations.RemoveField(
+                    model_name='userrating',
+                    name='user',
+                ),
+                migrations.AddIndex(
+                    model_name='userrating',
+                    index=models.Index(fields=['profile', 'rating', 'movie'], name='rating_profile_rating_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='profile',
+                    index=models.Index(fields=['user', 'is_active'], name='profile_user_active_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='feedback',
+                    index=models.Index(fields=['profile', 'feedback_type', 'movie'], name='feedback_profile_type_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_indexes, drop_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Indexes for the keyset-paginated Continue Watching and My List rails.
+#
+# WatchEvent and SavedList were created outside the migration history as well
+# (their state is recorded in 0004), so the database side creates the indexes
+# with plain SQL when the tables exist. Index names match Meta.indexes.
+
+from django.db import migrations, models
+
+INDEXES = [
+    ('watch_profile_recent_idx', 'recommender_watchevent', ['profile_id', 'completed', 'last_watched']),
+    ('savedlist_profile_added_idx', 'recommender_savedlist', ['profile_id', 'list_type', 'added_at']),
+]
+
+
+def create_indexes(apps, schema_editor):
+    tables = set(schema_editor.connection.introspection.table_names())
+    quote = schema_editor.quote_name
+    for name, table, columns in INDEXES:
+        if table in tables:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} "
+                f"({', '.join(quote(column) for column in columns)})"
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    for name, table, columns in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0004_profile_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='watchevent',
+                    index=models.Index(fields=['profile', 'completed', 'last_watched'],
+                                       name='watch_profile_recent_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='savedlist',
+                    index=models.Index(fields=['profile', 'list_type', 'added_at'],
+                                       name='savedlist_profile_added_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_indexes, drop_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0005_activity_rail_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SharedShelf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shelf_key', models.CharField(max_length=100, unique=True)),
+                ('payload', models.JSONField()),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
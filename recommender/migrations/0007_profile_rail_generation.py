@@ -0,0 +1,45 @@
+# Activity-rail cache generation on the profile row.
+#
+# Profile was created outside the migration history (its state is recorded
+# in 0004), so the database side adds the column with plain SQL when the
+# table exists and lacks it; the state gets a regular AddField.
+
+from django.db import migrations, models
+
+TABLE = 'recommender_profile'
+COLUMN = 'rail_generation'
+
+
+def add_column(apps, schema_editor):
+    connection = schema_editor.connection
+    if TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, TABLE)}
+    if COLUMN not in columns:
+        quote = schema_editor.quote_name
+        schema_editor.execute(
+            f"ALTER TABLE {quote(TABLE)} ADD COLUMN {quote(COLUMN)} integer unsigned NOT NULL DEFAULT 1"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0006_sharedshelf'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='profile',
+                    name='rail_generation',
+                    field=models.PositiveIntegerField(default=1),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_column, migrations.RunPython.noop),
+            ],
+        ),
+    ]
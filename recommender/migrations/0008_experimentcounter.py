@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0007_profile_rail_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperimentCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('experiment', models.CharField(max_length=100)),
+                ('variant', models.CharField(max_length=100)),
+                ('counter', models.CharField(max_length=50)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('experiment', 'variant', 'counter')},
+            },
+        ),
+    ]
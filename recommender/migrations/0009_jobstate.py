@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0008_experimentcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
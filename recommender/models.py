@@ -13,9 +13,14 @@ class Profile(models.Model):
     avatar = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Bumped on every watch/list change; keys the cached activity-rail pages
+    rail_generation = models.PositiveIntegerField(default=1)
 
     class Meta:
         unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='profile_user_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.name} ({self.profile_type})"
@@ -57,6 +62,10 @@ class UserRating(models.Model):
 
     class Meta:
         unique_together = ('profile', 'movie')
+        indexes = [
+            # Covers "liked by profile" reads without touching the table
+            models.Index(fields=['profile', 'rating', 'movie'], name='rating_profile_rating_idx'),
+        ]
 
     def __str__(self):
         return f"{self.profile} - {self.movie.title}: {self.rating}"
@@ -72,6 +81,10 @@ class WatchEvent(models.Model):
 
     class Meta:
         unique_together = ('profile', 'movie')
+        indexes = [
+            # Keyset pages of Continue Watching, newest first
+            models.Index(fields=['profile', 'completed', 'last_watched'], name='watch_profile_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.profile} watched {self.movie.title}"
@@ -91,6 +104,9 @@ class Feedback(models.Model):
 
     class Meta:
         unique_together = ('profile', 'movie', 'feedback_type')
+        indexes = [
+            models.Index(fields=['profile', 'feedback_type', 'movie'], name='feedback_profile_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.profile} {self.feedback_type} {self.movie.title}"
@@ -103,6 +119,10 @@ class SavedList(models.Model):
 
     class Meta:
         unique_together = ('profile', 'movie', 'list_type')
+        indexes = [
+            # Keyset pages of My List, newest first
+            models.Index(fields=['profile', 'list_type', 'added_at'], name='savedlist_profile_added_idx'),
+        ]
 
     def __str__(self):
         return f"{self.profile}'s {self.list_type}: {self.movie.title}"
@@ -160,7 +180,7 @@ class Leaderboard(models.Model):
 class CachedRecommendations(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     shelf_key = models.CharField(max_length=100)  # trending, for_you, genre_action, etc.
-    payload = models.JSONField()  # list of movie dicts with scores, badges, etc.
+    payload = models.JSONField()  # packed ids/scores/badges, or a SharedShelf reference (see shelves.py)
     generated_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -173,6 +193,36 @@ class CachedRecommendations(models.Model):
     def __str__(self):
         return f"Cached recs for {self.profile}: {self.shelf_key}"
 
+class SharedShelf(models.Model):
+    """Shelf computed once per audience (trending, genre) and referenced by profiles."""
+    shelf_key = models.CharField(max_length=100, unique=True)  # trending:adult, genre_action:kids, etc.
+    payload = models.JSONField()  # packed ids/scores/badges (see shelves.py)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Shared shelf {self.shelf_key}"
+
+class ExperimentCounter(models.Model):
+    """Per-variant experiment counter, summed across worker processes (see experiments.py)."""
+    experiment = models.CharField(max_length=100)
+    variant = models.CharField(max_length=100)
+    counter = models.CharField(max_length=50)  # requests, latency_us, event_rating, etc.
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('experiment', 'variant', 'counter')
+
+    def __str__(self):
+        return f"{self.experiment}/{self.variant} {self.counter}={self.value}"
+
+class JobState(models.Model):
+    """Progress of a periodic job, e.g. the activity watermark of the leaderboard run."""
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateTimeField(blank=True, null=True)  # activity up to here has been processed
+
+    def __str__(self):
+        return f"{self.name} up to {self.watermark}"
+
 # Legacy model for backward compatibility
 class UserPreference(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
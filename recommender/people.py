@@ -0,0 +1,104 @@
+"""
+Person -> movie posting lists for cast and director lookups.
+
+``PeopleIndex`` keeps two CSR matrices built from the catalog's people
+codes: movies x people (a movie's credits) and its transpose, people x
+movies (each person's posting list, in row order). Shared-cast neighbors of
+a movie are the other movies on its people's posting lists, ranked by how
+many lists they appear on; preferred-people scores are one sparse
+matrix-vector product. Both are small array operations, with no scan over
+the catalog.
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class PeopleIndex:
+    """Cast and director posting lists aligned with catalog rows."""
+
+    def __init__(self, movie_people, popularity, person_names, postings=None):
+        self.movie_people = movie_people
+        self.postings = movie_people.T.tocsr() if postings is None else postings
+        self.popularity = popularity
+        self.person_names = person_names
+        self._codes = None
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        n_rows = len(catalog)
+        cast_rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(catalog.cast_indptr))
+        directed = np.flatnonzero(catalog.director_codes >= 0)
+        rows = np.concatenate([cast_rows, directed])
+        codes = np.concatenate([catalog.cast_codes, catalog.director_codes[directed]]).astype(np.int64)
+        # Someone credited twice on a movie (e.g. director and cast) counts once
+        movie_people = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, codes)),
+            shape=(n_rows, len(catalog.person_names)),
+        )
+        movie_people.sum_duplicates()
+        movie_people.data[:] = 1
+        return cls(movie_people, catalog.vote_count, catalog.person_names)
+
+    def __len__(self):
+        return self.movie_people.shape[1]
+
+    def code_of(self, name):
+        """Person code for a name (case-insensitive), or -1."""
+        if self._codes is None:
+            # Built on first use: most workers never look people up by name
+            self._codes = {self.person_names[code].lower(): code for code in range(len(self))}
+        return self._codes.get(str(name).strip().lower(), -1)
+
+    def people_of(self, row):
+        """Person codes credited on a catalog row."""
+        return self.movie_people.indices[self.movie_people.indptr[row]:self.movie_people.indptr[row + 1]]
+
+    def _posting_rows(self, codes):
+        indptr, indices = self.postings.indptr, self.postings.indices
+        if not len(codes):
+            return np.zeros(0, dtype=indices.dtype)
+        return np.concatenate([indices[indptr[code]:indptr[code + 1]] for code in codes])
+
+    def _rank(self, rows, counts, k, mask):
+        if mask is not None:
+            eligible = mask[rows]
+            rows, counts = rows[eligible], counts[eligible]
+        # Most shared people first, then the most popular
+        order = np.lexsort((-self.popularity[rows], -counts))[:k]
+        return rows[order].astype(np.int64), counts[order]
+
+    def shared_cast(self, row, k, mask=None):
+        """
+        Movies sharing cast or director with a catalog row.
+
+        Args:
+            row: Catalog row
+            k: Maximum number of movies
+            mask: Optional eligibility mask
+
+        Returns:
+            Tuple of (rows, shared people counts), most shared first
+        """
+        candidates = self._posting_rows(self.people_of(row))
+        candidates = candidates[candidates != row]
+        rows, counts = np.unique(candidates, return_counts=True)
+        return self._rank(rows, counts, k, mask)
+
+    def person_vector(self, names):
+        """Indicator vector over people for ``names``; None if none is known."""
+        codes = [code for code in (self.code_of(name) for name in names) if code >= 0]
+        if not codes:
+            return None
+        vector = np.zeros(len(self), dtype=np.float32)
+        vector[codes] = 1
+        return vector
+
+    def matches(self, vector, rows):
+        """Number of people from a ``person_vector`` credited on each of ``rows``."""
+        return self.movie_people[rows] @ vector
+
+    def movies_with(self, vector, k, mask=None):
+        """Movies crediting any person of a ``person_vector``, most matches then most popular first."""
+        candidates = self._posting_rows(np.flatnonzero(vector))
+        rows, counts = np.unique(candidates, return_counts=True)
+        return self._rank(rows, counts, k, mask)
@@ -0,0 +1,160 @@
+"""
+Sampling profiler for slow requests.
+
+A single background thread periodically samples the Python stack of every
+request registered by ``SlowRequestProfilerMiddleware`` (via
+``sys._current_frames``). Samples are kept only for requests that end up
+slower than the configured threshold; those are written out as collapsed
+stacks (``frame;frame;frame count``), the input format of flamegraph.pl,
+speedscope and inferno.
+
+It is a thread sampler, not a signal/timer (``setitimer``) sampler. Signal
+handlers only run in the main thread, and with threaded or pre-forked app
+servers that is usually not the thread serving the request. The sampler
+thread reads other threads' frames under the GIL, so its interval is
+approximate. Time in C code (numpy, scipy) is attributed to the Python frame
+that made the call, and a call that holds the GIL delays the samples until it
+returns.
+
+For each slow request this writes:
+
+- ``<OUTPUT_DIR>/<view>.folded``: stacks aggregated across all slow
+  requests for the view
+- ``<OUTPUT_DIR>/<view>/<timestamp>-<ms>ms[-profile<id>][-candidates<n>].folded``:
+  the stacks for that one request
+- ``<OUTPUT_DIR>/slow_requests.jsonl``: one index line per slow request,
+  including its tags
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULTS = {
+    'ENABLED': False,
+    'THRESHOLD_MS': 1000,
+    'INTERVAL_MS': 10,
+    'OUTPUT_DIR': os.path.join(settings.BASE_DIR, 'profiles'),
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'RECOMMENDER_PROFILER', {})}
+
+
+class ActiveRequest:
+    __slots__ = ('thread_id', 'started', 'stacks', 'tags')
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.started = time.perf_counter()
+        self.stacks = Counter()
+        self.tags = {}
+
+
+class StackSampler:
+    """Background thread sampling the stacks of registered request threads."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def register(self):
+        request = ActiveRequest(threading.get_ident())
+        with self._lock:
+            self._active[request.thread_id] = request
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='slow-request-sampler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return request
+
+    def unregister(self, request):
+        with self._lock:
+            self._active.pop(request.thread_id, None)
+
+    def current(self):
+        return self._active.get(threading.get_ident())
+
+    def _run(self):
+        while True:
+            # Sleep until a request registers; clearing first avoids a lost wakeup
+            self._wakeup.clear()
+            if not self._active:
+                self._wakeup.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                requests = list(self._active.values())
+            for request in requests:
+                frame = frames.get(request.thread_id)
+                if frame is not None:
+                    request.stacks[collapse(frame)] += 1
+
+
+def collapse(frame):
+    """Collapse a frame chain into ``root;...;leaf``."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        name = getattr(code, 'co_qualname', code.co_name)
+        names.append(f"{module}:{name}".replace(';', ':'))
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+_sampler = None
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        _sampler = StackSampler(get_config()['INTERVAL_MS'] / 1000)
+    return _sampler
+
+
+def tag(**tags):
+    """Attach tags (profile id, candidate-set size, ...) to the request being profiled."""
+    if _sampler is None:
+        return
+    request = _sampler.current()
+    if request is not None:
+        request.tags.update(tags)
+
+
+def write_profile(output_dir, view, path, elapsed, request):
+    """Write one slow request's collapsed stacks and index entry."""
+    view_dir = os.path.join(output_dir, view)
+    os.makedirs(view_dir, exist_ok=True)
+    name = f"{timezone.now():%Y%m%dT%H%M%S%f}-{int(elapsed * 1000)}ms"
+    for key in ('profile', 'candidates'):
+        if key in request.tags:
+            name += f"-{key}{request.tags[key]}"
+    lines = ''.join(f"{stack} {count}\n" for stack, count in request.stacks.items())
+
+    request_file = os.path.join(view_dir, f"{name}.folded")
+    with open(request_file, 'w') as f:
+        f.write(lines)
+    # Identical stacks on separate lines are summed by the flamegraph tools
+    with open(os.path.join(output_dir, f"{view}.folded"), 'a') as f:
+        f.write(lines)
+    with open(os.path.join(output_dir, 'slow_requests.jsonl'), 'a') as f:
+        f.write(json.dumps({
+            'view': view,
+            'path': path,
+            'duration_ms': round(elapsed * 1000, 1),
+            'samples': sum(request.stacks.values()),
+            'tags': request.tags,
+            'file': os.path.relpath(request_file, output_dir),
+            'at': timezone.now().isoformat(),
+        }, default=str) + '\n')
+    return request_file
@@ -0,0 +1,126 @@
+import base64
+from datetime import datetime
+from django.db.models import CharField, F, FloatField, Q, Value
+from .models import Feedback, SavedList, UserRating, WatchEvent
+
+# Feedback types that remove a movie from every recommendation rail
+EXCLUDING_FEEDBACK = ['not_interested', 'seen_it', 'show_fewer']
+
+
+def load_excluded_ids(profile):
+    """TMDB ids a profile removed from its rails via feedback."""
+    profile_id = getattr(profile, 'pk', profile)
+    return set(Feedback.objects.filter(
+        profile_id=profile_id,
+        feedback_type__in=EXCLUDING_FEEDBACK,
+    ).values_list('movie__tmdb_id', flat=True))
+
+
+class InteractionSummary:
+    """A profile's rated, liked and excluded movie ids (TMDB ids, newest first)."""
+    __slots__ = ('profile_id', 'ratings', 'rated_ids', 'liked_ids', 'excluded_ids')
+
+    def __init__(self, profile_id):
+        self.profile_id = profile_id
+        self.ratings = {}
+        self.rated_ids = []
+        self.liked_ids = []
+        self.excluded_ids = set()
+
+
+def load_interaction_summary(profile, like_threshold=4):
+    """
+    Load everything the recommender needs about a profile's history in one query.
+
+    Args:
+        profile: Profile instance or profile ID
+        like_threshold: Minimum rating that counts as a like
+
+    Returns:
+        InteractionSummary
+    """
+    profile_id = getattr(profile, 'pk', profile)
+    # Every column is an annotation, declared in the same order on both sides,
+    # so the two halves of the UNION select matching columns
+    ratings = UserRating.objects.filter(profile_id=profile_id).annotate(
+        tmdb_id=F('movie__tmdb_id'),
+        value=F('rating'),
+        kind=Value('rating', output_field=CharField()),
+        at=F('created_at'),
+    ).values_list('tmdb_id', 'value', 'kind', 'at')
+    feedback = Feedback.objects.filter(
+        profile_id=profile_id,
+        feedback_type__in=EXCLUDING_FEEDBACK,
+    ).annotate(
+        tmdb_id=F('movie__tmdb_id'),
+        value=Value(None, output_field=FloatField()),
+        kind=F('feedback_type'),
+        at=F('created_at'),
+    ).values_list('tmdb_id', 'value', 'kind', 'at')
+
+    summary = InteractionSummary(profile_id)
+    for tmdb_id, rating, kind, created_at in ratings.union(feedback, all=True).order_by('-at'):
+        if kind == 'rating':
+            summary.ratings[tmdb_id] = rating
+            summary.rated_ids.append(tmdb_id)
+            if rating >= like_threshold:
+                summary.liked_ids.append(tmdb_id)
+        else:
+            summary.excluded_ids.add(tmdb_id)
+    return summary
+
+
+def encode_cursor(timestamp, pk):
+    """Opaque keyset cursor for the row after (``timestamp``, ``pk``)."""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ValueError for malformed cursors."""
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_page(queryset, time_field, fields, cursor=None, limit=20):
+    """
+    One page of ``queryset`` ordered by ``time_field`` descending (ties by pk).
+
+    Pages continue from the cursor's position instead of using OFFSET, so the
+    cost of a page does not grow with how deep into the list it is.
+
+    Args:
+        queryset: Rows to page through (already filtered to one profile)
+        time_field: Timestamp column ordering the rows, newest first
+        fields: Columns returned after (pk, timestamp)
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Page size
+
+    Returns:
+        Tuple of (list of (pk, timestamp, *fields) rows, next cursor or None)
+    """
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__lt': timestamp}) | Q(**{time_field: timestamp, 'pk__lt': pk})
+        )
+    rows = list(queryset.order_by(f'-{time_field}', '-pk').values_list('pk', time_field, *fields)[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last[1], last[0])
+
+
+def continue_watching_page(profile, cursor=None, limit=20):
+    """Unfinished watches, most recent first: rows of (pk, last_watched, tmdb_id, watched, total)."""
+    queryset = WatchEvent.objects.filter(profile=profile, completed=False)
+    return keyset_page(queryset, 'last_watched', ['movie__tmdb_id', 'watch_duration', 'total_duration'],
+                       cursor, limit)
+
+
+def saved_list_page(profile, list_type='watchlist', cursor=None, limit=20):
+    """Saved movies, most recently added first: rows of (pk, added_at, tmdb_id)."""
+    queryset = SavedList.objects.filter(profile=profile, list_type=list_type)
+    return keyset_page(queryset, 'added_at', ['movie__tmdb_id'], cursor, limit)
@@ -0,0 +1,92 @@
+"""
+Per-profile activity rails: Continue Watching and My List.
+
+Pages come from keyset-paginated queries (see ``queries.keyset_page``) that
+only read ids and timestamps; titles and other metadata are filled in from
+the in-memory catalog. Pages are cached under a per-profile generation
+number, which ``signals`` bumps whenever a WatchEvent, SavedList, UserRating
+or Feedback row of the profile (or its user's UserPreference) is saved or
+deleted, so every cached page of that profile goes stale at once without
+having to track its keys. The same number versions the dashboard ETag. The
+generation is a column of the profile row rather than a cache entry: the
+cache is per process, and every worker has to see the bump.
+"""
+from django.core.cache import cache
+from django.db.models import F
+from .models import Profile
+from .queries import continue_watching_page, saved_list_page
+from .utils import recommender
+
+PAGE_SIZE = 12
+MAX_PAGE_SIZE = 50
+PAGE_TIMEOUT = 60 * 60
+
+
+def generation(profile):
+    """Cache generation of a profile's activity rails, as loaded with the profile row."""
+    return profile.rail_generation
+
+
+def bump_generation(*profile_ids):
+    """Invalidate every cached activity-rail page of the given profiles, in all workers."""
+    Profile.objects.filter(pk__in=profile_ids).update(rail_generation=F('rail_generation') + 1)
+
+
+def _cached_page(name, profile, cursor, limit, build, *key_parts):
+    key = ':'.join(['rail_page', name, str(profile.pk), str(generation(profile)),
+                    *[str(part) for part in key_parts], cursor or '', str(limit)])
+    page = cache.get(key)
+    if page is None:
+        page = build()
+        cache.set(key, page, PAGE_TIMEOUT)
+    return page
+
+
+def continue_watching(profile, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of a profile's Continue Watching rail.
+
+    Args:
+        profile: Profile instance
+        cursor: ``next_cursor`` of the previous page
+        limit: Page size
+
+    Returns:
+        Dict with 'items' (movie record and progress percentage) and 'next_cursor'
+    """
+    def build():
+        rows, next_cursor = continue_watching_page(profile, cursor, limit)
+        items = []
+        for pk, last_watched, tmdb_id, watched, total in rows:
+            movie = recommender.get_movie(tmdb_id)
+            if movie is not None:
+                progress = min(100, int(100 * watched / total)) if total else 0
+                items.append({'movie': movie, 'progress': progress, 'last_watched': last_watched})
+        return {'items': items, 'next_cursor': next_cursor}
+
+    return _cached_page('continue_watching', profile, cursor, limit, build)
+
+
+def my_list(profile, list_type='watchlist', cursor=None, limit=PAGE_SIZE):
+    """
+    One page of a profile's saved list.
+
+    Args:
+        profile: Profile instance
+        list_type: Saved list name ('watchlist', 'favorites', ...)
+        cursor: ``next_cursor`` of the previous page
+        limit: Page size
+
+    Returns:
+        Dict with 'items' (movie record and added_at) and 'next_cursor'
+    """
+    def build():
+        rows, next_cursor = saved_list_page(profile, list_type, cursor, limit)
+        items = []
+        for pk, added_at, tmdb_id in rows:
+            movie = recommender.get_movie(tmdb_id)
+            if movie is not None:
+                items.append({'movie': movie, 'added_at': added_at})
+        return {'items': items, 'next_cursor': next_cursor}
+
+    return _cached_page('my_list', profile, cursor, limit, build, list_type)
@@ -0,0 +1,130 @@
+"""
+Model artifacts published once into shared memory and attached by workers.
+
+``publish`` copies a set of named numpy arrays into a single POSIX shared
+memory segment (64-byte aligned) and writes a JSON manifest describing where
+each array lives. ``SharedArtifacts.attach`` maps the segment in another
+process and hands out read-only numpy views, so every worker on the box reads
+the same physical pages instead of holding its own copy.
+
+The segment outlives the publishing process. Publishing again writes a new
+segment, atomically swaps the manifest and unlinks the previous segment;
+workers still attached to it keep their mapping until they exit.
+"""
+import json
+import os
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from scipy.sparse import csr_matrix
+
+ALIGNMENT = 64
+
+
+def _untrack(shm):
+    # Before Python 3.13 every process that opens a segment registers it with
+    # the resource tracker, which unlinks it when that process exits. The
+    # manifest owns the segment's lifetime instead.
+    resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+def read_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def unlink(segment):
+    """Remove a published segment (mappings in attached processes stay valid)."""
+    try:
+        shm = shared_memory.SharedMemory(name=segment)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
+
+
+def publish(arrays, meta, manifest_path, prefix='recommender'):
+    """
+    Copy ``arrays`` into a new shared memory segment and write its manifest.
+
+    Args:
+        arrays: Dict of name -> numpy array
+        meta: JSON-serializable metadata stored in the manifest (must include 'version')
+        manifest_path: Where to write the manifest
+        prefix: Segment name prefix
+
+    Returns:
+        The manifest dict
+    """
+    layout = {}
+    size = 0
+    for key, array in arrays.items():
+        size = -(-size // ALIGNMENT) * ALIGNMENT
+        layout[key] = {'offset': size, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        size += array.nbytes
+
+    name = f"{prefix}-{meta['version']}-{os.getpid()}"
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+    _untrack(shm)
+    try:
+        for key, array in arrays.items():
+            spec = layout[key]
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=spec['offset'])
+            view[...] = array
+            del view
+    finally:
+        shm.close()
+
+    previous = read_manifest(manifest_path) if os.path.exists(manifest_path) else None
+    manifest = {'segment': name, 'size': size, 'arrays': layout, 'meta': meta}
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+    if previous and previous['segment'] != name:
+        unlink(previous['segment'])
+    return manifest
+
+
+class SharedArtifacts:
+    """Read-only numpy views into a published segment."""
+
+    def __init__(self, shm, manifest):
+        # Holding the SharedMemory keeps the mapping (and every view) alive
+        self._shm = shm
+        self.manifest = manifest
+        self.meta = manifest['meta']
+
+    @classmethod
+    def attach(cls, manifest_path):
+        manifest = read_manifest(manifest_path)
+        shm = shared_memory.SharedMemory(name=manifest['segment'])
+        _untrack(shm)
+        return cls(shm, manifest)
+
+    def __contains__(self, key):
+        return key in self.manifest['arrays']
+
+    def __getitem__(self, key):
+        spec = self.manifest['arrays'][key]
+        array = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=self._shm.buf,
+                           offset=spec['offset'])
+        array.flags.writeable = False
+        return array
+
+    def group(self, prefix):
+        """All arrays named ``<prefix>/<key>``, keyed by ``key``."""
+        start = f"{prefix}/"
+        return {key[len(start):]: self[key] for key in self.manifest['arrays'] if key.startswith(start)}
+
+    def csr(self, prefix, shape):
+        """CSR matrix over ``<prefix>/data``, ``/indices`` and ``/indptr`` without copying."""
+        return csr_matrix(
+            (self[f'{prefix}/data'], self[f'{prefix}/indices'], self[f'{prefix}/indptr']),
+            shape=tuple(shape), copy=False,
+        )
+
+    @property
+    def nbytes(self):
+        return self.manifest['size']
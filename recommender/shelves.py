@@ -0,0 +1,137 @@
+"""
+Compact storage for precomputed recommendation shelves.
+
+A shelf is stored as packed arrays instead of a list of movie dicts: int32
+movie ids, float32 scores, float16 confidences and, per item, up to
+``MAX_BADGES`` uint8 codes into the payload's own table of distinct badge
+strings. The arrays are little-endian bytes, base64-encoded so they fit the
+existing JSONField. Movie metadata is never stored; ``hydrate`` looks it up
+in the in-memory catalog at read time.
+
+Shelves that only depend on the audience (trending, genre shelves) are
+stored once per audience in ``SharedShelf``, with some headroom. A profile's
+row then holds a reference (``{'ref': key, 'limit': n}``); the profile's
+eligibility mask is applied when it is read.
+"""
+import base64
+import numpy as np
+from .models import CachedRecommendations, SharedShelf
+
+FORMAT_VERSION = 1
+MAX_BADGES = 3
+NO_BADGE = 255
+
+
+def _pack_array(values, dtype):
+    return base64.b64encode(np.asarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def _unpack_array(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
+
+
+def pack(items):
+    """
+    Pack recommendation items into a compact payload.
+
+    Args:
+        items: Iterable of dicts with 'movie' (record or dict with 'id'),
+            'score', 'badges' and 'confidence'
+
+    Returns:
+        JSON-serializable payload dict
+    """
+    items = list(items)
+    badge_table = {}
+    codes = np.full((len(items), MAX_BADGES), NO_BADGE, dtype=np.uint8)
+    for i, item in enumerate(items):
+        for j, badge in enumerate(item.get('badges', ())[:MAX_BADGES]):
+            if badge not in badge_table:
+                # Codes are uint8 and NO_BADGE is reserved
+                if len(badge_table) == NO_BADGE:
+                    raise ValueError(f"Too many distinct badges in one shelf (max {NO_BADGE})")
+                badge_table[badge] = len(badge_table)
+            codes[i, j] = badge_table[badge]
+    return {
+        'v': FORMAT_VERSION,
+        'ids': _pack_array([item['movie']['id'] for item in items], '<i4'),
+        'scores': _pack_array([item.get('score', 0.0) for item in items], '<f4'),
+        'confidence': _pack_array([item.get('confidence', 0.0) for item in items], '<f2'),
+        'badges': list(badge_table),
+        'badge_codes': _pack_array(codes, np.uint8),
+    }
+
+
+def reference(shared_key, limit):
+    """Payload pointing a profile's shelf at a SharedShelf."""
+    return {'v': FORMAT_VERSION, 'ref': shared_key, 'limit': limit}
+
+
+def hydrate(catalog, payload, mask=None, limit=None):
+    """
+    Recommendation items for a packed payload.
+
+    Args:
+        catalog: MovieCatalog to read movie metadata from
+        payload: Payload from ``pack`` (legacy lists of movie dicts are returned as-is)
+        mask: Optional eligibility mask; ineligible movies are skipped
+        limit: Maximum number of items
+
+    Returns:
+        List of dicts with 'movie' (MovieRecord), 'score', 'badges' and
+        'confidence'; movies no longer in the catalog are skipped
+    """
+    if isinstance(payload, list):
+        return payload[:limit]
+    ids = _unpack_array(payload['ids'], '<i4')
+    scores = _unpack_array(payload['scores'], '<f4')
+    confidence = _unpack_array(payload['confidence'], '<f2')
+    codes = _unpack_array(payload['badge_codes'], np.uint8).reshape(len(ids), MAX_BADGES)
+    badge_table = payload['badges']
+
+    rows = catalog.rows_of(ids)
+    keep = rows >= 0
+    if mask is not None:
+        keep &= mask[np.maximum(rows, 0)]
+    items = []
+    for i in np.flatnonzero(keep)[:limit].tolist():
+        items.append({
+            'movie': catalog.record(int(rows[i])),
+            'score': float(scores[i]),
+            'badges': [badge_table[code] for code in codes[i].tolist() if code != NO_BADGE],
+            'confidence': float(confidence[i]),
+        })
+    return items
+
+
+def store_shared(shelf_key, items):
+    """Pack and store a shelf shared by every profile of an audience."""
+    SharedShelf.objects.update_or_create(shelf_key=shelf_key, defaults={'payload': pack(items)})
+
+
+def load_shelves(profile, catalog, mask=None):
+    """
+    Every precomputed shelf of a profile, hydrated, in two queries.
+
+    Args:
+        profile: Profile instance
+        catalog: MovieCatalog to read movie metadata from
+        mask: The profile's eligibility mask, applied to every shelf
+
+    Returns:
+        Dict of shelf_key -> list of recommendation items
+    """
+    rows = dict(CachedRecommendations.objects.filter(profile=profile).values_list('shelf_key', 'payload'))
+    refs = {payload['ref'] for payload in rows.values() if isinstance(payload, dict) and 'ref' in payload}
+    shared = dict(SharedShelf.objects.filter(shelf_key__in=refs).values_list('shelf_key', 'payload')) if refs else {}
+
+    shelves = {}
+    for shelf_key, payload in rows.items():
+        limit = None
+        if isinstance(payload, dict) and 'ref' in payload:
+            limit = payload['limit']
+            payload = shared.get(payload['ref'])
+            if payload is None:
+                continue
+        shelves[shelf_key] = hydrate(catalog, payload, mask, limit)
+    return shelves
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import ChallengeProgress, Feedback, Profile, SavedList, UserPreference, UserRating, WatchEvent
+from . import gamification
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Apply the configured PRAGMAs to every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'RECOMMENDER_SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver([post_save, post_delete], sender=WatchEvent)
+@receiver([post_save, post_delete], sender=SavedList)
+@receiver([post_save, post_delete], sender=UserRating)
+@receiver([post_save, post_delete], sender=Feedback)
+def invalidate_activity_rails(sender, instance, **kwargs):
+    """New activity makes the profile's cached rail pages and dashboard ETag stale."""
+    # Imported here: rails pulls in the recommender, which loads the artifacts
+    from . import rails
+    rails.bump_generation(instance.profile_id)
+
+
+@receiver([post_save, post_delete], sender=UserPreference)
+def invalidate_user_dashboards(sender, instance, **kwargs):
+    """Preferences are per user and shown on every profile's dashboard."""
+    from . import rails
+    rails.bump_generation(*Profile.objects.filter(user_id=instance.user_id).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=UserRating)
+@receiver(post_delete, sender=WatchEvent)
+@receiver(post_delete, sender=ChallengeProgress)
+def invalidate_leaderboard_scores(sender, instance, **kwargs):
+    """Deleted activity leaves no timestamp; have the next leaderboard run rescore the profile."""
+    gamification.mark_stale(instance.profile_id)
@@ -0,0 +1,194 @@
+"""
+Offline all-pairs cosine similarity with blocked sparse products.
+
+``build_neighbors`` never materializes ``count_matrix @ count_matrix.T``.
+The L2-normalized matrix and its transpose are written once as ``.npy`` files
+in a scratch directory; each worker process memory-maps them (the OS page
+cache is shared between workers) and scores one block of rows at a time,
+keeping only the top-K neighbors per row at or above a threshold. A worker
+therefore holds at most ``block_size x catalog size`` dense float32 scores.
+
+The result is a CSR-style neighbor file (``indptr``/``indices``/``data``)
+loaded by ``NeighborIndex``.
+
+This module deliberately has no Django imports so worker processes start
+cheaply under any multiprocessing start method.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+NEIGHBORS_FILENAME = 'neighbors.npz'
+
+_CSR_PARTS = ('data', 'indices', 'indptr')
+
+
+def top_k(scores, k):
+    """
+    Indices of the ``k`` highest scores, best first.
+
+    Ties are broken by lower index, matching a stable descending sort, but
+    only the candidates at or above the k-th score are sorted.
+    """
+    n = len(scores)
+    if k <= 0 or not n:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        kth = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= kth)
+    order = np.lexsort((candidates, -scores[candidates]))[:k]
+    return candidates[order]
+
+
+def _save_csr(directory, name, matrix):
+    for part in _CSR_PARTS:
+        np.save(os.path.join(directory, f"{name}_{part}.npy"), getattr(matrix, part))
+    return matrix.shape
+
+
+def _map_csr(directory, name, shape):
+    parts = [np.load(os.path.join(directory, f"{name}_{part}.npy"), mmap_mode='r') for part in _CSR_PARTS]
+    return csr_matrix(tuple(parts), shape=shape, copy=False)
+
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+
+def _init_worker(directory, shape, k, threshold):
+    _worker['matrix'] = _map_csr(directory, 'matrix', shape)
+    _worker['transpose'] = _map_csr(directory, 'transpose', (shape[1], shape[0]))
+    _worker['k'] = k
+    _worker['threshold'] = threshold
+
+
+def _score_block(bounds):
+    """Top-K neighbors of rows ``start:end``; returns (start, counts, indices, scores)."""
+    start, end = bounds
+    k, threshold = _worker['k'], _worker['threshold']
+    scores = (_worker['matrix'][start:end] @ _worker['transpose']).toarray()
+    counts = np.zeros(end - start, dtype=np.int64)
+    indices = []
+    values = []
+    for offset, row_scores in enumerate(scores):
+        row_scores[start + offset] = -np.inf
+        top = top_k(row_scores, k)
+        top = top[row_scores[top] >= threshold]
+        counts[offset] = len(top)
+        indices.append(top.astype(np.int32))
+        values.append(row_scores[top])
+    return start, counts, np.concatenate(indices), np.concatenate(values).astype(np.float32)
+
+
+def build_neighbors(count_matrix, k=50, threshold=0.01, block_size=256, workers=None, scratch_dir=None, log=None):
+    """
+    Compute every row's top-K cosine neighbors.
+
+    Args:
+        count_matrix: Sparse item x term matrix
+        k: Neighbors kept per row (the row itself is excluded)
+        threshold: Minimum cosine similarity kept
+        block_size: Rows scored per sparse product
+        workers: Worker processes (defaults to the CPU count; 1 runs in-process)
+        scratch_dir: Parent directory for the memory-mapped matrix files
+        log: Optional callable receiving progress messages
+
+    Returns:
+        Tuple of (indptr, indices, scores) arrays in CSR layout
+    """
+    n_rows = count_matrix.shape[0]
+    workers = workers or os.cpu_count() or 1
+    normalized = normalize(csr_matrix(count_matrix, dtype=np.float32), norm='l2', copy=False)
+    normalized.sort_indices()
+    transpose = normalized.T.tocsr()
+
+    directory = tempfile.mkdtemp(prefix='neighbors-', dir=scratch_dir)
+    try:
+        shape = _save_csr(directory, 'matrix', normalized)
+        _save_csr(directory, 'transpose', transpose)
+        del normalized, transpose
+
+        blocks = [(start, min(start + block_size, n_rows)) for start in range(0, n_rows, block_size)]
+        initargs = (directory, shape, k, threshold)
+        if workers == 1:
+            _init_worker(*initargs)
+            results = map(_score_block, blocks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs)
+            results = pool.imap(_score_block, blocks)
+
+        counts = np.zeros(n_rows, dtype=np.int64)
+        indices = []
+        scores = []
+        try:
+            for done, (start, block_counts, block_indices, block_scores) in enumerate(results, 1):
+                counts[start:start + len(block_counts)] = block_counts
+                indices.append(block_indices)
+                scores.append(block_scores)
+                if log and (done % 50 == 0 or done == len(blocks)):
+                    log(f"Scored {done}/{len(blocks)} blocks")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            _worker.clear()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    empty_indices = [np.zeros(0, dtype=np.int32)]
+    empty_scores = [np.zeros(0, dtype=np.float32)]
+    return indptr, np.concatenate(indices or empty_indices), np.concatenate(scores or empty_scores)
+
+
+def save_neighbors(path, indptr, indices, scores, catalog_ids, k, threshold):
+    # Through a file handle: np.savez would append '.npz' to other paths
+    with open(path, 'wb') as f:
+        np.savez(f, indptr=indptr, indices=indices, scores=scores, catalog_ids=catalog_ids, k=k, threshold=threshold)
+
+
+class NeighborIndex:
+    """Precomputed top-K neighbors per catalog row, as written by ``build_neighbors``."""
+
+    def __init__(self, indptr, indices, scores, k, threshold):
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        self.k = k
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path, catalog_ids):
+        """Load a neighbor file; returns None when it was built for a different catalog."""
+        data = np.load(path)
+        if not np.array_equal(data['catalog_ids'], catalog_ids):
+            return None
+        return cls(data['indptr'], data['indices'], data['scores'], int(data['k']), float(data['threshold']))
+
+    def neighbors(self, row, k, mask=None):
+        """
+        Stored (rows, scores) for ``row``, or None if fewer than ``k`` are usable.
+
+        Rows cut short by the threshold or by ``mask`` (an eligibility mask)
+        return None so callers can fall back to scoring live and still
+        return ``k`` results.
+        """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        if end - start < k:
+            return None
+        rows = self.indices[start:end].astype(np.int64)
+        scores = self.scores[start:end]
+        if mask is not None:
+            eligible = mask[rows]
+            rows, scores = rows[eligible], scores[eligible]
+            if len(rows) < k:
+                return None
+        return rows[:k], scores[:k]
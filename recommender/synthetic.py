@@ -0,0 +1,164 @@
+"""
+Synthetic catalogs and user activity for benchmarks and load tests.
+
+Everything is generated from a seed, so two runs with the same parameters
+produce identical artifacts and database rows.
+"""
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from scipy.sparse import random as sparse_random
+from sklearn.feature_extraction.text import CountVectorizer
+from django.contrib.auth.models import User
+from .catalog import MovieCatalog
+from .models import Movie, Profile, UserRating, Feedback, PreferenceWeights
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary', 'Drama',
+    'Family', 'Fantasy', 'History', 'Horror', 'Music', 'Mystery', 'Romance',
+    'Science Fiction', 'Thriller', 'War', 'Western',
+]
+
+LANGUAGES = ['en', 'fr', 'es', 'ja', 'ko', 'de', 'hi']
+LANGUAGE_SHARES = [0.6, 0.1, 0.1, 0.07, 0.05, 0.04, 0.04]
+
+
+def vocabulary_word(index):
+    return f"w{index}"
+
+
+def person_name(index):
+    return f"Person {index}"
+
+
+def make_catalog(n_movies=10000, vocab_size=5000, density=0.002, seed=0):
+    """
+    Generate a movies DataFrame and a matching count matrix.
+
+    Args:
+        n_movies: Number of catalog rows
+        vocab_size: Number of vectorizer terms (matrix columns)
+        density: Fraction of non-zero matrix entries
+        seed: Random seed
+
+    Returns:
+        Tuple of (movies_df, count_matrix, vectorizer)
+    """
+    rng = np.random.default_rng(seed)
+    count_matrix = sparse_random(
+        n_movies, vocab_size, density=density, format='csr', dtype=np.float64,
+        random_state=seed, data_rvs=lambda size: rng.integers(1, 4, size),
+    )
+    count_matrix.sort_indices()
+
+    # Overviews are made of the row's own terms, so text search and the
+    # vectorizer agree with the matrix
+    overviews = [
+        ' '.join(vocabulary_word(j) for j in count_matrix.indices[count_matrix.indptr[i]:count_matrix.indptr[i + 1]])
+        for i in range(n_movies)
+    ]
+    genre_counts = rng.integers(1, 4, n_movies)
+    movies_df = pd.DataFrame({
+        'id': rng.choice(np.arange(1, n_movies * 10), n_movies, replace=False),
+        'title': [f"{vocabulary_word(rng.integers(vocab_size))} {vocabulary_word(rng.integers(vocab_size))} {i}"
+                  for i in range(n_movies)],
+        'overview': overviews,
+        'genres': [list(rng.choice(GENRES, k, replace=False)) for k in genre_counts],
+        'release_year': rng.integers(1950, 2025, n_movies),
+        'vote_average': np.round(rng.uniform(1, 10, n_movies), 1),
+        'vote_count': rng.integers(0, 20000, n_movies),
+        'maturity_rating': rng.choice(np.array(['G', 'PG', 'PG-13', 'R', None], dtype=object), n_movies),
+        'runtime': rng.integers(70, 180, n_movies),
+        'original_language': rng.choice(LANGUAGES, n_movies, p=LANGUAGE_SHARES),
+    })
+    # A few prolific people and a long tail, like real credits
+    n_people = max(n_movies // 2, 10)
+    person_weights = 1.0 / (np.arange(n_people) + 100)
+    person_weights /= person_weights.sum()
+    movies_df['cast'] = [[person_name(p) for p in rng.choice(n_people, k, replace=False, p=person_weights)]
+                         for k in rng.integers(3, 9, n_movies)]
+    movies_df['director'] = [person_name(p) for p in rng.choice(n_people, n_movies, p=person_weights)]
+    # Fitting with a fixed vocabulary only validates it (no documents needed)
+    vectorizer = CountVectorizer(vocabulary={vocabulary_word(j): j for j in range(vocab_size)}).fit([])
+    return movies_df, count_matrix, vectorizer
+
+
+def write_artifacts(models_dir, movies_df, count_matrix, vectorizer):
+    """Write a synthetic catalog in the layout ``MovieRecommender.load_local`` reads."""
+    os.makedirs(models_dir, exist_ok=True)
+    with open(os.path.join(models_dir, 'processed_movies.pkl'), 'wb') as f:
+        pickle.dump(movies_df, f)
+    with open(os.path.join(models_dir, 'count_vectorizer.pkl'), 'wb') as f:
+        pickle.dump(vectorizer, f)
+    np.savez(os.path.join(models_dir, 'count_matrix.npz'), data=count_matrix.data, indices=count_matrix.indices,
+             indptr=count_matrix.indptr, shape=count_matrix.shape)
+
+
+def make_recommender(n_movies=10000, vocab_size=5000, density=0.002, seed=0):
+    """Build a MovieRecommender over a synthetic catalog."""
+    from .utils import MovieRecommender
+
+    movies_df, count_matrix, vectorizer = make_catalog(n_movies, vocab_size, density, seed)
+    return MovieRecommender.from_artifacts(
+        MovieCatalog.from_dataframe(movies_df), count_matrix, vectorizer,
+        version=f"synthetic-{n_movies}-{vocab_size}-{seed}",
+    )
+
+
+def make_profiles(engine, n_profiles=50, ratings_per_profile=30, feedback_per_profile=5, seed=0):
+    """
+    Create users, profiles, ratings and feedback against a recommender's catalog.
+
+    Args:
+        engine: MovieRecommender whose catalog the activity refers to
+        n_profiles: Number of users (one active profile each)
+        ratings_per_profile: Ratings per profile
+        feedback_per_profile: 'not_interested' feedback rows per profile
+        seed: Random seed
+
+    Returns:
+        List of the created Profile instances
+    """
+    rng = np.random.default_rng(seed)
+    catalog = engine.catalog
+    # Skew activity towards popular titles, like real traffic
+    weights = catalog.vote_count.astype(np.float64) + 1
+    weights /= weights.sum()
+    per_profile = ratings_per_profile + feedback_per_profile
+    picks = [rng.choice(len(catalog), per_profile, replace=False, p=weights) for _ in range(n_profiles)]
+
+    used_rows = np.unique(np.concatenate(picks)) if picks else np.zeros(0, dtype=np.int64)
+    existing = set(Movie.objects.filter(tmdb_id__in=catalog.ids[used_rows].tolist()).values_list('tmdb_id', flat=True))
+    Movie.objects.bulk_create([
+        Movie(
+            tmdb_id=record.id, title=record.title, overview=record.overview, genres=record.genres,
+            release_year=record.release_year, vote_average=record.vote_average,
+            vote_count=int(catalog.vote_count[row]),
+        )
+        for row, record in zip(used_rows, catalog.records(used_rows)) if record.id not in existing
+    ], batch_size=1000)
+    movie_pks = dict(Movie.objects.filter(tmdb_id__in=catalog.ids[used_rows].tolist()).values_list('tmdb_id', 'pk'))
+
+    profiles = []
+    ratings = []
+    feedback = []
+    for n, rows in enumerate(picks):
+        user = User.objects.create(username=f"synthetic-{seed}-{n}")
+        profile = Profile.objects.create(user=user, name='Default', profile_type='adult', is_active=True)
+        profiles.append(profile)
+        tmdb_ids = catalog.ids[rows].tolist()
+        for tmdb_id in tmdb_ids[:ratings_per_profile]:
+            ratings.append(UserRating(profile=profile, movie_id=movie_pks[tmdb_id], rating=float(rng.integers(1, 6))))
+        for tmdb_id in tmdb_ids[ratings_per_profile:]:
+            feedback.append(Feedback(profile=profile, movie_id=movie_pks[tmdb_id], feedback_type='not_interested'))
+        top_genres = rng.choice(catalog.genre_names, min(3, len(catalog.genre_names)), replace=False)
+        PreferenceWeights.objects.create(
+            profile=profile,
+            genre_weights={genre: round(float(rng.uniform(0.3, 1.0)), 2) for genre in top_genres},
+            runtime_weights={'short': 0.5, 'medium': 0.8, 'long': round(float(rng.uniform(0.2, 0.9)), 2)},
+            language_weights={'en': 0.9, str(rng.choice(LANGUAGES[1:])): 0.6},
+        )
+    UserRating.objects.bulk_create(ratings, batch_size=1000)
+    Feedback.objects.bulk_create(feedback, batch_size=1000)
+    return profiles
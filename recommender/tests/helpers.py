@@ -0,0 +1,16 @@
+from recommender.catalog import MovieCatalog
+from recommender.models import Movie
+from recommender.synthetic import make_catalog
+
+
+def small_catalog():
+    movies_df, count_matrix, vectorizer = make_catalog(300, vocab_size=400, density=0.02, seed=1)
+    return MovieCatalog.from_dataframe(movies_df)
+
+
+def create_movie(catalog, row):
+    record = catalog.record(row)
+    return Movie.objects.create(
+        tmdb_id=record.id, title=record.title, overview=record.overview, genres=record.genres,
+        release_year=record.release_year, vote_average=record.vote_average, vote_count=1,
+    )
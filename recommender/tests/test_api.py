@@ -0,0 +1,76 @@
+import json
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+from recommender.models import Profile
+from recommender.utils import recommender
+
+
+class RecommendationsAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pw12345!x')
+        cls.profile = Profile.objects.create(user=cls.user, name='Default', is_active=True)
+        other = User.objects.create_user('other', password='pw12345!x')
+        cls.other_profile = Profile.objects.create(user=other, name='Default', is_active=True)
+        cls.seeds = [int(movie_id) for movie_id in recommender.catalog.ids[:3]]
+
+    def get(self, **params):
+        return self.client.get(reverse('api_recommendations'), params)
+
+    def post(self, body, client=None):
+        return (client or self.client).post(reverse('api_recommendations'), body, content_type='application/json')
+
+    def test_response_shape(self):
+        unknown = int(recommender.catalog.ids.max()) + 1
+        response = self.get(movie_ids=','.join(map(str, self.seeds + [unknown])), k=4)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['k'], 4)
+        self.assertEqual(sorted(data['movies']), sorted(map(str, self.seeds)))
+        self.assertEqual(data['profiles'], {})
+        self.assertEqual(data['missing_movie_ids'], [unknown])
+        items = data['movies'][str(self.seeds[0])]
+        self.assertEqual(len(items), 4)
+        self.assertEqual(set(items[0]), {'id', 'title', 'score'})
+        expected = recommender.get_recommendations_batch(self.seeds[:1], 4)[self.seeds[0]]
+        self.assertEqual([item['id'] for item in items], [movie_id for movie_id, _ in expected])
+
+    def test_json_body_and_streaming_agree(self):
+        self.client.force_login(self.user)
+        body = {'movie_ids': self.seeds, 'profile_ids': [self.profile.id], 'k': 3}
+        response = self.post(body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['profiles'][str(self.profile.id)]), 3)
+        streamed = self.post({**body, 'stream': True})
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(json.loads(b''.join(streamed.streaming_content)), response.json())
+
+    def test_invalid_input_is_400(self):
+        self.assertEqual(self.get(movie_ids='1,x').status_code, 400)
+        self.assertEqual(self.get(movie_ids='1', k=0).status_code, 400)
+        self.assertEqual(self.post([1, 2]).status_code, 400)
+        self.assertEqual(self.client.post(reverse('api_recommendations'), 'not json',
+                                          content_type='application/json').status_code, 400)
+
+    def test_profile_access(self):
+        self.assertEqual(self.get(profile_ids=self.profile.id).status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.get(profile_ids=self.other_profile.id).status_code, 403)
+        self.assertEqual(self.get(profile_ids=self.profile.id).status_code, 200)
+
+    def test_posts_need_the_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        self.assertEqual(self.post({'movie_ids': self.seeds}, client=client).status_code, 403)
+
+    def test_seed_results_follow_the_viewer_mask(self):
+        Profile.objects.filter(pk=self.profile.pk).update(profile_type='kids')
+        self.client.force_login(self.user)
+        seeds = [int(movie_id) for movie_id in recommender.catalog.ids[:20]]
+        data = self.get(movie_ids=','.join(map(str, seeds)), k=10).json()
+        allowed = recommender.eligibility_mask('kids')
+        for items in data['movies'].values():
+            rows = recommender.catalog.rows_of([item['id'] for item in items])
+            self.assertTrue(allowed[rows].all())
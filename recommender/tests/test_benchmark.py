@@ -0,0 +1,40 @@
+import io
+from django.test import SimpleTestCase, TestCase
+from recommender.management.commands.benchmark_recs import Command
+
+
+class BenchmarkTests(TestCase):
+
+    def options(self, **overrides):
+        options = {'vocab_size': 200, 'density': 0.02, 'profiles': 3, 'ratings_per_profile': 5,
+                   'iterations': 3, 'seed': 0}
+        options.update(overrides)
+        return options
+
+    def test_run_scale_reports_every_operation(self):
+        results = Command(stdout=io.StringIO(), stderr=io.StringIO()).run_scale(200, self.options())
+        self.assertEqual(set(results['operations']), {
+            'get_recommendations', 'rank_with_hybrid', 'rerank_for_diversity', 'explain',
+            'search_movies', 'get_personalized_recommendations', 'recompute_recs',
+        })
+        stats = results['operations']['get_recommendations']
+        self.assertEqual(stats['iterations'], 3)
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertGreater(results['peak_rss_mb'], 0)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+
+    def report(self, **p50s):
+        operations = {name: {'p50_ms': p50} for name, p50 in p50s.items()}
+        return {'results': {'1000': {'operations': operations}}}
+
+    def test_compare_flags_slowdowns_past_the_tolerance(self):
+        baseline = self.report(search_movies=10.0, explain=2.0, get_recommendations=0.0)
+        report = self.report(search_movies=12.0, explain=3.0, get_recommendations=5.0, rank_with_hybrid=1.0)
+        regressions = Command().compare(baseline, report, 0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('explain', regressions[0])
+
+    def test_compare_ignores_scales_missing_from_the_baseline(self):
+        self.assertEqual(Command().compare({'results': {}}, self.report(explain=3.0), 0.25), [])
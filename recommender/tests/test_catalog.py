@@ -0,0 +1,47 @@
+import numpy as np
+from django.test import SimpleTestCase
+from recommender.tests.helpers import small_catalog
+
+
+class MovieCatalogTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.catalog = small_catalog()
+
+    def test_lookup_by_id(self):
+        ids = self.catalog.ids
+        rows = [0, 17, len(ids) - 1]
+        self.assertEqual(self.catalog.rows_of(ids[rows]).tolist(), rows)
+        self.assertEqual(self.catalog.row_of(int(ids[17])), 17)
+        self.assertEqual(self.catalog.get(int(ids[17])).title, self.catalog.title[17])
+
+    def test_unknown_ids(self):
+        unknown = int(self.catalog.ids.max()) + 1
+        self.assertEqual(self.catalog.row_of(unknown), -1)
+        self.assertEqual(self.catalog.rows_of([unknown, self.catalog.ids[3]]).tolist(), [-1, 3])
+        self.assertIsNone(self.catalog.get(unknown))
+        self.assertNotIn(unknown, self.catalog)
+
+    def test_search_title_is_case_insensitive(self):
+        word = self.catalog.title[5].split()[0]
+        rows = self.catalog.search_title(word.upper())
+        self.assertIn(5, rows.tolist())
+        for row in rows.tolist():
+            self.assertIn(word.lower(), self.catalog.title[row].lower())
+        self.assertEqual(len(self.catalog.search_title('no such title anywhere')), 0)
+
+    def test_top_by_rating(self):
+        rows = self.catalog.top_by_rating(np.arange(len(self.catalog)), 10)
+        ratings = self.catalog.vote_average[rows]
+        self.assertEqual(len(rows), 10)
+        self.assertTrue(np.all(np.diff(ratings) <= 0))
+        self.assertEqual(ratings[0], self.catalog.vote_average.max())
+
+    def test_rows_with_genre(self):
+        genre = self.catalog.genres_of(0)[0]
+        rows = self.catalog.rows_with_genre(genre.upper())
+        self.assertIn(0, rows.tolist())
+        for row in rows.tolist():
+            self.assertIn(genre, self.catalog.genres_of(row))
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+from recommender.clusters import CatalogClusters, onboarding_weights
+
+
+def three_topics():
+    # Rows 0-9 use terms 0-3, rows 10-19 terms 4-7, rows 20-29 terms 8-11
+    rng = np.random.default_rng(0)
+    counts = np.zeros((30, 12), dtype=np.float32)
+    for row in range(30):
+        topic = row // 10
+        counts[row, rng.choice(np.arange(4 * topic, 4 * topic + 4), 2, replace=False)] = rng.integers(1, 4, 2)
+    return normalize(csr_matrix(counts)).astype(np.float32)
+
+
+class CatalogClustersTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.matrix = three_topics()
+        cls.popularity = np.arange(30) % 10 * 10
+        cls.clusters = CatalogClusters.build(cls.matrix, cls.popularity, n_clusters=3, representatives=2,
+                                             batch_size=30, seed=0)
+
+    def cluster_of(self, row):
+        return self.clusters.labels[row]
+
+    def test_clusters_follow_the_topics(self):
+        labels = self.clusters.labels
+        for topic in range(3):
+            self.assertEqual(len(set(labels[topic * 10:topic * 10 + 10].tolist())), 1)
+        self.assertEqual(len(set(labels.tolist())), 3)
+
+    def test_representatives_are_popular_members(self):
+        for cluster, rows in enumerate(self.clusters.representatives):
+            self.assertTrue(all(self.cluster_of(row) == cluster for row in rows))
+            members = np.flatnonzero(self.clusters.labels == cluster)
+            self.assertGreater(self.popularity[rows].min(), np.median(self.popularity[members]))
+
+    def test_picks_round_robin_across_clusters(self):
+        picks = self.clusters.picks(6)
+        self.assertEqual(len(set(self.clusters.labels[picks[:3]].tolist())), 3)
+        self.assertEqual(sorted(picks.tolist()), sorted(self.clusters.representatives.ravel().tolist()))
+        self.assertEqual(len(self.clusters.picks(2)), 2)
+
+    def test_ratings_reorder_the_picks(self):
+        affinity = self.clusters.affinity(self.matrix, [12, 13, 25], onboarding_weights([5, 5, 1]))
+        picks = self.clusters.picks(3, affinity)
+        self.assertEqual([self.cluster_of(row) for row in picks],
+                         [self.cluster_of(12), self.cluster_of(0), self.cluster_of(25)])
+        self.assertIsNone(self.clusters.affinity(self.matrix, [12], onboarding_weights([3])))
+
+    def test_picks_respect_the_mask(self):
+        mask = np.ones(30, dtype=bool)
+        mask[10:20] = False
+        picks = self.clusters.picks(6, mask=mask)
+        self.assertEqual(len(picks), 4)
+        self.assertFalse(np.any((picks >= 10) & (picks < 20)))
+
+    def test_save_and_load(self):
+        ids = np.arange(1000, 1030)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'clusters')
+            self.clusters.save(path, ids)
+            loaded = CatalogClusters.load(path, ids)
+            self.assertIsNone(CatalogClusters.load(path, ids[::-1]))
+        np.testing.assert_array_equal(loaded.representatives, self.clusters.representatives)
+        np.testing.assert_array_equal(loaded.default_order, self.clusters.default_order)
@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from scipy.sparse import csr_matrix
+from recommender.collaborative import ImplicitALS, stream_interactions
+from recommender.management.commands import train_cf
+from recommender.models import Feedback, Profile, UserRating, WatchEvent
+from recommender.synthetic import make_profiles, make_recommender
+from recommender.tests.helpers import create_movie, small_catalog
+
+
+def toy_interactions():
+    # Two taste groups: profiles 0-9 use items 0-4, profiles 10-19 items 5-9
+    rows, cols = [], []
+    for user in range(20):
+        items = range(5) if user < 10 else range(5, 10)
+        for item in items:
+            if (user + item) % 5:
+                rows.append(user)
+                cols.append(item)
+    return csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(20, 10))
+
+
+class ImplicitALSTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = ImplicitALS.train(toy_interactions(), factors=2, iterations=8, regularization=0.1, alpha=10.0)
+
+    def test_fit_recommends_within_the_taste_group(self):
+        self.assertEqual(self.model.item_factors.shape, (10, 2))
+        self.assertEqual(self.model.item_factors.dtype, np.float32)
+        user = self.model.fold_in([0, 1], [1.0, 1.0])
+        scores = self.model.score(user, np.arange(10))
+        self.assertGreater(scores[2:5].min(), scores[5:].max())
+        # Scores are clipped to [0, 1]; rank on the raw predictions
+        predictions = self.model.item_factors @ self.model.fold_in([5, 6], [2.0, 1.0])
+        self.assertGreater(predictions[7:].min(), predictions[:5].max())
+
+    def test_fold_in_without_positive_signal(self):
+        self.assertIsNone(self.model.fold_in([3, -1], [0.0, 1.0]))
+        self.assertIsNone(self.model.fold_in([], []))
+
+    def test_save_and_load(self):
+        ids = np.arange(100, 110)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'factors')
+            self.model.save(path, ids)
+            self.assertTrue(os.path.exists(path))
+            loaded = ImplicitALS.load(path, ids)
+            self.assertIsNone(ImplicitALS.load(path, ids + 1))
+        np.testing.assert_array_equal(loaded.item_factors, self.model.item_factors)
+        self.assertEqual((loaded.regularization, loaded.alpha), (0.1, 10.0))
+
+
+class InteractionStreamTests(TestCase):
+
+    def test_weights(self):
+        catalog = small_catalog()
+        profile = Profile.objects.create(user=User.objects.create(username='viewer'), name='Default')
+        movies = [create_movie(catalog, row) for row in range(4)]
+        UserRating.objects.create(profile=profile, movie=movies[0], rating=5)
+        UserRating.objects.create(profile=profile, movie=movies[1], rating=2)
+        WatchEvent.objects.create(profile=profile, movie=movies[2], watch_duration=30, total_duration=120)
+        Feedback.objects.create(profile=profile, movie=movies[3], feedback_type='like')
+        Feedback.objects.create(profile=profile, movie=movies[1], feedback_type='not_interested')
+        matrix = stream_interactions(catalog, chunk_size=2).to_matrix()
+        self.assertEqual(matrix.shape, (1, len(catalog)))
+        self.assertEqual(matrix[0, :4].toarray().ravel().tolist(), [3.0, 0.0, 0.25, 2.0])
+
+
+class TrainCFCommandTests(TestCase):
+
+    def test_writes_the_output_path_and_loads_it(self):
+        engine = make_recommender(200, vocab_size=200, density=0.02, seed=1)
+        make_profiles(engine, 5, 10, seed=1)
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(train_cf, 'recommender', engine):
+            output = os.path.join(directory, 'factors')
+            stdout = io.StringIO()
+            call_command('train_cf', output=output, factors=4, iterations=2, stdout=stdout)
+            self.assertTrue(os.path.exists(output))
+        self.assertIsNotNone(engine.cf)
+        self.assertEqual(engine.cf.factors, 4)
+        self.assertIn(f'wrote {output}', stdout.getvalue())
@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from recommender.models import Feedback, Movie, Profile, UserPreference, UserRating
+from recommender import views
+from recommender.tests.helpers import create_movie
+from recommender.utils import recommender
+
+
+class DashboardETagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pw12345!x')
+        cls.profile = Profile.objects.create(user=cls.user, name='Default', is_active=True)
+        cls.movie = create_movie(recommender.catalog, 0)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # The first page sets the CSRF cookie, which is part of the ETag
+        self.client.get(reverse('dashboard'))
+
+    def etag(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_revalidation(self):
+        etag = self.etag()
+        response = self.client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_needs_no_aggregate_queries(self):
+        request = self.client.get(reverse('dashboard')).wsgi_request
+        del request._active_profile
+        # The profile row (and the session's message check) only
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(views._dashboard_etag(request))
+
+    def test_activity_changes_the_etag(self):
+        etags = [self.etag()]
+        rating = UserRating.objects.create(profile=self.profile, movie=self.movie, rating=4)
+        etags.append(self.etag())
+        rating.rating = 2
+        rating.save()
+        etags.append(self.etag())
+        Feedback.objects.create(profile=self.profile, movie=self.movie, feedback_type='not_interested')
+        etags.append(self.etag())
+        UserPreference.objects.create(user=self.user, favorite_genres=['Drama'])
+        etags.append(self.etag())
+        rating.delete()
+        etags.append(self.etag())
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_other_profiles_activity_keeps_the_etag(self):
+        etag = self.etag()
+        other = Profile.objects.create(user=User.objects.create(username='other'), name='Default')
+        UserRating.objects.create(profile=other, movie=Movie.objects.get(), rating=4)
+        self.assertEqual(self.etag(), etag)
@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+from recommender.synthetic import make_recommender
+
+
+class EligibilityMaskTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = make_recommender(300, vocab_size=400, density=0.02, seed=1)
+
+    def test_audience_masks(self):
+        adult = self.engine.eligibility_mask('adult')
+        kids = self.engine.eligibility_mask('kids')
+        self.assertTrue(adult.all())
+        self.assertTrue(0 < kids.sum() < len(kids))
+        self.assertFalse(kids.flags.writeable)
+        # Unknown profile types fall back to the most restrictive audience
+        self.assertIs(self.engine.eligibility_mask('teen'), kids)
+
+    def test_exclusions_copy_the_shared_mask(self):
+        catalog = self.engine.catalog
+        excluded = {int(catalog.ids[2]), int(catalog.ids[9])}
+        mask = self.engine.eligibility_mask('adult', excluded)
+        self.assertFalse(mask[2] or mask[9])
+        self.assertEqual(mask.sum(), len(catalog) - 2)
+        self.assertTrue(self.engine.eligibility_mask('adult').all())
+
+    def test_masked_recommendations(self):
+        catalog = self.engine.catalog
+        kids = self.engine.eligibility_mask('kids')
+        for movie in self.engine.get_recommendations(int(catalog.ids[0]), 20, mask=kids):
+            self.assertTrue(kids[catalog.row_of(movie['id'])])
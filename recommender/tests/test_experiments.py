@@ -0,0 +1,89 @@
+from collections import Counter
+from unittest import mock
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from recommender import experiments
+from recommender.models import ExperimentCounter
+
+DIVERSITY = {
+    'diversity': {
+        'variants': {
+            'control': {'weight': 75},
+            'more_diverse': {'weight': 25, 'params': {'lambda_diversity': 0.3}},
+        },
+        'overrides': {7: 'more_diverse'},
+    },
+}
+
+
+@override_settings(RECOMMENDER_EXPERIMENTS=DIVERSITY)
+class AssignmentTests(SimpleTestCase):
+
+    def test_assignment_is_stable_and_follows_the_weights(self):
+        config = DIVERSITY['diversity']
+        first = [experiments.variant_for('diversity', config, profile_id) for profile_id in range(4000)]
+        again = [experiments.variant_for('diversity', config, profile_id) for profile_id in range(4000)]
+        self.assertEqual(first, again)
+        share = Counter(first)['more_diverse'] / len(first)
+        self.assertAlmostEqual(share, 0.25, delta=0.03)
+
+    def test_salt_reshuffles_and_overrides_pin(self):
+        config = DIVERSITY['diversity']
+        salted = dict(config, salt='2')
+        variants = [experiments.variant_for('diversity', config, profile_id) for profile_id in range(200)]
+        self.assertNotEqual(variants, [experiments.variant_for('diversity', salted, profile_id)
+                                       for profile_id in range(200)])
+        self.assertEqual(experiments.variant_for('diversity', salted, 7), 'more_diverse')
+        self.assertIsNone(experiments.variant_for('diversity', {'variants': {'a': {'weight': 0}}}, 1))
+
+    def test_cache_suffix(self):
+        self.assertEqual(experiments.cache_suffix({}), '')
+        control = experiments.cache_suffix({'diversity': 'control'})
+        diverse = experiments.cache_suffix({'diversity': 'more_diverse'})
+        self.assertNotEqual(control, diverse)
+        self.assertEqual(control, experiments.cache_suffix({'diversity': 'control'}))
+        self.assertEqual(experiments.for_you_cache_key(7), f'recs_7_for_you{diverse}')
+        # Changing a variant's parameters changes its key
+        changed = {'diversity': dict(DIVERSITY['diversity'], variants={
+            'control': {'weight': 75, 'params': {'alpha': 0.5}}, 'more_diverse': {'weight': 25}})}
+        with self.settings(RECOMMENDER_EXPERIMENTS=changed):
+            self.assertNotEqual(experiments.cache_suffix({'diversity': 'control'}), control)
+
+    def test_ranking_params(self):
+        self.assertEqual(experiments.ranking_params({'diversity': 'more_diverse'})['lambda_diversity'], 0.3)
+        self.assertEqual(experiments.ranking_params({}), experiments.RANKING_PARAMS)
+
+
+@override_settings(RECOMMENDER_EXPERIMENTS=DIVERSITY)
+class CounterTests(TestCase):
+
+    def setUp(self):
+        experiments._pending.clear()
+        patcher = mock.patch.object(experiments, '_start_flusher')
+        self.start_flusher = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(experiments._pending.clear)
+
+    def test_recording_stays_off_the_database(self):
+        with self.assertNumQueries(0):
+            experiments.record_request({'diversity': 'control'}, 0.02, cache_hit=True)
+            experiments.record_event(7, 'rating')
+        self.start_flusher.assert_called()
+
+    def test_flush_adds_to_the_totals(self):
+        for _ in range(2):
+            experiments.record_request({'diversity': 'control'}, 0.02, cache_hit=False)
+            experiments.flush()
+        stats = experiments.load_stats('diversity', ['control'])['control']
+        self.assertEqual((stats['requests'], stats['cache_misses'], stats['cache_hits']), (2, 2, 0))
+        self.assertEqual(stats['latency_us'], 40000)
+        self.assertEqual(experiments.latency_quantile(stats, 0.5), 0.025)
+
+    def test_failed_flush_keeps_the_counters(self):
+        experiments.record_request({'diversity': 'control'}, 0.02, cache_hit=True)
+        with mock.patch.object(ExperimentCounter.objects, 'filter', side_effect=DatabaseError('locked')):
+            with self.assertRaises(DatabaseError):
+                experiments.flush()
+        experiments.record_request({'diversity': 'control'}, 0.02, cache_hit=True)
+        experiments.flush()
+        self.assertEqual(experiments.load_stats('diversity', ['control'])['control']['cache_hits'], 2)
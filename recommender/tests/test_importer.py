@@ -0,0 +1,74 @@
+import io
+from django.contrib.auth.models import User
+from django.test import TestCase
+from recommender.importer import InteractionImporter, parse_row, read_rows
+from recommender.models import Movie, Profile, UserRating
+from recommender.tests.helpers import create_movie, small_catalog
+
+
+class ImporterTests(TestCase):
+
+    def test_parse_row(self):
+        self.assertEqual(parse_row({'user': ' ann ', 'tmdb_id': '7', 'rating': '4.5'}),
+                         ('ann', 'Default', 7, 4.5, None))
+        self.assertEqual(
+            parse_row({'user': 'ann', 'profile': 'Kids', 'tmdb_id': 7, 'watch_duration': '5400',
+                       'total_duration': '6000'}),
+            ('ann', 'Kids', 7, None, (5400, 6000, True)),
+        )
+        self.assertEqual(parse_row({'user': 'ann', 'tmdb_id': 7, 'watch_duration': 60, 'completed': 'yes'})[4],
+                         (60, None, True))
+
+    def test_invalid_rows(self):
+        for row in (
+            None,
+            [1, 2],
+            {'tmdb_id': 7, 'rating': 4},
+            {'user': 'ann', 'tmdb_id': 'seven', 'rating': 4},
+            {'user': 'ann', 'tmdb_id': 7, 'rating': 6},
+            {'user': 'ann', 'tmdb_id': 7, 'watch_duration': -1},
+            {'user': 'ann', 'tmdb_id': 7},
+        ):
+            with self.assertRaises((KeyError, TypeError, ValueError)):
+                parse_row(row)
+
+    def test_import_counts_malformed_lines_as_invalid(self):
+        catalog = small_catalog()
+        movie_id = int(catalog.ids[0])
+        lines = [
+            '{"user": "ann", "tmdb_id": %d, "rating": 4}' % movie_id,
+            '{"user": "ann", "tmdb_id": ',
+            '[1, 2]',
+            '{"user": "ann", "tmdb_id": %d, "rating": 9}' % movie_id,
+            '{"user": "bob", "tmdb_id": %d, "rating": 5}' % (int(catalog.ids.max()) + 1),
+        ]
+        importer = InteractionImporter(catalog)
+        counts = importer.import_chunk(list(read_rows(io.StringIO('\n'.join(lines) + '\n'), 'jsonl')))
+        self.assertEqual(counts, {'rows': 5, 'ratings': 1, 'watches': 0, 'skipped': 1, 'invalid': 3})
+        self.assertEqual(UserRating.objects.get().rating, 4)
+
+    def test_new_profiles_keep_the_existing_active_one(self):
+        catalog = small_catalog()
+        user = User.objects.create(username='ann')
+        active = Profile.objects.create(user=user, name='Main', is_active=True)
+        movie_id = int(catalog.ids[0])
+        InteractionImporter(catalog).import_chunk([
+            {'user': 'ann', 'profile': 'Kids', 'tmdb_id': movie_id, 'rating': 3},
+            {'user': 'new', 'profile': 'A', 'tmdb_id': movie_id, 'rating': 3},
+            {'user': 'new', 'profile': 'B', 'tmdb_id': movie_id, 'rating': 3},
+        ])
+        self.assertEqual(list(Profile.objects.filter(user=user, is_active=True)), [active])
+        self.assertEqual(Profile.objects.filter(user__username='new', is_active=True).count(), 1)
+
+    def test_existing_movie_rows_are_not_overwritten(self):
+        catalog = small_catalog()
+        existing = create_movie(catalog, 0)
+        Movie.objects.filter(pk=existing.pk).update(title='Edited title', vote_count=99)
+        InteractionImporter(catalog).import_chunk([
+            {'user': 'ann', 'tmdb_id': int(catalog.ids[0]), 'rating': 4},
+            {'user': 'ann', 'tmdb_id': int(catalog.ids[1]), 'rating': 5},
+        ])
+        existing.refresh_from_db()
+        self.assertEqual((existing.title, existing.vote_count), ('Edited title', 99))
+        self.assertEqual(Movie.objects.get(tmdb_id=catalog.ids[1]).title, catalog.title[1])
+        self.assertEqual(UserRating.objects.get(movie=existing).rating, 4)
@@ -0,0 +1,72 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from recommender import metrics, views
+from recommender.utils import recommender
+
+
+def failing_rail(request, movie_id=None):
+    raise RuntimeError('rail failed')
+
+
+class RailPartialTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pw12345!x')
+        cls.movie_id = int(recommender.catalog.ids[0])
+
+    def test_unknown_rails_are_404(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('dashboard_rail', args=['nope'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('movie_rail', args=[self.movie_id, 'nope'])).status_code, 404)
+
+    def test_dashboard_rails_need_a_login(self):
+        self.assertEqual(self.client.get(reverse('dashboard_rail', args=['my_list'])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('movie_rail', args=[self.movie_id, 'more_like_this'])).status_code,
+                         200)
+
+    def test_rail_html(self):
+        response = self.client.get(reverse('movie_rail', args=[self.movie_id, 'more_like_this']))
+        self.assertContains(response, 'Similar Movies')
+
+
+@override_settings(RECOMMENDER_STREAM_RAILS=True)
+class StreamedRailTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pw12345!x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_dashboard(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_rails_above_the_fold_follow_the_shell(self):
+        html = self.get_dashboard()
+        self.assertIn('<template data-rail="continue_watching">', html)
+        self.assertIn('fillRail("my_list")', html)
+        self.assertNotIn('<template data-rail="for_you">', html)
+        self.assertTrue(html.rstrip().endswith('</html>'))
+
+    def test_failed_rail_falls_back_to_lazy_loading(self):
+        rails = [('my_list', failing_rail, True), *views.DASHBOARD_RAILS[2:]]
+        with mock.patch.object(views, 'DASHBOARD_RAILS', rails), mock.patch('builtins.print'):
+            html = self.get_dashboard()
+        template = html[html.index('<template data-rail="my_list">'):]
+        self.assertIn(f'hx-get="{reverse("dashboard_rail", args=["my_list"])}"', template)
+        self.assertTrue(html.rstrip().endswith('</html>'))
+
+    @mock.patch.object(metrics, 'ENABLED', True)
+    def test_streamed_rails_are_measured(self):
+        metrics.reset()
+        response = self.client.get(reverse('dashboard'))
+        self.assertNotIn(('recommender_view_seconds', (('view', 'dashboard'),)), metrics._histograms)
+        b''.join(response.streaming_content)
+        self.assertIn(('recommender_call_seconds', (('name', 'rail_continue_watching'),)), metrics._histograms)
+        self.assertIn(('recommender_view_seconds', (('view', 'dashboard'),)), metrics._histograms)
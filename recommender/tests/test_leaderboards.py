@@ -0,0 +1,57 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from recommender import gamification
+from recommender.models import JobState, Leaderboard, Profile, UserRating
+from recommender.tests.helpers import create_movie, small_catalog
+
+
+class LeaderboardWatermarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = small_catalog()
+        cls.profile = Profile.objects.create(user=User.objects.create(username='player'), name='Default')
+        cls.movies = [create_movie(cls.catalog, row) for row in range(3)]
+
+    def score(self, period='all_time'):
+        return Leaderboard.objects.filter(profile=self.profile, period=period).values_list('score', flat=True).first()
+
+    def test_watermark_is_taken_before_scanning(self):
+        UserRating.objects.create(profile=self.profile, movie=self.movies[0], rating=4)
+        started = timezone.now()
+        gamification.refresh()
+        watermark = JobState.objects.get(name=gamification.JOB_NAME).watermark
+        self.assertGreaterEqual(watermark, started)
+        self.assertLessEqual(watermark, Leaderboard.objects.get(profile=self.profile, period='all_time').updated_at)
+        self.assertEqual(gamification.last_run(), watermark)
+
+    def test_activity_during_a_run_is_seen_by_the_next_one(self):
+        UserRating.objects.create(profile=self.profile, movie=self.movies[0], rating=4)
+        update_leaderboards = gamification.update_leaderboards
+
+        def rate_while_scoring(since, now):
+            results = update_leaderboards(since, now)
+            UserRating.objects.create(profile=self.profile, movie=self.movies[1], rating=5)
+            return results
+
+        with mock.patch.object(gamification, 'update_leaderboards', rate_while_scoring):
+            gamification.refresh()
+        self.assertEqual(self.score(), gamification.RATING_POINTS)
+        gamification.refresh()
+        self.assertEqual(self.score(), 2 * gamification.RATING_POINTS)
+
+    def test_deleted_activity_is_rescored(self):
+        ratings = [UserRating.objects.create(profile=self.profile, movie=movie, rating=4) for movie in self.movies]
+        gamification.refresh()
+        self.assertEqual(self.score(), 3 * gamification.RATING_POINTS)
+
+        ratings[0].delete()
+        gamification.refresh()
+        self.assertEqual(self.score(), 2 * gamification.RATING_POINTS)
+
+        for rating in ratings[1:]:
+            rating.delete()
+        gamification.refresh()
+        self.assertFalse(Leaderboard.objects.filter(profile=self.profile).exists())
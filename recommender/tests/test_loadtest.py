@@ -0,0 +1,81 @@
+import asyncio
+from django.test import SimpleTestCase
+from recommender.loadtest import (DEFAULT_MIX, Response, RouteStats, VirtualUser, _dechunk, http_request,
+                                  parse_mix)
+from recommender.metrics import BUCKETS
+
+
+class ParseMixTests(SimpleTestCase):
+
+    def test_weights(self):
+        self.assertEqual(parse_mix('home=30, search=10,'), {'home': 30.0, 'search': 10.0})
+        self.assertEqual(parse_mix('movie=0,rate=1.5'), {'movie': 0.0, 'rate': 1.5})
+
+    def test_invalid_mixes(self):
+        for text in ('home=30,shopping=5', 'home=0,search=0', '', 'home=-1,search=5', 'home=lots'):
+            with self.assertRaises(ValueError):
+                parse_mix(text)
+
+
+class RouteStatsTests(SimpleTestCase):
+
+    def test_summary(self):
+        stats = RouteStats()
+        stats.latencies.extend([0.001 * n for n in range(1, 101)])
+        stats.statuses.update({200: 97, 500: 3})
+        stats.errors['status_500'] += 3
+        summary = stats.summary()
+        self.assertEqual((summary['requests'], summary['errors'], summary['error_rate']), (100, 3, 0.03))
+        self.assertEqual(summary['statuses'], {'200': 97, '500': 3})
+        self.assertEqual((summary['p50_ms'], summary['max_ms']), (50.5, 100.0))
+        self.assertEqual(list(summary['histogram']), [str(bound) for bound in BUCKETS] + ['+Inf'])
+        self.assertEqual(sum(summary['histogram'].values()), 100)
+
+    def test_empty_route_keeps_every_bucket(self):
+        summary = RouteStats().summary()
+        self.assertEqual((summary['requests'], summary['error_rate']), (0, 0.0))
+        self.assertEqual(list(summary['histogram']), [str(bound) for bound in BUCKETS] + ['+Inf'])
+        self.assertEqual(sum(summary['histogram'].values()), 0)
+
+
+class ClientTests(SimpleTestCase):
+
+    def test_dechunk(self):
+        self.assertEqual(_dechunk(b'5\r\nhello\r\n6;ext=1\r\n world\r\n0\r\n\r\n'), b'hello world')
+
+    def test_http_request(self):
+        received = []
+
+        async def handle(reader, writer):
+            received.append(await reader.readuntil(b'\r\n\r\n'))
+            writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\nSet-Cookie: a=1\r\n'
+                         b'Set-Cookie: b=2\r\n\r\n3\r\nabc\r\n0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def exchange():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await http_request('127.0.0.1', port, 'GET', '/x/', headers={'Cookie': 'a=0'})
+
+        response = asyncio.run(exchange())
+        self.assertEqual((response.status, response.body), (200, b'abc'))
+        self.assertEqual(response.headers['set-cookie'], ['a=1', 'b=2'])
+        self.assertTrue(received[0].startswith(b'GET /x/ HTTP/1.1\r\n'))
+        self.assertIn(b'Cookie: a=0\r\n', received[0])
+
+    def test_virtual_user_cookies_and_etags(self):
+        user = VirtualUser('viewer')
+        user.absorb('/', Response(200, {'set-cookie': ['csrftoken=t; Path=/', 'sessionid=s; Path=/'],
+                                        'etag': ['"v1"']}, b''))
+        headers = user.headers('/')
+        self.assertEqual((headers['X-CSRFToken'], headers['If-None-Match']), ('t', '"v1"'))
+        self.assertIn('sessionid=s', headers['Cookie'])
+        user.absorb('/logout/', Response(302, {'set-cookie': ['sessionid=""; Max-Age=0; Path=/']}, b''))
+        self.assertNotIn('sessionid', user.headers()['Cookie'])
+        self.assertNotIn('If-None-Match', user.headers('/other/'))
+
+    def test_default_mix_is_valid(self):
+        self.assertEqual(parse_mix(','.join(f'{action}={weight}' for action, weight in DEFAULT_MIX.items())),
+                         {action: float(weight) for action, weight in DEFAULT_MIX.items()})
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from recommender.catalog import MovieCatalog
+from recommender.models import Movie
+from recommender.people import PeopleIndex
+from recommender.synthetic import make_catalog
+from recommender.tests.helpers import create_movie
+from recommender.utils import merge_movie_metadata
+
+
+class MovieMetadataTests(TestCase):
+
+    def test_credits_come_from_movie_rows(self):
+        movies_df = make_catalog(20, vocab_size=50, density=0.1, seed=1)[0].drop(columns=['cast', 'director'])
+        catalog = MovieCatalog.from_dataframe(movies_df)
+        Movie.objects.filter(pk=create_movie(catalog, 3).pk).update(cast=['Ann Lee', 'Bo Kim'], director='Cy Doe')
+        create_movie(catalog, 4)
+
+        catalog = MovieCatalog.from_dataframe(merge_movie_metadata(movies_df))
+        people = PeopleIndex.from_catalog(catalog)
+        self.assertEqual(len(people), 3)
+        self.assertEqual(len(people.people_of(3)), 3)
+        self.assertEqual(len(people.people_of(4)), 0)
+
+    def test_feature_columns_come_from_movie_rows(self):
+        movies_df = make_catalog(20, vocab_size=50, density=0.1, seed=1)[0].drop(
+            columns=['runtime', 'original_language', 'maturity_rating'])
+        catalog = MovieCatalog.from_dataframe(movies_df)
+        Movie.objects.filter(pk=create_movie(catalog, 3).pk).update(runtime=95, language='fr', maturity_rating='PG')
+
+        catalog = MovieCatalog.from_dataframe(merge_movie_metadata(movies_df))
+        self.assertEqual(catalog.runtime[[3, 4]].tolist(), [95, 0])
+        self.assertEqual(catalog.language_names, ['fr'])
+        self.assertEqual(catalog.language_codes[[3, 4]].tolist(), [0, -1])
+        self.assertTrue(catalog.audience_mask('kids')[3])
+
+    def test_columns_stay_absent_without_values(self):
+        movies_df = make_catalog(20, vocab_size=50, density=0.1, seed=1)[0].drop(columns=['cast', 'director'])
+        self.assertNotIn('cast', merge_movie_metadata(movies_df).columns)
@@ -0,0 +1,80 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from recommender import metrics
+from recommender.synthetic import make_recommender
+
+
+@mock.patch.object(metrics, 'ENABLED', True)
+class MetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_histogram_output(self):
+        for seconds in (0.0005, 0.003, 0.004, 20):
+            metrics.observe('recommender_call_seconds', seconds, name='explain')
+        lines = metrics.render_prometheus().splitlines()
+        self.assertIn('# TYPE recommender_call_seconds histogram', lines)
+        self.assertIn('recommender_call_seconds_bucket{name="explain",le="0.001"} 1', lines)
+        self.assertIn('recommender_call_seconds_bucket{name="explain",le="0.0025"} 1', lines)
+        self.assertIn('recommender_call_seconds_bucket{name="explain",le="0.005"} 3', lines)
+        self.assertIn('recommender_call_seconds_bucket{name="explain",le="10"} 3', lines)
+        self.assertIn('recommender_call_seconds_bucket{name="explain",le="+Inf"} 4', lines)
+        self.assertIn('recommender_call_seconds_count{name="explain"} 4', lines)
+        self.assertIn('recommender_call_seconds_sum{name="explain"} 20.0075', lines)
+
+    def test_counters_gauges_and_label_escaping(self):
+        metrics.record_cache('for_you', True)
+        metrics.record_cache('for_you', True)
+        metrics.set_gauge('recommender_artifact_load_seconds', 1.5)
+        metrics.increment('recommender_db_queries_total', 3, view='say "hi"\n')
+        output = metrics.render_prometheus()
+        self.assertIn('recommender_cache_total{cache="for_you",result="hit"} 2\n', output)
+        self.assertIn('# TYPE recommender_artifact_load_seconds gauge\nrecommender_artifact_load_seconds 1.5\n', output)
+        self.assertIn('recommender_db_queries_total{view="say \\"hi\\"\\n"} 3\n', output)
+
+    def test_timings_are_collected_per_request(self):
+        timed = metrics.timed('explain')(lambda: None)
+        timed()
+        token = metrics.start_request()
+        timed()
+        with metrics.timer('render_rail'):
+            pass
+        timed()
+        timings = metrics.end_request(token)
+        self.assertEqual({name: calls for name, (seconds, calls) in timings.items()},
+                         {'explain': 2, 'render_rail': 1})
+        self.assertIn('recommender_call_seconds_count{name="explain"} 3', metrics.render_prometheus())
+
+    def test_index_build_label(self):
+        make_recommender(50, vocab_size=100, density=0.05, seed=1)
+        output = metrics.render_prometheus()
+        self.assertIn('recommender_call_seconds_count{name="build_indexes"} 1', output)
+        self.assertNotIn('load_local_artifacts', output)
+
+    def test_disabled_metrics_leave_functions_unwrapped(self):
+        def explain():
+            pass
+        with mock.patch.object(metrics, 'ENABLED', False):
+            self.assertIs(metrics.timed('explain')(explain), explain)
+            metrics.observe('recommender_call_seconds', 1, name='explain')
+        self.assertEqual(metrics.render_prometheus(), '\n')
+
+
+class MetricsViewTests(TestCase):
+
+    def test_metrics_view_is_staff_only(self):
+        with override_settings(INTERNAL_IPS=[]):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            self.client.force_login(User.objects.create(username='admin', is_staff=True))
+            response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('movie_rail', args=[0, 'nope']))
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertIn('queries"', response['Server-Timing'])
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.preprocessing import normalize
+from recommender.similarity import NeighborIndex, build_neighbors, save_neighbors, top_k
+from recommender.synthetic import make_catalog
+
+
+class TopKTests(SimpleTestCase):
+
+    def test_matches_a_stable_descending_sort(self):
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 5, 200).astype(np.float32)
+        for k in (0, 1, 7, 50, 200, 500):
+            self.assertEqual(top_k(scores, k).tolist(), np.argsort(-scores, kind='stable')[:k].tolist())
+
+
+class BuildNeighborsTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        movies_df, cls.count_matrix, _ = make_catalog(300, vocab_size=100, density=0.05, seed=2)
+        cls.ids = movies_df['id'].to_numpy()
+
+    def brute_force(self, k, threshold):
+        normalized = normalize(self.count_matrix.astype(np.float32), norm='l2')
+        scores = (normalized @ normalized.T).toarray()
+        np.fill_diagonal(scores, -np.inf)
+        neighbors = []
+        for row_scores in scores:
+            top = top_k(row_scores, k)
+            neighbors.append(top[row_scores[top] >= threshold])
+        return neighbors, scores
+
+    def assert_matches_brute_force(self, indptr, indices, scores, k, threshold):
+        expected, dense = self.brute_force(k, threshold)
+        self.assertEqual(len(indptr), len(expected) + 1)
+        for row, rows in enumerate(expected):
+            start, end = indptr[row], indptr[row + 1]
+            # float32 products may reorder near-ties, so compare the scores
+            np.testing.assert_allclose(scores[start:end], dense[row, rows], rtol=1e-5, atol=1e-6)
+            self.assertNotIn(row, indices[start:end])
+
+    def test_blocked_build_matches_brute_force(self):
+        for block_size in (1, 64, 1000):
+            result = build_neighbors(self.count_matrix, k=10, threshold=0.0, block_size=block_size, workers=1)
+            self.assert_matches_brute_force(*result, k=10, threshold=0.0)
+
+    def test_threshold_cuts_rows_short(self):
+        result = build_neighbors(self.count_matrix, k=20, threshold=0.2, block_size=64, workers=1)
+        self.assertLess(result[0][-1], 20 * len(self.ids))
+        self.assert_matches_brute_force(*result, k=20, threshold=0.2)
+
+    def test_worker_processes_agree(self):
+        single = build_neighbors(self.count_matrix, k=5, block_size=50, workers=1)
+        pooled = build_neighbors(self.count_matrix, k=5, block_size=50, workers=2)
+        for a, b in zip(single, pooled):
+            np.testing.assert_array_equal(a, b)
+
+    def test_saved_index(self):
+        indptr, indices, scores = build_neighbors(self.count_matrix, k=10, threshold=0.0, workers=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'neighbors.tmp')
+            save_neighbors(path, indptr, indices, scores, self.ids, 10, 0.0)
+            self.assertEqual(os.listdir(directory), ['neighbors.tmp'])
+            self.assertIsNone(NeighborIndex.load(path, self.ids[::-1]))
+            index = NeighborIndex.load(path, self.ids)
+        rows, row_scores = index.neighbors(0, 5)
+        np.testing.assert_array_equal(rows, indices[:5])
+        self.assertIsNone(index.neighbors(0, 11))
+        mask = np.ones(len(self.ids), dtype=bool)
+        mask[indices[:6]] = False
+        self.assertIsNone(index.neighbors(0, 5, mask))
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from recommender import profiling
+from recommender.middleware import SlowRequestProfilerMiddleware
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfilingTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_dir = directory.name
+
+    def test_collapse(self):
+        def inner():
+            return profiling.collapse(sys._getframe())
+        stack = inner().split(';')
+        self.assertEqual(stack[-1], f'{__name__}:ProfilingTests.test_collapse.<locals>.inner')
+        self.assertEqual(stack[-2], f'{__name__}:ProfilingTests.test_collapse')
+
+    def test_sampler_records_the_registered_thread(self):
+        sampler = profiling.StackSampler(0.002)
+        active = sampler.register()
+        self.assertIs(sampler.current(), active)
+        spin(0.1)
+        sampler.unregister(active)
+        self.assertIsNone(sampler.current())
+        self.assertGreater(sum(active.stacks.values()), 0)
+        self.assertTrue(any(stack.endswith(f'{__name__}:spin') for stack in active.stacks))
+
+    def test_write_profile(self):
+        active = profiling.ActiveRequest(0)
+        active.stacks['a;b'] = 3
+        active.tags.update(profile=7, candidates=120)
+        path = profiling.write_profile(self.output_dir, 'dashboard', '/dashboard/', 1.5, active)
+        self.assertTrue(path.endswith('-1500ms-profile7-candidates120.folded'))
+        with open(path) as f:
+            self.assertEqual(f.read(), 'a;b 3\n')
+        with open(os.path.join(self.output_dir, 'dashboard.folded')) as f:
+            self.assertEqual(f.read(), 'a;b 3\n')
+        with open(os.path.join(self.output_dir, 'slow_requests.jsonl')) as f:
+            entry = json.loads(f.readline())
+        self.assertEqual((entry['view'], entry['samples'], entry['tags']), ('dashboard', 3, {'profile': 7, 'candidates': 120}))
+
+    def middleware(self, get_response, threshold_ms):
+        config = {'ENABLED': True, 'THRESHOLD_MS': threshold_ms, 'INTERVAL_MS': 2, 'OUTPUT_DIR': self.output_dir}
+        with self.settings(RECOMMENDER_PROFILER=config), \
+                mock.patch.object(profiling, '_sampler', profiling.StackSampler(0.002)):
+            return SlowRequestProfilerMiddleware(get_response)
+
+    def index(self):
+        path = os.path.join(self.output_dir, 'slow_requests.jsonl')
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_only_slow_requests_are_written(self):
+        def view(request):
+            spin(0.06)
+            return HttpResponse('ok')
+        request = RequestFactory().get('/slow/')
+        self.middleware(view, 1000)(request)
+        self.assertEqual(self.index(), [])
+        self.middleware(view, 30)(request)
+        self.assertEqual([entry['path'] for entry in self.index()], ['/slow/'])
+
+    def test_streamed_content_is_profiled(self):
+        def chunks():
+            yield 'shell'
+            spin(0.06)
+            yield 'rails'
+        middleware = self.middleware(lambda request: StreamingHttpResponse(chunks()), 30)
+        response = middleware(RequestFactory().get('/streamed/'))
+        self.assertEqual(self.index(), [])
+        self.assertEqual(b''.join(response.streaming_content), b'shellrails')
+        self.assertEqual(len(self.index()), 1)
+        self.assertGreater(self.index()[0]['duration_ms'], 50)
@@ -0,0 +1,43 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from recommender.models import Feedback, Profile, UserRating
+from recommender.queries import load_excluded_ids, load_interaction_summary
+from recommender.tests.helpers import create_movie, small_catalog
+
+
+class InteractionSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        catalog = small_catalog()
+        cls.profile = Profile.objects.create(user=User.objects.create(username='viewer'), name='Default')
+        other = Profile.objects.create(user=User.objects.create(username='other'), name='Default')
+        cls.movies = [create_movie(catalog, row) for row in range(6)]
+        now = timezone.now()
+        for movie, rating, minutes in zip(cls.movies, [5, 2, 4, 3], [30, 20, 10, 40]):
+            row = UserRating.objects.create(profile=cls.profile, movie=movie, rating=rating)
+            UserRating.objects.filter(pk=row.pk).update(created_at=now - timedelta(minutes=minutes))
+        Feedback.objects.create(profile=cls.profile, movie=cls.movies[4], feedback_type='not_interested')
+        # Likes don't exclude a movie, and other profiles' rows don't count
+        Feedback.objects.create(profile=cls.profile, movie=cls.movies[5], feedback_type='like')
+        UserRating.objects.create(profile=other, movie=cls.movies[5], rating=5)
+        Feedback.objects.create(profile=other, movie=cls.movies[0], feedback_type='seen_it')
+
+    def ids(self, *indexes):
+        return [self.movies[i].tmdb_id for i in indexes]
+
+    def test_summary_in_one_query(self):
+        with self.assertNumQueries(1):
+            summary = load_interaction_summary(self.profile)
+        self.assertEqual(summary.profile_id, self.profile.pk)
+        self.assertEqual(summary.rated_ids, self.ids(2, 1, 0, 3))
+        self.assertEqual(summary.liked_ids, self.ids(2, 0))
+        self.assertEqual(summary.ratings, dict(zip(self.ids(0, 1, 2, 3), [5, 2, 4, 3])))
+        self.assertEqual(summary.excluded_ids, set(self.ids(4)))
+
+    def test_like_threshold_and_profile_ids(self):
+        summary = load_interaction_summary(self.profile.pk, like_threshold=3)
+        self.assertEqual(summary.liked_ids, self.ids(2, 0, 3))
+        self.assertEqual(load_excluded_ids(self.profile.pk), set(self.ids(4)))
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from recommender.models import Profile, WatchEvent
+from recommender.queries import continue_watching_page, decode_cursor, encode_cursor
+from recommender.tests.helpers import create_movie, small_catalog
+
+
+class KeysetCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = small_catalog()
+        cls.profile = Profile.objects.create(user=User.objects.create(username='viewer'), name='Default')
+        now = timezone.now()
+        # Two watches share a timestamp, so pages have to break ties by pk
+        for row, minutes in enumerate([1, 2, 2, 3, 5, 8, 13]):
+            watch = WatchEvent.objects.create(profile=cls.profile, movie=create_movie(cls.catalog, row),
+                                              watch_duration=60, total_duration=600)
+            WatchEvent.objects.filter(pk=watch.pk).update(last_watched=now - timedelta(minutes=minutes))
+
+    def test_cursor_round_trip(self):
+        timestamp = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(timestamp, 42)), (timestamp, 42))
+
+    def test_malformed_cursor(self):
+        for cursor in ('', 'not-base64!', encode_cursor(timezone.now(), 1)[:-4]):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(WatchEvent.objects.order_by('-last_watched', '-pk').values_list('pk', flat=True))
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = continue_watching_page(self.profile, cursor, limit=2)
+            self.assertLessEqual(len(rows), 2)
+            seen.extend(row[0] for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_activity_bumps_the_rail_generation(self):
+        before = Profile.objects.get(pk=self.profile.pk).rail_generation
+        WatchEvent.objects.filter(profile=self.profile).first().delete()
+        self.assertEqual(Profile.objects.get(pk=self.profile.pk).rail_generation, before + 1)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from recommender import shared_artifacts
+from recommender.shared_artifacts import SharedArtifacts
+from recommender.synthetic import make_recommender
+from recommender.utils import MovieRecommender
+
+
+class SharedArtifactsTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.manifest_path = os.path.join(directory.name, 'manifest.json')
+
+    def publish(self, arrays, meta):
+        manifest = shared_artifacts.publish(arrays, meta, self.manifest_path, prefix='test')
+        self.addCleanup(shared_artifacts.unlink, manifest['segment'])
+        return manifest
+
+    def test_publish_attach_round_trip(self):
+        arrays = {'a/x': np.arange(5, dtype=np.int32), 'a/y': np.ones((2, 3), dtype=np.float32),
+                  'b': np.array([1.5])}
+        manifest = self.publish(arrays, {'version': 'v1'})
+        for spec in manifest['arrays'].values():
+            self.assertEqual(spec['offset'] % shared_artifacts.ALIGNMENT, 0)
+
+        shared = SharedArtifacts.attach(self.manifest_path)
+        self.assertEqual(shared.meta, {'version': 'v1'})
+        self.assertEqual(set(shared.group('a')), {'x', 'y'})
+        np.testing.assert_array_equal(shared['a/y'], arrays['a/y'])
+        self.assertFalse(shared['b'].flags.writeable)
+        self.assertNotIn('c', shared)
+
+    def test_republishing_replaces_the_segment(self):
+        first = self.publish({'x': np.zeros(3)}, {'version': 'v1'})
+        second = self.publish({'x': np.ones(3)}, {'version': 'v2'})
+        self.assertNotEqual(first['segment'], second['segment'])
+        self.assertFalse(shared_artifacts.unlink(first['segment']))
+        # Views are only valid while the SharedArtifacts that mapped them is alive
+        shared = SharedArtifacts.attach(self.manifest_path)
+        np.testing.assert_array_equal(shared['x'], np.ones(3))
+
+    def test_recommender_attaches_every_structure(self):
+        engine = make_recommender(200, vocab_size=200, density=0.02, seed=1)
+        self.publish(*engine.export_shared())
+        attached = MovieRecommender(load=False)
+        attached._load_vectorizer = lambda models_dir: attached._set_vectorizer(engine.vectorizer)
+        attached.attach_shared(self.manifest_path, None)
+
+        self.assertEqual(attached.features.columns, engine.features.columns)
+        self.assertEqual((attached.features.matrix != engine.features.matrix).nnz, 0)
+        self.assertEqual((attached.people.postings != engine.people.postings).nnz, 0)
+        self.assertFalse(attached.people.movie_people.data.flags.writeable)
+        movie_id = int(engine.catalog.ids[3])
+        for method in ('get_recommendations', 'get_shared_cast'):
+            self.assertEqual([movie['id'] for movie in getattr(attached, method)(movie_id, 5)],
+                             [movie['id'] for movie in getattr(engine, method)(movie_id, 5)])
@@ -0,0 +1,43 @@
+import numpy as np
+from django.test import SimpleTestCase
+from recommender import shelves
+from recommender.tests.helpers import small_catalog
+
+
+class ShelvesTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.catalog = small_catalog()
+
+    def items(self, rows):
+        return [{'movie': self.catalog.record(row), 'score': 1.0 / (i + 1), 'confidence': 0.5,
+                 'badges': ['Trending', f'Badge {i % 2}']} for i, row in enumerate(rows)]
+
+    def test_pack_hydrate_round_trip(self):
+        items = self.items([4, 8, 15, 16])
+        hydrated = shelves.hydrate(self.catalog, shelves.pack(items))
+        self.assertEqual([item['movie'].id for item in hydrated], [item['movie'].id for item in items])
+        self.assertEqual([item['badges'] for item in hydrated], [item['badges'] for item in items])
+        self.assertAlmostEqual(hydrated[1]['score'], 0.5, places=6)
+        self.assertAlmostEqual(hydrated[0]['confidence'], 0.5, places=3)
+
+    def test_hydrate_applies_mask_and_limit(self):
+        payload = shelves.pack(self.items([4, 8, 15, 16]))
+        mask = np.ones(len(self.catalog), dtype=bool)
+        mask[8] = False
+        hydrated = shelves.hydrate(self.catalog, payload, mask=mask, limit=2)
+        self.assertEqual([item['movie'].id for item in hydrated], self.catalog.ids[[4, 15]].tolist())
+
+    def test_hydrate_skips_movies_no_longer_in_the_catalog(self):
+        items = self.items([4, 8])
+        items[0]['movie'] = {'id': int(self.catalog.ids.max()) + 1}
+        hydrated = shelves.hydrate(self.catalog, shelves.pack(items))
+        self.assertEqual([item['movie'].id for item in hydrated], [int(self.catalog.ids[8])])
+
+    def test_too_many_badges(self):
+        items = [{'movie': {'id': 1}, 'badges': [f'Badge {i}']} for i in range(shelves.NO_BADGE + 1)]
+        with self.assertRaises(ValueError):
+            shelves.pack(items)
+        self.assertEqual(len(shelves.pack(items[:shelves.NO_BADGE])['badges']), shelves.NO_BADGE)
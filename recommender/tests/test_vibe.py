@@ -0,0 +1,82 @@
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from django.urls import reverse
+from sklearn.preprocessing import normalize
+from recommender import views
+from recommender.similarity import top_k
+from recommender.synthetic import make_recommender, vocabulary_word
+from recommender.vibe import QueryEncoder
+
+
+class QueryEncoderTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = make_recommender(200, vocab_size=200, density=0.02, seed=1)
+        cls.vectorizer = cls.engine.vectorizer
+
+    def test_matches_the_vectorizer(self):
+        encoder = QueryEncoder(self.vectorizer)
+        query = 'w3 w17 W3 unknown w150'
+        expected = normalize(self.vectorizer.transform([query]).astype(np.float32))
+        np.testing.assert_allclose(encoder.encode(query).toarray(), expected.toarray(), rtol=1e-6)
+
+    def test_unknown_terms(self):
+        encoder = QueryEncoder(self.vectorizer)
+        self.assertIsNone(encoder.encode('nothing here'))
+        self.assertIsNone(encoder.encode(''))
+
+    def test_equivalent_queries_share_a_cache_entry(self):
+        encoder = QueryEncoder(self.vectorizer)
+        encoder.encode('w1 w2')
+        encoder.encode('  W1   w2 ')
+        self.assertEqual(encoder.terms.cache_info().hits, 1)
+
+
+class VibeSearchTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = make_recommender(200, vocab_size=200, density=0.02, seed=1)
+
+    def ids(self, movies):
+        return [movie['id'] for movie in movies]
+
+    def brute_force(self, query, k, mask=None):
+        query_vector = normalize(self.engine.vectorizer.transform([query]).astype(np.float64))
+        matrix = normalize(self.engine.count_matrix.astype(np.float64))
+        scores = (matrix @ query_vector.T).toarray().ravel()
+        if mask is not None:
+            scores[~mask] = -np.inf
+        top = top_k(scores, k)
+        return self.engine.catalog.ids[top[scores[top] > 0]].tolist()
+
+    def test_ranking_matches_brute_force_cosine(self):
+        for query in ('w5 w9', 'w12 w12 w40 w77', 'w199'):
+            self.assertEqual(self.ids(self.engine.vibe_search(query, 10)), self.brute_force(query, 10))
+
+    def test_a_movies_own_terms_find_it_first(self):
+        row = 7
+        start, end = self.engine.count_matrix.indptr[row:row + 2]
+        terms = self.engine.count_matrix.indices[start:end]
+        counts = self.engine.count_matrix.data[start:end].astype(int)
+        query = ' '.join(' '.join([vocabulary_word(j)] * n) for j, n in zip(terms, counts))
+        self.assertEqual(self.ids(self.engine.vibe_search(query, 5))[0], int(self.engine.catalog.ids[row]))
+
+    def test_only_matching_and_eligible_movies(self):
+        results = self.engine.vibe_search('w199', 200)
+        self.assertLess(len(results), 200)
+        mask = self.engine.eligibility_mask('kids')
+        masked = self.ids(self.engine.vibe_search('w5 w9', 10, mask=mask))
+        self.assertTrue(mask[self.engine.catalog.rows_of(masked)].all())
+        self.assertEqual(masked, self.brute_force('w5 w9', 10, mask))
+        self.assertEqual(self.engine.vibe_search('nothing here', 10), [])
+
+    def test_search_view(self):
+        with mock.patch.object(views, 'recommender', self.engine):
+            response = self.client.get(reverse('search'), {'q': 'w5 w9', 'mode': 'vibe'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response.context['movies']), self.brute_force('w5 w9', 20))
@@ -9,6 +9,15 @@ urlpatterns = [
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
     path('rate/<int:movie_id>/', views.rate_movie, name='rate_movie'),
+    path('watch/<int:movie_id>/', views.record_watch, name='record_watch'),
+    path('list/<int:movie_id>/', views.update_list, name='update_list'),
+    path('rails/continue-watching/', views.continue_watching_rail, name='continue_watching_rail'),
+    path('rails/my-list/', views.my_list_rail, name='my_list_rail'),
+    path('partials/rails/<str:rail>/', views.rail_partial, name='dashboard_rail'),
+    path('partials/movie/<int:movie_id>/rails/<str:rail>/', views.rail_partial, name='movie_rail'),
+    path('onboarding/', views.onboarding, name='onboarding'),
     path('search/', views.search, name='search'),
     path('preferences/', views.update_preferences, name='update_preferences'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('api/recommendations/', views.api_recommendations, name='api_recommendations'),
 ]
@@ -1,34 +1,135 @@
 import pickle
 import numpy as np
 from scipy.sparse import csr_matrix
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 from django.conf import settings
 from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 import os
 import random
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
 from collections import defaultdict
-from .models import Profile, PreferenceWeights, Feedback, CachedRecommendations, WatchEvent, SavedList
+from .catalog import MovieCatalog
+from .features import FeatureMatrix
+from .collaborative import ImplicitALS, FACTORS_FILENAME, rating_weights
+from .similarity import NeighborIndex, NEIGHBORS_FILENAME, top_k
+from .shared_artifacts import SharedArtifacts
+from .vibe import QueryEncoder
+from .people import PeopleIndex
+from .clusters import CatalogClusters, CLUSTERS_FILENAME, onboarding_weights
+from .models import Movie, Profile, PreferenceWeights, Feedback, CachedRecommendations, WatchEvent, SavedList, UserPreference
+from .queries import load_interaction_summary
+from . import experiments, metrics, profiling
+
+# Catalog columns -> Movie fields used when processed_movies.pkl lacks the column
+MOVIE_METADATA_COLUMNS = {
+    'cast': 'cast',
+    'director': 'director',
+    'runtime': 'runtime',
+    'original_language': 'language',
+    'maturity_rating': 'maturity_rating',
+}
+
+
+def merge_movie_metadata(movies_df):
+    """
+    Fill catalog columns missing from the processed movies with Movie row values.
+
+    The processed movies carry no credits, runtime, language or maturity
+    rating, so the people index (Shared Cast rail, preferred-actor boost), the
+    runtime/language/sensitivity preference features and the kids audience
+    mask are built from the matching ``Movie`` fields of rows that have them.
+    Columns stay absent when no Movie row has a value, or the table cannot be
+    read (e.g. before migrate).
+
+    Args:
+        movies_df: Processed movies DataFrame (modified in place)
+
+    Returns:
+        The DataFrame
+    """
+    missing = {column: field for column, field in MOVIE_METADATA_COLUMNS.items() if column not in movies_df.columns}
+    if not missing:
+        return movies_df
+    has_value = Q()
+    for field in missing.values():
+        has_value |= Q(**{f'{field}__isnull': False})
+    try:
+        rows = list(Movie.objects.filter(has_value).values_list('tmdb_id', *missing.values()))
+    except DatabaseError as e:
+        print(f"Error reading movie metadata: {e}")
+        return movies_df
+    for i, column in enumerate(missing, start=1):
+        values = {row[0]: row[i] for row in rows if row[i] not in (None, '', [])}
+        if values:
+            movies_df[column] = movies_df['id'].map(values)
+    return movies_df
+
 
 class MovieRecommender:
-    def __init__(self):
-        self.movies_df = None
+    def __init__(self, load=True):
+        self.catalog = None
         self.vectorizer = None
         self.count_matrix = None
-        self._load_models()
+        self.normalized_matrix = None
+        self.features = None
+        self.artifact_version = None
+        self.artifacts_modified = None
+        self.cf = None
+        self.neighbors = None
+        self._shared = None
+        self.query_encoder = None
+        self.people = None
+        self.clusters = None
+        if load:
+            self._load_models()
+
+    # Seed rows scored per sparse product; bounds the dense score block to
+    # SIMILARITY_BLOCK x catalog size float32s
+    SIMILARITY_BLOCK = 64
+
+    @classmethod
+    def from_artifacts(cls, catalog, count_matrix, vectorizer=None, version='in-memory'):
+        """Build a recommender from in-memory artifacts (synthetic catalogs, benchmarks)."""
+        engine = cls(load=False)
+        engine.catalog = catalog
+        engine.count_matrix = count_matrix
+        engine._set_vectorizer(vectorizer)
+        engine.artifact_version = version
+        engine.artifacts_modified = timezone.now()
+        engine._build_indexes()
+        return engine
 
     def _load_models(self):
-        """Load the ML models from the models directory."""
-        models_dir = os.path.join(settings.BASE_DIR, 'models')
-
-        # Load processed movies
+        """Load the ML models, from shared memory or the models directory (RECOMMENDER_ARTIFACT_LOADER)."""
+        started = time.perf_counter()
+        models_dir = settings.RECOMMENDER_MODELS_DIR
+        if getattr(settings, 'RECOMMENDER_ARTIFACT_LOADER', 'local') == 'shared':
+            try:
+                self.attach_shared(settings.RECOMMENDER_SHARED_MANIFEST, models_dir)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error attaching shared artifacts, loading locally: {e}")
+            else:
+                metrics.set_gauge('recommender_artifact_load_seconds', time.perf_counter() - started)
+                return
+        self.load_local(models_dir)
+        metrics.set_gauge('recommender_artifact_load_seconds', time.perf_counter() - started)
+
+    @metrics.timed('load_local_artifacts')
+    def load_local(self, models_dir):
+        """Load every artifact into this process's memory."""
+        # Load processed movies into the columnar catalog; the DataFrame itself
+        # (with its Python object columns) is not kept around
         with open(os.path.join(models_dir, 'processed_movies.pkl'), 'rb') as f:
-            self.movies_df = pickle.load(f)
+            self.catalog = MovieCatalog.from_dataframe(merge_movie_metadata(pickle.load(f)))
 
         # Load vectorizer
-        with open(os.path.join(models_dir, 'count_vectorizer.pkl'), 'rb') as f:
-            self.vectorizer = pickle.load(f)
+        self._load_vectorizer(models_dir)
 
         # Load count matrix
         matrix_data = np.load(os.path.join(models_dir, 'count_matrix.npz'))
@@ -37,18 +138,246 @@ class MovieRecommender:
             shape=matrix_data['shape']
         )
 
+        self._stamp_artifacts(models_dir, ['processed_movies.pkl', 'count_vectorizer.pkl', 'count_matrix.npz'])
+        self._build_indexes()
+        self.load_cf(os.path.join(models_dir, FACTORS_FILENAME))
+        self.load_neighbors(os.path.join(models_dir, NEIGHBORS_FILENAME))
+        self.load_clusters(os.path.join(models_dir, CLUSTERS_FILENAME))
+
+    def _load_vectorizer(self, models_dir):
+        with open(os.path.join(models_dir, 'count_vectorizer.pkl'), 'rb') as f:
+            self._set_vectorizer(pickle.load(f))
+
+    def _set_vectorizer(self, vectorizer):
+        self.vectorizer = vectorizer
+        self.query_encoder = QueryEncoder(vectorizer) if vectorizer is not None else None
+
+    def export_shared(self):
+        """
+        Arrays and metadata for ``shared_artifacts.publish``.
+
+        Returns:
+            Tuple of (dict of name -> array, JSON-serializable metadata)
+        """
+        arrays = {f'catalog/{key}': value for key, value in self.catalog.export_arrays().items()}
+        for prefix, matrix in (('count_matrix', self.count_matrix), ('normalized', self.normalized_matrix),
+                               ('normalized_t', self._normalized_t), ('features', self.features.matrix),
+                               ('people', self.people.movie_people), ('people_postings', self.people.postings)):
+            for part in ('data', 'indices', 'indptr'):
+                arrays[f'{prefix}/{part}'] = getattr(matrix, part)
+        meta = {
+            'version': self.artifact_version,
+            'artifacts_modified': self.artifacts_modified.isoformat(),
+            'genre_names': self.catalog.genre_names,
+            'language_names': self.catalog.language_names,
+            'count_shape': list(self.count_matrix.shape),
+            'feature_shape': list(self.features.matrix.shape),
+            'feature_columns': self.features.columns,
+            'people_shape': list(self.people.movie_people.shape),
+        }
+        if self.cf is not None:
+            arrays['cf/item_factors'] = self.cf.item_factors
+            meta['cf'] = {'regularization': self.cf.regularization, 'alpha': self.cf.alpha}
+        if self.neighbors is not None:
+            arrays['neighbors/indptr'] = self.neighbors.indptr
+            arrays['neighbors/indices'] = self.neighbors.indices
+            arrays['neighbors/scores'] = self.neighbors.scores
+            meta['neighbors'] = {'k': self.neighbors.k, 'threshold': self.neighbors.threshold}
+        if self.clusters is not None:
+            arrays['clusters/centroids'] = self.clusters.centroids
+            arrays['clusters/labels'] = self.clusters.labels
+            arrays['clusters/representatives'] = self.clusters.representatives
+            meta['clusters'] = True
+        return arrays, meta
+
+    @metrics.timed('attach_shared_artifacts')
+    def attach_shared(self, manifest_path, models_dir):
+        """Use artifacts published by ``publish_artifacts`` as zero-copy read-only views."""
+        shared = SharedArtifacts.attach(manifest_path)
+        meta = shared.meta
+        shape = meta['count_shape']
+        people_shape = meta['people_shape']
+        self.catalog = MovieCatalog(shared.group('catalog'), meta['genre_names'], meta['language_names'])
+        self.count_matrix = shared.csr('count_matrix', shape)
+        self.normalized_matrix = shared.csr('normalized', shape)
+        self._normalized_t = shared.csr('normalized_t', shape[::-1])
+        self.features = FeatureMatrix(shared.csr('features', meta['feature_shape']), meta['feature_columns'])
+        self.people = PeopleIndex(shared.csr('people', people_shape), self.catalog.vote_count,
+                                  self.catalog.person_names, postings=shared.csr('people_postings', people_shape[::-1]))
+        # The vectorizer is a small Python object; each worker keeps its own
+        self._load_vectorizer(models_dir)
+        self.cf = None
+        if 'cf' in meta:
+            self.cf = ImplicitALS(shared['cf/item_factors'], **meta['cf'])
+        self.neighbors = None
+        if 'neighbors' in meta:
+            self.neighbors = NeighborIndex(shared['neighbors/indptr'], shared['neighbors/indices'],
+                                           shared['neighbors/scores'], **meta['neighbors'])
+        self.clusters = None
+        if 'clusters' in meta:
+            self.clusters = CatalogClusters(shared['clusters/centroids'], shared['clusters/labels'],
+                                            shared['clusters/representatives'])
+        self.artifact_version = meta['version']
+        self.artifacts_modified = datetime.fromisoformat(meta['artifacts_modified'])
+        self._shared = shared
+
+    def load_neighbors(self, path):
+        """Load the precomputed neighbor file written by ``build_neighbors``, if present."""
+        self.neighbors = None
+        if not os.path.exists(path):
+            return
+        self.neighbors = NeighborIndex.load(path, self.catalog.ids)
+        if self.neighbors is None:
+            print(f"Ignoring {path}: built for a different catalog")
+
+    def load_cf(self, path):
+        """Load collaborative-filtering factors written by ``train_cf``, if present."""
+        self.cf = None
+        if not os.path.exists(path):
+            return
+        self.cf = ImplicitALS.load(path, self.catalog.ids)
+        if self.cf is None:
+            print(f"Ignoring {path}: trained on a different catalog")
+
+    def load_clusters(self, path):
+        """Load onboarding clusters written by ``build_clusters``, if present."""
+        self.clusters = None
+        if not os.path.exists(path):
+            return
+        self.clusters = CatalogClusters.load(path, self.catalog.ids)
+        if self.clusters is None:
+            print(f"Ignoring {path}: built for a different catalog")
+
+    def _stamp_artifacts(self, models_dir, filenames):
+        """Derive a version token and modification time from the artifact files."""
+        digest = hashlib.sha1()
+        latest = 0.0
+        for filename in filenames:
+            stat = os.stat(os.path.join(models_dir, filename))
+            digest.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+            latest = max(latest, stat.st_mtime)
+        self.artifact_version = digest.hexdigest()[:12]
+        self.artifacts_modified = datetime.fromtimestamp(int(latest), tz=dt_timezone.utc)
+
+    @metrics.timed('build_indexes')
+    def _build_indexes(self):
+        """Derive query-time structures from the loaded artifacts."""
+        # Row-normalized float32 copy: cosine similarity becomes a plain dot
+        # product, and the transpose is kept in CSR form for sparse products
+        self.normalized_matrix = normalize(self.count_matrix.astype(np.float32), norm='l2', copy=False).tocsr()
+        self._normalized_t = self.normalized_matrix.T.tocsr()
+        self.features = FeatureMatrix.from_catalog(self.catalog)
+        self.people = PeopleIndex.from_catalog(self.catalog)
+
+    def _similarity(self, row, rows):
+        """Cosine similarity of one catalog row against ``rows``."""
+        return (self.normalized_matrix[rows] @ self.normalized_matrix[row].T).toarray().ravel()
+
+    def _score_blocks(self, rows, mask=None):
+        """Yield (offset, dense score block) for seed rows against the whole catalog."""
+        ineligible = np.flatnonzero(~mask) if mask is not None else None
+        for start in range(0, len(rows), self.SIMILARITY_BLOCK):
+            block = rows[start:start + self.SIMILARITY_BLOCK]
+            scores = (self.normalized_matrix[block] @ self._normalized_t).toarray()
+            if ineligible is not None and len(ineligible):
+                scores[:, ineligible] = -np.inf
+            yield start, scores
+
+    def eligibility_mask(self, audience='adult', excluded_ids=()):
+        """
+        Boolean mask of the catalog rows a profile may be shown.
+
+        Args:
+            audience: Profile type ('adult' or 'kids')
+            excluded_ids: Movie IDs the profile removed via feedback
+
+        Returns:
+            Boolean array over catalog rows; the shared read-only audience
+            mask when nothing is excluded
+        """
+        mask = self.catalog.audience_mask(audience)
+        if not excluded_ids:
+            return mask
+        rows = self.catalog.rows_of(list(excluded_ids))
+        mask = mask.copy()
+        mask[rows[rows >= 0]] = False
+        return mask
+
+    def similar_rows(self, rows, k, mask=None, engine='indexed'):
+        """
+        Top-k most similar catalog rows for every seed row.
+
+        Args:
+            rows: Array of seed catalog rows
+            k: Neighbors per seed (the seed itself is excluded)
+            mask: Optional eligibility mask; ineligible rows are never returned
+            engine: 'indexed' reads the neighbor file when loaded, 'live' always scores live
+
+        Returns:
+            List of (neighbor rows, scores) array pairs, one per seed
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        results = [None] * len(rows)
+        if self.neighbors is not None and engine == 'indexed':
+            for i, row in enumerate(rows.tolist()):
+                results[i] = self.neighbors.neighbors(row, k, mask)
+
+        # Score the rest (no neighbor file, or too few eligible stored neighbors) live
+        pending = np.array([i for i, result in enumerate(results) if result is None], dtype=np.int64)
+        for start, scores in self._score_blocks(rows[pending], mask):
+            for offset, row_scores in enumerate(scores):
+                i = pending[start + offset]
+                row_scores[rows[i]] = -np.inf
+                top = top_k(row_scores, k)
+                # Fewer than k eligible rows: don't pad with excluded ones
+                top = top[np.isfinite(row_scores[top])]
+                results[i] = (top, row_scores[top])
+        return results
+
+    @metrics.timed('get_recommendations_batch')
+    def get_recommendations_batch(self, movie_ids, num_recommendations=10, mask=None):
+        """
+        Content-based recommendations for many seed movies at once.
+
+        Args:
+            movie_ids: Seed movie IDs (unknown IDs are skipped)
+            num_recommendations: Recommendations per seed
+            mask: Optional eligibility mask from ``eligibility_mask``
+
+        Returns:
+            Dict of seed movie ID -> list of (movie_id, score) tuples
+        """
+        rows = self.catalog.rows_of(movie_ids)
+        known = rows >= 0
+        seeds = np.asarray(movie_ids, dtype=np.int64)[known]
+        results = {}
+        for seed, (top, scores) in zip(seeds.tolist(), self.similar_rows(rows[known], num_recommendations, mask)):
+            results[seed] = list(zip(self.catalog.ids[top].tolist(), scores.astype(float).tolist()))
+        return results
+
     def load_local_artifacts(self):
         """Load all local ML artifacts."""
         return self._load_models()
 
-    def rank_with_hybrid(self, movie_ids, alpha=0.7, popularity_fn=None):
+    @metrics.timed('rank_with_hybrid')
+    def rank_with_hybrid(self, movie_ids, alpha=0.7, popularity_fn=None, user_vector=None, beta=None,
+                         preference_vector=None, gamma=None, people_vector=None, delta=None, mask=None):
         """
-        Rank movies using hybrid scoring: alpha*cosine_similarity + (1-alpha)*popularity_score.
+        Rank movies using hybrid scoring: alpha*cosine_similarity + (1-alpha)*popularity_score,
+        plus beta*collaborative_score and gamma*preference_score when the profile vectors are given,
+        plus delta for movies crediting one of the profile's preferred people.
 
         Args:
             movie_ids: List of movie IDs to rank
             alpha: Weight for similarity (0-1)
-            popularity_fn: Function to compute popularity score from vote_avg and vote_count
+            popularity_fn: Function to compute popularity scores from vote_avg and vote_count arrays
+            user_vector: Profile factors from ``cf_vector`` (optional)
+            beta: Weight for the collaborative score (defaults to RECOMMENDER_CF_WEIGHT)
+            preference_vector: Profile weights from ``features.weight_vector`` (optional)
+            gamma: Weight for the preference score (defaults to RECOMMENDER_PREFERENCE_WEIGHT)
+            people_vector: Preferred people from ``people.person_vector`` (optional)
+            delta: Boost for preferred people (defaults to RECOMMENDER_PEOPLE_BOOST)
+            mask: Optional eligibility mask; ineligible movies are dropped before scoring
 
         Returns:
             List of (movie_id, score) tuples sorted by score descending
@@ -57,30 +386,42 @@ class MovieRecommender:
             return []
 
         if popularity_fn is None:
-            popularity_fn = lambda avg, count: (avg * min(count, 1000)) / 1000  # Simple popularity
-
-        scores = []
-        for movie_id in movie_ids:
-            if movie_id not in self.movies_df['id'].values:
-                continue
-
-            movie_idx = self.movies_df[self.movies_df['id'] == movie_id].index[0]
-            movie_data = self.movies_df.iloc[movie_idx]
-
-            # Get cosine similarity to query (assuming first movie is query)
-            if len(movie_ids) > 1:
-                query_idx = self.movies_df[self.movies_df['id'] == movie_ids[0]].index[0]
-                cos_sim = cosine_similarity(self.count_matrix[query_idx], self.count_matrix[movie_idx]).flatten()[0]
-            else:
-                cos_sim = 1.0  # Self-similarity
-
-            pop_score = popularity_fn(movie_data['vote_average'], movie_data['vote_count'])
-            hybrid_score = alpha * cos_sim + (1 - alpha) * pop_score
-
-            scores.append((movie_id, hybrid_score))
+            popularity_fn = lambda avg, count: (avg * np.minimum(count, 1000)) / 1000  # Simple popularity
+
+        rows = self.catalog.rows_of(movie_ids)
+        known = rows >= 0
+        if mask is not None:
+            known[known] = mask[rows[known]]
+        ids = np.asarray(movie_ids, dtype=np.int64)[known]
+        rows = rows[known]
+        if not len(rows):
+            return []
 
+        # Get cosine similarity to query (assuming first movie is query)
+        if len(movie_ids) > 1 and known[0]:
+            cos_sim = self._similarity(rows[0], rows)
+        else:
+            cos_sim = np.ones(len(rows))  # Self-similarity
+
+        pop_score = popularity_fn(self.catalog.vote_average[rows], self.catalog.vote_count[rows])
+        hybrid_score = alpha * cos_sim + (1 - alpha) * pop_score
+        if user_vector is not None and self.cf is not None:
+            if beta is None:
+                beta = getattr(settings, 'RECOMMENDER_CF_WEIGHT', 0.3)
+            hybrid_score = hybrid_score + beta * self.cf.score(user_vector, rows)
+        if preference_vector is not None:
+            if gamma is None:
+                gamma = getattr(settings, 'RECOMMENDER_PREFERENCE_WEIGHT', 0.2)
+            hybrid_score = hybrid_score + gamma * self.features.score(preference_vector, rows)
+        if people_vector is not None:
+            if delta is None:
+                delta = getattr(settings, 'RECOMMENDER_PEOPLE_BOOST', 0.15)
+            hybrid_score = hybrid_score + delta * (self.people.matches(people_vector, rows) > 0)
+
+        scores = [(int(movie_id), float(score)) for movie_id, score in zip(ids, hybrid_score)]
         return sorted(scores, key=lambda x: x[1], reverse=True)
 
+    @metrics.timed('rerank_for_diversity')
     def rerank_for_diversity(self, items, lambda_diversity=0.1):
         """
         Apply diversity penalty to reduce near-duplicates.
@@ -99,9 +440,9 @@ class MovieRecommender:
         reranked = []
         used_genres = set()
 
-        for movie_id, score in items:
-            movie_data = self.movies_df[self.movies_df['id'] == movie_id].iloc[0]
-            genres = set(movie_data['genres']) if isinstance(movie_data['genres'], list) else set()
+        rows = self.catalog.rows_of([movie_id for movie_id, score in items])
+        for (movie_id, score), row in zip(items, rows):
+            genres = set(self.catalog.genre_codes_of(row).tolist()) if row >= 0 else set()
 
             # Penalty for genre overlap
             overlap_penalty = len(genres & used_genres) * lambda_diversity
@@ -112,6 +453,7 @@ class MovieRecommender:
 
         return sorted(reranked, key=lambda x: x[1], reverse=True)
 
+    @metrics.timed('session_rerank')
     def session_rerank(self, items, session_signals):
         """
         Re-rank based on session signals (recent clicks, dwell time).
@@ -146,13 +488,18 @@ class MovieRecommender:
 
         return sorted(boosted, key=lambda x: x[1], reverse=True)
 
-    def explain(self, item_id, profile_id):
+    @metrics.timed('explain')
+    def explain(self, item_id, profile_id, interactions=None, preferences=None):
         """
         Generate explanation badges and confidence for a recommendation.
 
         Args:
             item_id: Movie ID
             profile_id: Profile ID
+            interactions: Preloaded InteractionSummary for the profile; when
+                omitted, the summary and preferences are loaded here
+            preferences: Preloaded PreferenceWeights (or None), used together
+                with ``interactions``
 
         Returns:
             Dict with 'badges' list and 'confidence' score
@@ -161,36 +508,39 @@ class MovieRecommender:
         confidence = 0.5  # Base confidence
 
         try:
-            profile = Profile.objects.get(id=profile_id)
-            movie = self.movies_df[self.movies_df['id'] == item_id].iloc[0]
+            if interactions is None:
+                interactions = load_interaction_summary(profile_id)
+                preferences = PreferenceWeights.objects.filter(profile_id=profile_id).first()
+            item_idx = self.catalog.row_of(item_id)
+            if item_idx < 0:
+                raise KeyError(item_id)
 
             # Check ratings history for "because you liked"
-            ratings = profile.userrating_set.filter(rating__gte=4).values_list('movie__tmdb_id', flat=True)
+            ratings = interactions.liked_ids
             if ratings:
                 # Find similar movies to highly rated ones
                 for rated_id in ratings[:5]:  # Check last 5 ratings
-                    if rated_id in self.movies_df['id'].values:
-                        rated_idx = self.movies_df[self.movies_df['id'] == rated_id].index[0]
-                        item_idx = self.movies_df[self.movies_df['id'] == item_id].index[0]
-                        sim = cosine_similarity(self.count_matrix[rated_idx], self.count_matrix[item_idx]).flatten()[0]
+                    rated_idx = self.catalog.row_of(rated_id)
+                    if rated_idx >= 0:
+                        sim = self._similarity(rated_idx, [item_idx])[0]
                         if sim > 0.3:
-                            rated_title = self.movies_df.iloc[rated_idx]['title']
+                            rated_title = self.catalog.title[rated_idx]
                             badges.append(f"Because you liked {rated_title}")
                             confidence += 0.2
                             break
 
             # Genre matches
-            pref_weights = PreferenceWeights.objects.filter(profile=profile).first()
+            pref_weights = preferences
             if pref_weights and pref_weights.genre_weights:
                 top_genres = sorted(pref_weights.genre_weights.items(), key=lambda x: x[1], reverse=True)[:2]
-                movie_genres = set(movie['genres']) if isinstance(movie['genres'], list) else set()
+                movie_genres = set(self.catalog.genres_of(item_idx))
                 matching = [g for g, w in top_genres if g in movie_genres]
                 if matching:
                     badges.append(f"Matches: {', '.join(matching)}")
                     confidence += 0.15
 
             # Popularity badge
-            if movie['vote_average'] > 7.5:
+            if self.catalog.vote_average[item_idx] > 7.5:
                 badges.append("Popular with similar profiles")
                 confidence += 0.1
 
@@ -202,49 +552,156 @@ class MovieRecommender:
             'confidence': min(confidence, 1.0)
         }
 
-    def get_recommendations(self, movie_id, num_recommendations=10):
+    @metrics.timed('get_movie')
+    def get_movie(self, movie_id):
+        """Get a single movie record, or None if it is not in the catalog."""
+        return self.catalog.get(movie_id)
+
+    @metrics.timed('get_recommendations')
+    def get_recommendations(self, movie_id, num_recommendations=10, mask=None, engine='indexed'):
         """Get movie recommendations based on content similarity."""
-        if movie_id not in self.movies_df['id'].values:
+        movie_idx = self.catalog.row_of(movie_id)
+        if movie_idx < 0:
+            return []
+
+        # Top cosine similarities, excluding the movie itself
+        movie_indices, scores = self.similar_rows([movie_idx], num_recommendations, mask, engine)[0]
+
+        # Return recommended movies
+        return self.catalog.records(movie_indices)
+
+    @metrics.timed('get_shared_cast')
+    def get_shared_cast(self, movie_id, num_movies=10, mask=None):
+        """Movies sharing the most cast members or the director with a movie."""
+        row = self.catalog.row_of(movie_id)
+        if row < 0:
             return []
+        rows, shared = self.people.shared_cast(row, num_movies, mask)
+        return self.catalog.records(rows)
 
-        # Find the index of the movie
-        movie_idx = self.movies_df[self.movies_df['id'] == movie_id].index[0]
+    @metrics.timed('get_trending_movies')
+    def get_trending_movies(self, num_movies=20, mask=None):
+        """Get trending/popular movies."""
+        # Sorted by vote_average and vote_count once at load time
+        order = self.catalog.trending_order
+        if mask is not None:
+            order = order[mask[order]]
+        return self.catalog.records(order[:num_movies])
+
+    @metrics.timed('get_movies_by_genre')
+    def get_movies_by_genre(self, genre, num_movies=10, mask=None):
+        """Get movies by genre."""
+        rows = self.catalog.rows_with_genre(genre)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return self.catalog.records(self.catalog.top_by_rating(rows, num_movies))
 
-        # Calculate cosine similarity
-        cosine_sim = cosine_similarity(self.count_matrix[movie_idx], self.count_matrix).flatten()
+    @metrics.timed('search_movies')
+    def search_movies(self, query, num_results=10, mask=None):
+        """Search movies by title."""
+        rows = self.catalog.search_title(query)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return self.catalog.records(self.catalog.top_by_rating(rows, num_results))
 
-        # Get similarity scores
-        sim_scores = list(enumerate(cosine_sim))
+    @metrics.timed('vibe_search')
+    def vibe_search(self, query, num_results=10, mask=None):
+        """
+        Free-text search over movie content ("space heist with humor").
 
-        # Sort by similarity score (descending)
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+        Args:
+            query: Free-text query
+            num_results: Number of results
+            mask: Optional eligibility mask
 
-        # Get top recommendations (excluding the movie itself)
-        sim_scores = sim_scores[1:num_recommendations+1]
+        Returns:
+            List of movies, most similar first; empty when no query term is
+            in the vocabulary
+        """
+        vector = self.query_encoder.encode(query) if self.query_encoder is not None else None
+        if vector is None:
+            return []
+        scores = (vector @ self._normalized_t).toarray().ravel()
+        if mask is not None:
+            scores[~mask] = -np.inf
+        top = top_k(scores, num_results)
+        # Movies sharing no term with the query score 0 and are not matches
+        return self.catalog.records(top[scores[top] > 0])
+
+    def cf_vector(self, interactions):
+        """
+        Fold a profile's current ratings into a collaborative-filtering vector.
 
-        # Get movie indices
-        movie_indices = [i[0] for i in sim_scores]
+        Args:
+            interactions: InteractionSummary of the profile
 
-        # Return recommended movies
-        return self.movies_df.iloc[movie_indices][['id', 'title', 'overview', 'genres', 'release_year', 'vote_average']].to_dict('records')
+        Returns:
+            Factor vector, or None without a CF model or positive ratings
+        """
+        if self.cf is None or not interactions.ratings:
+            return None
+        movie_ids = list(interactions.ratings)
+        return self.cf.fold_in(
+            self.catalog.rows_of(movie_ids),
+            rating_weights([interactions.ratings[movie_id] for movie_id in movie_ids]),
+        )
 
-    def get_trending_movies(self, num_movies=20):
-        """Get trending/popular movies."""
-        # Sort by vote_average and vote_count for trending
-        trending = self.movies_df.nlargest(num_movies, ['vote_average', 'vote_count'])
-        return trending[['id', 'title', 'overview', 'genres', 'release_year', 'vote_average']].to_dict('records')
+    def cluster_affinity(self, interactions):
+        """
+        Fold a profile's current ratings into per-cluster affinities.
 
-    def get_movies_by_genre(self, genre, num_movies=10):
-        """Get movies by genre."""
-        genre_movies = self.movies_df[self.movies_df['genres'].apply(lambda x: genre.lower() in [g.lower() for g in x] if isinstance(x, list) else False)]
-        return genre_movies.nlargest(num_movies, 'vote_average')[['id', 'title', 'overview', 'genres', 'release_year', 'vote_average']].to_dict('records')
+        Args:
+            interactions: InteractionSummary of the profile
 
-    def search_movies(self, query, num_results=10):
-        """Search movies by title."""
-        query_lower = query.lower()
-        matches = self.movies_df[self.movies_df['title'].str.lower().str.contains(query_lower)]
-        return matches.nlargest(num_results, 'vote_average')[['id', 'title', 'overview', 'genres', 'release_year', 'vote_average']].to_dict('records')
+        Returns:
+            Affinity array over clusters, or None without clusters or a signal
+        """
+        if self.clusters is None or not interactions.ratings:
+            return None
+        movie_ids = list(interactions.ratings)
+        return self.clusters.affinity(
+            self.normalized_matrix,
+            self.catalog.rows_of(movie_ids),
+            onboarding_weights([interactions.ratings[movie_id] for movie_id in movie_ids]),
+        )
 
+    def cold_start_rows(self, interactions, num_movies, mask=None):
+        """
+        Representative titles across clusters, closest clusters to the profile's ratings first.
+
+        Falls back to trending rows when no clusters are built.
+
+        Returns:
+            Tuple of (catalog rows, per-cluster affinity or None)
+        """
+        if self.clusters is None:
+            order = self.catalog.trending_order
+            if mask is not None:
+                order = order[mask[order]]
+            return order[:num_movies], None
+        affinity = self.cluster_affinity(interactions)
+        return self.clusters.picks(num_movies, affinity, mask), affinity
+
+    @metrics.timed('get_onboarding_picks')
+    def get_onboarding_picks(self, profile, num_movies=12, skipped_ids=()):
+        """
+        Diverse titles for a profile to quick-rate, adapted to its ratings so far.
+
+        Args:
+            profile: Profile instance
+            num_movies: Number of titles
+            skipped_ids: Movie IDs the profile skipped (not shown again)
+
+        Returns:
+            List of movies
+        """
+        interactions = load_interaction_summary(profile)
+        mask = self.eligibility_mask(
+            profile.profile_type, interactions.excluded_ids | set(interactions.rated_ids) | set(skipped_ids))
+        rows, affinity = self.cold_start_rows(interactions, num_movies, mask)
+        return self.catalog.records(rows)
+
+    @metrics.timed('get_personalized_recommendations')
     def get_personalized_recommendations(self, profile, num_recs=20):
         """
         Get personalized recommendations for a profile.
@@ -256,54 +713,93 @@ class MovieRecommender:
         Returns:
             List of movie dicts with scores, badges, confidence
         """
+        started = time.perf_counter()
+        # Experiment variants come from a hash of the profile id (no query)
+        assignments = experiments.assign(profile.id)
+
         # Try cached recommendations first
-        cache_key = f"recs_{profile.id}_for_you"
+        cache_key = experiments.for_you_cache_key(profile.id, assignments)
         cached = cache.get(cache_key)
+        metrics.record_cache('for_you', bool(cached))
         if cached:
+            experiments.record_request(assignments, time.perf_counter() - started, True)
             return cached
 
-        # Get highly rated movies for content-based recs
-        high_ratings = profile.userrating_set.filter(rating__gte=4).values_list('movie__tmdb_id', flat=True)
+        recommendations = self._compute_personalized(
+            profile, num_recs, experiments.ranking_params(assignments), cache_key,
+        )
+        experiments.record_request(assignments, time.perf_counter() - started, False)
+        return recommendations
 
+    def _compute_personalized(self, profile, num_recs, params, cache_key):
+        # Ratings, likes and feedback exclusions in a single query
+        interactions = load_interaction_summary(profile)
+
+        # Audience, feedback exclusions and already rated movies, applied
+        # before every top-k below so rails never shrink after ranking
+        mask = self.eligibility_mask(profile.profile_type, interactions.excluded_ids | set(interactions.rated_ids))
+
+        # Get highly rated movies for content-based recs
         candidates = set()
-        for movie_id in high_ratings:
-            recs = self.get_recommendations(movie_id, 5)
-            candidates.update([r['id'] for r in recs])
-
-        # Remove already rated movies
-        rated_ids = set(profile.userrating_set.values_list('movie__tmdb_id', flat=True))
-        candidates = candidates - rated_ids
-
-        # Apply feedback filters
-        feedback_excludes = set(
-            Feedback.objects.filter(
-                profile=profile,
-                feedback_type__in=['not_interested', 'seen_it', 'show_fewer']
-            ).values_list('movie__tmdb_id', flat=True)
-        )
-        candidates = candidates - feedback_excludes
+        for movie_id in interactions.liked_ids:
+            recs = self.get_recommendations(movie_id, 5, mask=mask, engine=params['engine'])
+            candidates.update([r.id for r in recs])
+
+        # Movies with the people the user asked for (UserPreference.preferred_actors)
+        preferred_people = UserPreference.objects.filter(user_id=profile.user_id).values_list(
+            'preferred_actors', flat=True).first()
+        people_vector = self.people.person_vector(preferred_people) if preferred_people else None
+        if people_vector is not None:
+            rows, matches = self.people.movies_with(people_vector, 10, mask)
+            candidates.update(self.catalog.ids[rows].tolist())
+
+        # Few ratings so far: add representatives of the clusters closest to them
+        cold_start = len(interactions.rated_ids) < getattr(settings, 'RECOMMENDER_COLD_START_RATINGS', 5)
+        if cold_start and candidates:
+            rows, affinity = self.cold_start_rows(interactions, num_recs, mask)
+            if affinity is not None:
+                candidates.update(self.catalog.ids[rows[affinity[self.clusters.labels[rows]] > 0]].tolist())
+
+        profiling.tag(profile=profile.id, candidates=len(candidates))
 
         if not candidates:
-            # Fallback to trending
-            trending = self.get_trending_movies(num_recs)
-            return [{'movie': m, 'score': 0.5, 'badges': ['Trending'], 'confidence': 0.5} for m in trending]
+            # Fallback to cluster representatives (or trending without clusters)
+            rows, affinity = self.cold_start_rows(interactions, num_recs, mask)
+            recommendations = []
+            for row in rows.tolist():
+                if affinity is not None and affinity[self.clusters.labels[row]] > 0:
+                    badges = ['Close to your ratings']
+                else:
+                    badges = ['Popular pick' if self.clusters is not None else 'Trending']
+                recommendations.append({'movie': self.catalog.record(row), 'score': 0.5, 'badges': badges,
+                                        'confidence': 0.5})
+            return recommendations
 
         # Rank with hybrid scoring
-        ranked = self.rank_with_hybrid(list(candidates))
+        preferences = PreferenceWeights.objects.filter(profile=profile).first()
+        ranked = self.rank_with_hybrid(
+            list(candidates),
+            alpha=params['alpha'],
+            user_vector=self.cf_vector(interactions),
+            beta=params['beta'],
+            preference_vector=self.features.weight_vector(preferences),
+            gamma=params['gamma'],
+            people_vector=people_vector,
+            delta=params['delta'],
+        )
 
         # Apply diversity
-        diverse = self.rerank_for_diversity(ranked)
+        diverse = self.rerank_for_diversity(ranked, lambda_diversity=params['lambda_diversity'])
 
         # Get top recommendations
-        top_ids = [mid for mid, score in diverse[:num_recs]]
+        top = diverse[:num_recs]
 
         recommendations = []
-        for movie_id in top_ids:
-            movie_data = self.movies_df[self.movies_df['id'] == movie_id].iloc[0].to_dict()
-            explanation = self.explain(movie_id, profile.id)
+        for movie_id, score in top:
+            explanation = self.explain(movie_id, profile.id, interactions, preferences)
             recommendations.append({
-                'movie': movie_data,
-                'score': next((score for mid, score in diverse if mid == movie_id), 0.5),
+                'movie': self.catalog.get(movie_id),
+                'score': score,
                 'badges': explanation['badges'],
                 'confidence': explanation['confidence']
             })
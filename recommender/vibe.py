@@ -0,0 +1,56 @@
+"""
+Free-text ("vibe") queries against the content similarity index.
+
+``QueryEncoder`` turns a query such as "space heist with humor" into the same
+L2-normalized term space as the catalog's count matrix, so scoring it is one
+sparse product with the normalized matrix's transpose, exactly like a seed
+movie. It calls the vectorizer's analyzer and looks terms up in its
+vocabulary directly instead of going through ``CountVectorizer.transform``
+(input validation, a full sparse matrix build and sorting for a handful of
+tokens), and keeps the encoded terms of recent queries in an LRU cache.
+"""
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from scipy.sparse import csr_matrix
+
+QUERY_CACHE_SIZE = 1024
+
+
+class QueryEncoder:
+    """Encode free text with a fitted CountVectorizer's analyzer and vocabulary."""
+
+    def __init__(self, vectorizer, cache_size=QUERY_CACHE_SIZE):
+        self._analyze = vectorizer.build_analyzer()
+        self._vocabulary = vectorizer.vocabulary_
+        self.width = len(self._vocabulary)
+        self.terms = lru_cache(maxsize=cache_size)(self._terms)
+
+    def _terms(self, text):
+        counts = Counter(self._vocabulary[token] for token in self._analyze(text) if token in self._vocabulary)
+        if not counts:
+            return None
+        columns = np.array(sorted(counts), dtype=np.int32)
+        weights = np.array([counts[column] for column in columns], dtype=np.float32)
+        weights /= np.linalg.norm(weights)
+        # Cached arrays are shared by every caller
+        columns.flags.writeable = False
+        weights.flags.writeable = False
+        return columns, weights
+
+    def encode(self, text):
+        """
+        Encode a query.
+
+        Args:
+            text: Free-text query
+
+        Returns:
+            1 x vocabulary L2-normalized CSR row, or None when no term of the
+            query is in the vocabulary
+        """
+        terms = self.terms(' '.join(str(text).lower().split()))
+        if terms is None:
+            return None
+        columns, weights = terms
+        return csr_matrix((weights, columns, np.array([0, len(columns)])), shape=(1, self.width))
@@ -1,82 +1,326 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from .models import Movie, UserRating, UserPreference
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.views.decorators.http import require_POST, require_http_methods, condition
+from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.conf import settings
+from django.utils.safestring import mark_safe
+from .models import Movie, UserRating, UserPreference, Profile, WatchEvent, SavedList
 from .utils import recommender
+from .queries import load_excluded_ids
 from .forms import UserRegistrationForm, RatingForm
+from .context_processors import fragment_versions
+from . import experiments, metrics, rails, shelves
+import hashlib
 import json
 
+@metrics.timed('render')
+def render_template(request, template_name, context=None, status=None):
+    """``render``, timed as its own entry in the metrics and Server-Timing."""
+    return render(request, template_name, context, status=status)
+
+def get_active_profile(request):
+    """Return the user's active profile, creating a default one if needed (memoized per request)."""
+    if not hasattr(request, '_active_profile'):
+        profile = request.user.profile_set.filter(is_active=True).first()
+        if not profile:
+            profile = request.user.profile_set.create(name="Default", profile_type="adult", is_active=True)
+        request._active_profile = profile
+    return request._active_profile
+
+def get_viewer_eligibility(request):
+    """
+    Return (eligibility mask, cache key part) for the viewer (memoized per request).
+
+    Anonymous viewers see the full catalog (mask None). Signed-in viewers get
+    their active profile's audience mask minus its feedback exclusions; the
+    key part identifies that mask for rail caches and ETags.
+    """
+    if not hasattr(request, '_eligibility'):
+        if not request.user.is_authenticated:
+            request._eligibility = (None, 'all')
+        else:
+            profile = get_active_profile(request)
+            excluded = load_excluded_ids(profile)
+            key = profile.profile_type
+            if excluded:
+                digest = hashlib.sha1(','.join(map(str, sorted(excluded))).encode()).hexdigest()[:12]
+                key = f"{key}-{profile.pk}-{digest}"
+            request._eligibility = (recommender.eligibility_mask(profile.profile_type, excluded), key)
+    return request._eligibility
+
+def render_rail(name, template_name, context_fn, *key_parts):
+    """
+    Render a rail to HTML, caching the assembled markup.
+
+    The cache key includes the artifact and template versions, so rails are
+    rebuilt whenever the model artifacts or rail markup change. ``context_fn``
+    is only called on a cache miss.
+    """
+    versions = fragment_versions()
+    key = ':'.join(['rail', name, *[str(part) for part in key_parts],
+                    str(versions['artifact_version']), str(versions['template_version'])])
+    html = cache.get(key)
+    metrics.record_cache(f'rail_{name}', html is not None)
+    if html is None:
+        context = context_fn()
+        with metrics.timer('render_rail'):
+            html = render_to_string(template_name, {**versions, **context})
+        cache.set(key, html, versions['fragment_timeout'])
+    return mark_safe(html)
+
+def _for_you_rail(request, movie_id=None):
+    profile = get_active_profile(request)
+    try:
+        recommendations = recommender.get_personalized_recommendations(profile, num_recs=10)
+    except Exception:
+        # Fallback to the shelf precomputed by recompute_recs, then to trending
+        precomputed = shelves.load_shelves(profile, recommender.catalog, get_viewer_eligibility(request)[0])
+        if precomputed.get('for_you'):
+            return render_to_string('recommender/components/for_you_rail.html',
+                                    {'recommendations': precomputed['for_you'][:10]}, request=request)
+        rated_movie_ids = set(UserRating.objects.filter(profile=profile).values_list('movie__tmdb_id', flat=True))
+        all_trending = recommender.get_trending_movies(50, mask=get_viewer_eligibility(request)[0])
+        recommendations = [{'movie': movie, 'score': 0.5, 'badges': ['Trending'], 'confidence': 0.5}
+                          for movie in all_trending if movie['id'] not in rated_movie_ids][:10]
+    return render_to_string('recommender/components/for_you_rail.html', {'recommendations': recommendations},
+                            request=request)
+
+def _shelf_title(shelf_key):
+    if shelf_key == 'trending':
+        return 'Trending Now'
+    return f"Top {shelf_key[len('genre_'):].title()} Picks"
+
+def _shelves_rail(request, movie_id=None):
+    # Trending and genre shelves precomputed by recompute_recs (two queries)
+    profile = get_active_profile(request)
+    precomputed = shelves.load_shelves(profile, recommender.catalog, get_viewer_eligibility(request)[0])
+    rows = [{'title': _shelf_title(shelf_key), 'recommendations': items}
+            for shelf_key, items in sorted(precomputed.items(), key=lambda item: item[0] != 'trending')
+            if shelf_key != 'for_you' and items]
+    return render_to_string('recommender/components/shelves_rail.html', {'shelves': rows}, request=request)
+
+def _continue_watching_rail(request, movie_id=None):
+    # Activity rails are cached per profile generation, bumped on every watch/list event
+    profile = get_active_profile(request)
+    return render_rail(
+        'continue_watching', 'recommender/components/activity_rail.html',
+        lambda: {'title': 'Continue Watching', 'page': rails.continue_watching(profile),
+                 'more_url': reverse('continue_watching_rail')},
+        profile.pk, rails.generation(profile),
+    )
+
+def _my_list_rail(request, movie_id=None):
+    profile = get_active_profile(request)
+    return render_rail(
+        'my_list', 'recommender/components/activity_rail.html',
+        lambda: {'title': 'My List', 'page': rails.my_list(profile), 'more_url': reverse('my_list_rail')},
+        profile.pk, rails.generation(profile),
+    )
+
+def _similar_rail(request, movie_id):
+    mask, audience = get_viewer_eligibility(request)
+    return render_rail(
+        'more_like_this', 'recommender/components/similar_rail.html',
+        lambda: {'title': 'Similar Movies',
+                 'recommendations': recommender.get_recommendations(movie_id, 6, mask=mask)},
+        movie_id, 6, audience,
+    )
+
+def _shared_cast_rail(request, movie_id):
+    mask, audience = get_viewer_eligibility(request)
+    return render_rail(
+        'shared_cast', 'recommender/components/similar_rail.html',
+        lambda: {'title': 'Shared Cast', 'recommendations': recommender.get_shared_cast(movie_id, 6, mask=mask)},
+        movie_id, 6, audience,
+    )
+
+# Rails of the dashboard and movie pages, in page order: (name, builder,
+# above the fold). Pages render a skeleton slot per rail and the browser
+# fetches each one from rail_partial, so no rail delays the first byte.
+# Slots above the fold are fetched on load (or streamed after the page shell
+# with RECOMMENDER_STREAM_RAILS); the rest only once scrolled into view.
+DASHBOARD_RAILS = [
+    ('continue_watching', _continue_watching_rail, True),
+    ('my_list', _my_list_rail, True),
+    ('for_you', _for_you_rail, False),
+    ('shelves', _shelves_rail, False),
+]
+MOVIE_RAILS = [
+    ('more_like_this', _similar_rail, True),
+    ('shared_cast', _shared_cast_rail, False),
+]
+
+def movie_rails():
+    """MOVIE_RAILS, without Shared Cast when the catalog carries no credits."""
+    if len(recommender.people):
+        return MOVIE_RAILS
+    return [rail for rail in MOVIE_RAILS if rail[0] != 'shared_cast']
+
+def _rail_url(name, movie_id=None):
+    if movie_id is None:
+        return reverse('dashboard_rail', args=[name])
+    return reverse('movie_rail', args=[movie_id, name])
+
+def rail_slots(page_rails, movie_id=None):
+    """Skeleton slot context per rail name (see components/lazy_rail.html)."""
+    slots = {}
+    for name, builder, above_fold in page_rails:
+        streamed = above_fold and settings.RECOMMENDER_STREAM_RAILS
+        slots[name] = {'name': name, 'url': None if streamed else _rail_url(name, movie_id),
+                       'trigger': 'load' if above_fold else 'revealed'}
+    return slots
+
+def _streamed_rail(request, name, builder, movie_id):
+    """HTML of a streamed rail, or of a slot lazy-loading it when the builder fails."""
+    try:
+        with metrics.timer(f'rail_{name}'):
+            return builder(request, movie_id)
+    except Exception as e:
+        # The 200 and the page shell are already sent: leave the rail to rail_partial
+        print(f"Error streaming {name} rail: {e}")
+        metrics.increment('recommender_rail_errors_total', rail=name)
+        return render_to_string('recommender/components/lazy_rail.html',
+                                {'rail': {'name': name, 'url': _rail_url(name, movie_id), 'trigger': 'load'}})
+
+def render_page(request, template_name, context, page_rails, movie_id=None):
+    """
+    Render a page with rail slots.
+
+    With RECOMMENDER_STREAM_RAILS, the page shell is flushed first and every
+    rail above the fold follows in the same response as soon as it has been
+    built, then swapped into its slot by ``fillRail`` (base.html). A rail
+    whose builder fails is replaced by a slot that lazy-loads it instead, so
+    the page still ends with well-formed HTML. The rails are built while the
+    response is iterated, after the view has returned: ``MetricsMiddleware``
+    and the profiler middleware keep measuring until the stream ends.
+    """
+    if not settings.RECOMMENDER_STREAM_RAILS:
+        return render_template(request, template_name, context)
+
+    html = render_template(request, template_name, context).content.decode()
+    split = html.rfind('</body>')
+    head, tail = html[:split], html[split:]
+
+    def stream():
+        yield head
+        for name, builder, above_fold in page_rails:
+            if above_fold:
+                rail_html = _streamed_rail(request, name, builder, movie_id)
+                yield f'<template data-rail="{name}">{rail_html}</template><script>fillRail("{name}")</script>\n'
+        yield tail
+
+    return StreamingHttpResponse(stream(), content_type='text/html; charset=utf-8')
+
+def rail_partial(request, rail, movie_id=None):
+    """HTML of one dashboard (no ``movie_id``) or movie page rail, for lazy loading."""
+    page_rails = DASHBOARD_RAILS if movie_id is None else movie_rails()
+    builder = next((builder for name, builder, above_fold in page_rails if name == rail), None)
+    if builder is None:
+        return HttpResponse(status=404)
+    if movie_id is None and not request.user.is_authenticated:
+        return HttpResponseForbidden()
+    return HttpResponse(builder(request, movie_id))
+
+def _etag(*parts):
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+def _has_pending_messages(request):
+    # Counting the queued flash messages does not mark them as shown
+    return len(messages.get_messages(request)) > 0
+
+def _page_etag(request, *parts):
+    """ETag for pages that only depend on the artifacts, the viewer and ``parts``."""
+    # A 304 would never show pending flash messages, and then drop them
+    if _has_pending_messages(request):
+        return None
+    # The CSRF secret is part of the key so a revalidated page never carries a stale token
+    return _etag(recommender.artifact_version, settings.RECOMMENDER_TEMPLATE_VERSION,
+                 request.user.pk, request.META.get('CSRF_COOKIE'), *parts)
+
+def _anonymous_last_modified(request, *args, **kwargs):
+    # Per-user pages revalidate by ETag only
+    if request.user.is_authenticated or _has_pending_messages(request):
+        return None
+    return recommender.artifacts_modified
+
+def _home_etag(request):
+    return _page_etag(request, 'home', get_viewer_eligibility(request)[1])
+
+def _search_etag(request):
+    return _page_etag(request, 'search', request.GET.get('mode', ''), request.GET.get('q', ''),
+                      get_viewer_eligibility(request)[1])
+
+def _movie_detail_etag(request, movie_id):
+    # Authenticated pages show the viewer's own rating, so only anonymous pages are revalidated
+    if request.user.is_authenticated:
+        return None
+    return _page_etag(request, 'movie', movie_id)
+
+def _dashboard_etag(request):
+    if not request.user.is_authenticated or _has_pending_messages(request):
+        return None
+    # Ratings, feedback, watches, lists and preferences all bump the profile's
+    # generation (see signals), so the profile row alone versions the page
+    profile = get_active_profile(request)
+    return _page_etag(request, 'dashboard', profile.pk, profile.profile_type, rails.generation(profile))
+
+@condition(etag_func=_home_etag, last_modified_func=_anonymous_last_modified)
 def home(request):
     """Homepage showing trending movies."""
-    trending_movies = recommender.get_trending_movies(20)
+    mask, audience = get_viewer_eligibility(request)
+    trending_rail = render_rail(
+        'trending', 'recommender/components/carousel.html',
+        lambda: {'title': 'Trending Movies', 'movies': recommender.get_trending_movies(20, mask=mask)},
+        20, audience,
+    )
     context = {
-        'trending_movies': trending_movies,
+        'trending_rail': trending_rail,
         'user': request.user,
     }
-    return render(request, 'recommender/home.html', context)
+    return render_template(request, 'recommender/home.html', context)
 
+@condition(etag_func=_movie_detail_etag, last_modified_func=_anonymous_last_modified)
 def movie_detail(request, movie_id):
     """Detailed movie page with recommendations."""
     # Get movie data from the recommender
-    movie_data = None
-    for movie in recommender.movies_df[recommender.movies_df['id'] == movie_id].to_dict('records'):
-        movie_data = movie
-        break
+    movie_data = recommender.get_movie(movie_id)
 
     if not movie_data:
-        return render(request, '404.html', status=404)
-
-    # Get recommendations
-    recommendations = recommender.get_recommendations(movie_id, 6)
+        return render_template(request, '404.html', status=404)
 
     # Check if user has rated this movie
     user_rating = None
     if request.user.is_authenticated:
         try:
             # Get user's active profile
-            profile = request.user.profile_set.filter(is_active=True).first()
-            if not profile:
-                profile = request.user.profile_set.create(name="Default", profile_type="adult", is_active=True)
+            profile = get_active_profile(request)
             user_rating = UserRating.objects.get(profile=profile, movie__tmdb_id=movie_id)
         except UserRating.DoesNotExist:
             pass
 
     context = {
         'movie': movie_data,
-        'recommendations': recommendations,
+        'rail_slots': rail_slots(movie_rails(), movie_id),
         'user_rating': user_rating,
         'rating_form': RatingForm() if request.user.is_authenticated else None,
         'genres_json': json.dumps(movie_data['genres']),
     }
-    return render(request, 'recommender/movie_detail.html', context)
+    return render_page(request, 'recommender/movie_detail.html', context, movie_rails(), movie_id)
 
 @login_required
+@condition(etag_func=_dashboard_etag)
 def dashboard(request):
     """User dashboard with recommendations and profile."""
     # Get user's active profile (default to first one or create if none)
-    try:
-        profile = request.user.profile_set.filter(is_active=True).first()
-        if not profile:
-            # Create default adult profile
-            profile = request.user.profile_set.create(name="Default", profile_type="adult", is_active=True)
-    except:
-        profile = request.user.profile_set.create(name="Default", profile_type="adult", is_active=True)
+    profile = get_active_profile(request)
 
     # Get profile's ratings
     user_ratings = UserRating.objects.filter(profile=profile).select_related('movie')
-    rated_movie_ids = [rating.movie.tmdb_id for rating in user_ratings]
-
-    # Get personalized recommendations
-    try:
-        recommendations = recommender.get_personalized_recommendations(profile, num_recs=10)
-    except:
-        # Fallback to trending
-        all_trending = recommender.get_trending_movies(50)
-        recommendations = [{'movie': movie, 'score': 0.5, 'badges': ['Trending'], 'confidence': 0.5}
-                          for movie in all_trending if movie['id'] not in rated_movie_ids][:10]
 
     # Get user's preferences (legacy support)
     try:
@@ -84,13 +328,14 @@ def dashboard(request):
     except UserPreference.DoesNotExist:
         preferences = None
 
+    # Recommendations and activity rails are loaded separately (rail_partial)
     context = {
         'user_ratings': user_ratings,
-        'recommendations': recommendations,
         'preferences': preferences,
         'profile': profile,
+        'rail_slots': rail_slots(DASHBOARD_RAILS),
     }
-    return render(request, 'recommender/dashboard.html', context)
+    return render_page(request, 'recommender/dashboard.html', context, DASHBOARD_RAILS)
 
 def register(request):
     """User registration."""
@@ -100,10 +345,10 @@ def register(request):
             user = form.save()
             login(request, user)
             messages.success(request, 'Registration successful!')
-            return redirect('dashboard')
+            return redirect('onboarding')
     else:
         form = UserRegistrationForm()
-    return render(request, 'recommender/register.html', {'form': form})
+    return render_template(request, 'recommender/register.html', {'form': form})
 
 def user_login(request):
     """User login."""
@@ -116,7 +361,7 @@ def user_login(request):
             return redirect('dashboard')
         else:
             messages.error(request, 'Invalid credentials')
-    return render(request, 'recommender/login.html')
+    return render_template(request, 'recommender/login.html')
 
 def user_logout(request):
     """User logout."""
@@ -139,12 +384,7 @@ def rate_movie(request, movie_id):
         return JsonResponse({'error': 'Invalid rating'}, status=400)
 
     # Get user's active profile
-    try:
-        profile = request.user.profile_set.filter(is_active=True).first()
-        if not profile:
-            profile = request.user.profile_set.create(name="Default", profile_type="adult", is_active=True)
-    except:
-        profile = request.user.profile_set.create(name="Default", profile_type="adult", is_active=True)
+    profile = get_active_profile(request)
 
     # Get or create movie
     movie, created = Movie.objects.get_or_create(
@@ -165,17 +405,173 @@ def rate_movie(request, movie_id):
         movie=movie,
         defaults={'rating': rating_value}
     )
+    # The For You rail folds ratings in at compute time; drop the stale copy
+    cache.delete(experiments.for_you_cache_key(profile.id))
+    experiments.record_event(profile.id, 'rating')
 
     return JsonResponse({'success': True, 'rating': rating_value})
 
+def _catalog_movie(movie_id):
+    """Movie row for a catalog movie, created from the catalog on first use (None if unknown)."""
+    movie = Movie.objects.filter(tmdb_id=movie_id).first()
+    if movie is None:
+        record = recommender.get_movie(movie_id)
+        if record is None:
+            return None
+        movie, created = Movie.objects.get_or_create(
+            tmdb_id=movie_id,
+            defaults={
+                'title': record.title,
+                'overview': record.overview,
+                'genres': record.genres,
+                'release_year': record.release_year,
+                'vote_average': record.vote_average,
+                'vote_count': int(recommender.catalog.vote_count[recommender.catalog.row_of(movie_id)]),
+            }
+        )
+    return movie
+
+@login_required
+@require_POST
+def record_watch(request, movie_id):
+    """Record playback progress for a movie."""
+    try:
+        watch_duration = int(request.POST.get('watch_duration', 0))
+        total_duration = int(request.POST['total_duration']) if request.POST.get('total_duration') else None
+    except ValueError:
+        return JsonResponse({'error': 'Durations must be whole seconds'}, status=400)
+    if watch_duration < 0 or (total_duration is not None and total_duration <= 0):
+        return JsonResponse({'error': 'Invalid duration'}, status=400)
+
+    movie = _catalog_movie(movie_id)
+    if movie is None:
+        return JsonResponse({'error': 'Unknown movie'}, status=404)
+
+    profile = get_active_profile(request)
+    completed = bool(total_duration) and watch_duration >= 0.9 * total_duration
+    WatchEvent.objects.update_or_create(
+        profile=profile,
+        movie=movie,
+        defaults={'watch_duration': watch_duration, 'total_duration': total_duration, 'completed': completed},
+    )
+    experiments.record_event(profile.id, 'watch')
+    return JsonResponse({'success': True, 'completed': completed})
+
+@login_required
+@require_POST
+def update_list(request, movie_id):
+    """Add a movie to, or remove it from, one of the profile's saved lists."""
+    list_type = request.POST.get('list_type', 'watchlist')
+    action = request.POST.get('action', 'add')
+    if action not in ('add', 'remove') or not list_type or len(list_type) > 20:
+        return JsonResponse({'error': 'Invalid list update'}, status=400)
+
+    movie = _catalog_movie(movie_id)
+    if movie is None:
+        return JsonResponse({'error': 'Unknown movie'}, status=404)
+
+    profile = get_active_profile(request)
+    if action == 'add':
+        SavedList.objects.get_or_create(profile=profile, movie=movie, list_type=list_type)
+        experiments.record_event(profile.id, 'list_add')
+    else:
+        # Delete row by row so the post_delete signal invalidates the rails
+        for entry in SavedList.objects.filter(profile=profile, movie=movie, list_type=list_type):
+            entry.delete()
+    return JsonResponse({'success': True, 'action': action, 'list_type': list_type})
+
+# Titles shown per onboarding step, and the quick-rate buttons (no rating skips the title)
+ONBOARDING_PICKS = 12
+ONBOARDING_RATINGS = [(5, 'Loved it'), (4, 'Liked it'), (2, 'Not for me'), ('', "Haven't seen")]
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def onboarding(request):
+    """
+    Quick-rate wizard for new profiles.
+
+    Shows representative titles across catalog clusters. Each POST rates
+    (or, without ``rating``, skips) one title and returns the refreshed
+    picks, reordered around the ratings so far.
+    """
+    profile = get_active_profile(request)
+    skipped = request.session.get('onboarding_skipped', [])
+    if request.method == 'POST':
+        try:
+            movie_id = int(request.POST.get('movie_id', ''))
+            rating_value = float(request.POST['rating']) if request.POST.get('rating') else None
+            if rating_value is not None and not 1 <= rating_value <= 5:
+                raise ValueError
+        except ValueError:
+            return JsonResponse({'error': 'Invalid rating'}, status=400)
+
+        if rating_value is None:
+            request.session['onboarding_skipped'] = skipped = skipped + [movie_id]
+        else:
+            movie = _catalog_movie(movie_id)
+            if movie is None:
+                return JsonResponse({'error': 'Unknown movie'}, status=404)
+            UserRating.objects.update_or_create(profile=profile, movie=movie, defaults={'rating': rating_value})
+            cache.delete(experiments.for_you_cache_key(profile.id))
+            experiments.record_event(profile.id, 'rating')
+
+    context = {
+        'movies': recommender.get_onboarding_picks(profile, ONBOARDING_PICKS, skipped),
+        'rated_count': UserRating.objects.filter(profile=profile).count(),
+        'target_count': settings.RECOMMENDER_COLD_START_RATINGS,
+        'rating_choices': ONBOARDING_RATINGS,
+    }
+    if request.headers.get('HX-Request'):
+        return render_template(request, 'recommender/components/onboarding_picks.html', context)
+    return render_template(request, 'recommender/onboarding.html', context)
+
+def _rail_page_json(page, extra=None):
+    items = []
+    for item in page['items']:
+        movie = item['movie']
+        entry = {'id': movie.id, 'title': movie.title, 'genres': movie.genres,
+                 'release_year': movie.release_year, 'vote_average': movie.vote_average}
+        if 'progress' in item:
+            entry['progress'] = item['progress']
+        items.append(entry)
+    return JsonResponse({'items': items, 'next_cursor': page['next_cursor'], **(extra or {})})
+
+def _page_limit(request):
+    return max(1, min(int(request.GET.get('limit', rails.PAGE_SIZE)), rails.MAX_PAGE_SIZE))
+
+@login_required
+def continue_watching_rail(request):
+    """Keyset-paginated Continue Watching rail as JSON (pass ``cursor`` from the previous page)."""
+    try:
+        page = rails.continue_watching(get_active_profile(request), request.GET.get('cursor'), _page_limit(request))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+    return _rail_page_json(page)
+
+@login_required
+def my_list_rail(request):
+    """Keyset-paginated My List rail as JSON (``list_type`` defaults to the watchlist)."""
+    list_type = request.GET.get('list_type', 'watchlist')
+    try:
+        page = rails.my_list(get_active_profile(request), list_type, request.GET.get('cursor'), _page_limit(request))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+    return _rail_page_json(page, {'list_type': list_type})
+
+@condition(etag_func=_search_etag, last_modified_func=_anonymous_last_modified)
 def search(request):
-    """Search movies."""
+    """Search movies by title, or by content with ``mode=vibe``."""
     query = request.GET.get('q', '')
+    mode = 'vibe' if request.GET.get('mode') == 'vibe' else 'title'
     if not query:
-        return render(request, 'recommender/search.html', {'movies': [], 'query': query})
+        return render_template(request, 'recommender/search.html', {'movies': [], 'query': query, 'mode': mode})
 
-    movies = recommender.search_movies(query, 20)
-    return render(request, 'recommender/search.html', {'movies': movies, 'query': query})
+    mask, audience = get_viewer_eligibility(request)
+    if mode == 'vibe':
+        movies = recommender.vibe_search(query, 20, mask=mask)
+    else:
+        movies = recommender.search_movies(query, 20, mask=mask)
+    return render_template(request, 'recommender/search.html', {'movies': movies, 'query': query, 'mode': mode})
 
 @login_required
 @require_POST
@@ -191,6 +587,110 @@ def update_preferences(request):
             'preferred_actors': [actor.strip() for actor in preferred_actors if actor.strip()],
         }
     )
+    # Preferred actors feed the For You ranking of every profile of the user
+    cache.delete_many([experiments.for_you_cache_key(pk) for pk in request.user.profile_set.values_list('pk', flat=True)])
 
     messages.success(request, 'Preferences updated!')
     return redirect('dashboard')
+
+def metrics_view(request):
+    """Prometheus metrics for this worker process."""
+    allowed = (
+        settings.DEBUG
+        or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+        or request.user.is_staff
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Bulk recommendations API limits
+API_MAX_K = 100
+API_MAX_SEEDS = 5000
+API_BLOCK_SIZE = 256
+API_STREAM_THRESHOLD = 200
+
+def _parse_ids(value):
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value]
+    return [int(v) for v in str(value).split(',') if v.strip()]
+
+def _api_items(movie_ids, scores):
+    rows = recommender.catalog.rows_of(movie_ids)
+    return [
+        {'id': int(movie_id), 'title': recommender.catalog.title[row], 'score': round(float(score), 6)}
+        for movie_id, row, score in zip(movie_ids, rows, scores)
+    ]
+
+def _api_chunks(movie_ids, profiles, k, mask=None):
+    """Yield the API response body in pieces, one block of seeds at a time."""
+    yield '{"k": %d, "movies": {' % k
+    first = True
+    missing = []
+    for start in range(0, len(movie_ids), API_BLOCK_SIZE):
+        block = movie_ids[start:start + API_BLOCK_SIZE]
+        results = recommender.get_recommendations_batch(block, k, mask=mask)
+        missing.extend(movie_id for movie_id in block if movie_id not in results)
+        parts = []
+        for seed, recs in results.items():
+            items = _api_items([movie_id for movie_id, _ in recs], [score for _, score in recs])
+            parts.append(f'"{seed}": {json.dumps(items)}')
+        if parts:
+            yield ('' if first else ', ') + ', '.join(parts)
+            first = False
+    yield '}, "profiles": {'
+    for n, profile in enumerate(profiles):
+        recs = recommender.get_personalized_recommendations(profile, num_recs=k)[:k]
+        items = _api_items([rec['movie']['id'] for rec in recs], [rec['score'] for rec in recs])
+        yield (', ' if n else '') + f'"{profile.id}": {json.dumps(items)}'
+    yield '}, "missing_movie_ids": %s}' % json.dumps(missing)
+
+@require_http_methods(['GET', 'POST'])
+def api_recommendations(request):
+    """
+    Top-K recommendations for many seed movies and/or profiles in one call.
+
+    Accepts ``movie_ids``, ``profile_ids`` and ``k`` as query parameters
+    (comma-separated ids) or as a JSON body. Seed movies are scored in blocks
+    with one sparse matrix product per block; large batches are streamed.
+    Seed results are filtered by the viewer's eligibility mask, like the
+    similar-movies rail. Profile ids must belong to the requesting user (any
+    profile for staff). POSTs need the CSRF token, as the API uses the session.
+    """
+    if request.method == 'POST':
+        try:
+            params = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+        if not isinstance(params, dict):
+            return JsonResponse({'error': 'JSON body must be an object'}, status=400)
+    else:
+        params = request.GET
+
+    try:
+        movie_ids = _parse_ids(params.get('movie_ids', []))
+        profile_ids = _parse_ids(params.get('profile_ids', []))
+        k = int(params.get('k', 10))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'movie_ids, profile_ids and k must be integers'}, status=400)
+    if not 1 <= k <= API_MAX_K:
+        return JsonResponse({'error': f'k must be between 1 and {API_MAX_K}'}, status=400)
+    if len(movie_ids) + len(profile_ids) > API_MAX_SEEDS:
+        return JsonResponse({'error': f'At most {API_MAX_SEEDS} seeds per request'}, status=400)
+
+    profiles = []
+    if profile_ids:
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required for profile_ids'}, status=401)
+        queryset = Profile.objects.filter(id__in=profile_ids)
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        profiles = list(queryset)
+        if len(profiles) != len(set(profile_ids)):
+            return JsonResponse({'error': 'Unknown or inaccessible profile ids'}, status=403)
+
+    chunks = _api_chunks(movie_ids, profiles, k, mask=get_viewer_eligibility(request)[0])
+    stream = str(params.get('stream', '')).lower() in ('1', 'true')
+    if stream or len(movie_ids) + len(profiles) > API_STREAM_THRESHOLD:
+        return StreamingHttpResponse(chunks, content_type='application/json')
+    return HttpResponse(''.join(chunks), content_type='application/json')